@@ -3,8 +3,7 @@ import argparse
 import lintreview.github as github
 import sys
 
-from flask import url_for
-from lintreview.web import app
+from lintreview.config import get_config
 
 
 def main():
@@ -37,26 +36,32 @@ def process_hook(func, args):
     """
     Generic helper for processing hook commands.
     """
+    config = get_config()
     credentials = None
     if args.login_user:
         credentials = {
             'GITHUB_OAUTH_TOKEN': args.login_user,
+            'GITHUB_URL': config['GITHUB_URL'],
         }
 
-    with app.app_context():
-        if credentials:
-            credentials['GITHUB_URL'] = app.config['GITHUB_URL']
-            repo = github.get_repository(
-                credentials,
-                args.user,
-                args.repo)
-        else:
-            repo = github.get_repository(
-                app.config,
-                args.user,
-                args.repo)
-        endpoint = url_for('start_review', _external=True)
-    func(repo, endpoint)
+    repo = github.get_repository(
+        credentials or config,
+        args.user,
+        args.repo)
+    func(repo, hook_url(config))
+
+
+def hook_url(config):
+    """
+    Get the external URL of the start_review endpoint
+    without importing the flask app in lintreview.web.
+    """
+    server_name = config.get('SERVER_NAME')
+    if not server_name:
+        raise ValueError('SERVER_NAME must be set to build the hook URL')
+    scheme = config.get('PREFERRED_URL_SCHEME') or 'http'
+    root = (config.get('APPLICATION_ROOT') or '/').rstrip('/')
+    return u'{}://{}{}/review/start'.format(scheme, server_name, root)
 
 
 def create_parser():
@@ -0,0 +1,48 @@
+from __future__ import absolute_import
+import errno
+import fcntl
+import hashlib
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+
+def acquire(path, key, limit):
+    """Acquire one of `limit` review slots for key.
+
+    Slots are exclusive locks on files in path, so they are shared
+    by all workers using the same path, and are released if a worker
+    dies. Returns an open slot to pass to release(), or None if all
+    slots are in use.
+    """
+    if not os.path.isdir(path):
+        try:
+            os.makedirs(path)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+    digest = hashlib.sha1(key.encode('utf8')).hexdigest()
+    for i in range(limit):
+        filename = os.path.join(path, u'{}.{}.lock'.format(digest, i))
+        slot = open(filename, 'a')
+        try:
+            fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError) as e:
+            slot.close()
+            if e.errno not in (errno.EAGAIN, errno.EACCES):
+                raise
+            continue
+        log.debug('Acquired slot %s for %s', i, key)
+        return slot
+    return None
+
+
+def release(slot):
+    """Release a slot returned by acquire()"""
+    if slot is None:
+        return
+    try:
+        fcntl.flock(slot, fcntl.LOCK_UN)
+    finally:
+        slot.close()
@@ -1,17 +1,31 @@
 from __future__ import absolute_import
+import fnmatch
+import hashlib
 import os
 import logging.config
+import six
+import threading
+from collections import OrderedDict
 
-from flask.config import Config
 from six.moves.configparser import ConfigParser
 from six import StringIO
 
+# Review configs by app config, defaults file and lintrc contents.
+_review_configs = OrderedDict()
+_review_configs_lock = threading.Lock()
+REVIEW_CONFIG_CACHE_SIZE = 100
+
+# The application config once loaded by get_config()
+_config = None
+_config_lock = threading.Lock()
+
 
 def load_config():
     """
     Loads the config files merging the defaults
     with the file defined in environ.LINTREVIEW_SETTINGS if it exists.
     """
+    from flask.config import Config
     config = Config(os.getcwd())
 
     if 'LINTREVIEW_SETTINGS' in os.environ:
@@ -34,6 +48,19 @@ def load_config():
     return config
 
 
+def get_config():
+    """
+    Get the application config, loading it on first use
+    instead of when modules are imported.
+    """
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = load_config()
+    return _config
+
+
 def get_lintrc_defaults(config):
     """
     Load the default lintrc, if it exists
@@ -57,6 +84,37 @@ def build_review_config(ini_config, app_config=None):
     return config
 
 
+def cached_review_config(ini_config, app_config):
+    """
+    Get a frozen ReviewConfig for the ini config and app_config.
+
+    Configs are shared by reviews of repositories with the same
+    lintrc, and rebuilt when the LINTRC_DEFAULTS file changes.
+    app_config is expected to stay the same once loaded.
+    """
+    defaults = app_config.get('LINTRC_DEFAULTS')
+    if defaults:
+        stat = os.stat(defaults)
+        defaults = (defaults, stat.st_mtime, stat.st_size)
+    contents = ini_config
+    if isinstance(contents, six.text_type):
+        contents = contents.encode('utf8')
+    key = (id(app_config), defaults, hashlib.sha1(contents).hexdigest())
+    with _review_configs_lock:
+        if key in _review_configs:
+            entry = _review_configs.pop(key)
+            _review_configs[key] = entry
+            if entry[0] is app_config:
+                return entry[1]
+    config = build_review_config(ini_config, dict(app_config))
+    config.freeze()
+    with _review_configs_lock:
+        _review_configs[key] = (app_config, config)
+        while len(_review_configs) > REVIEW_CONFIG_CACHE_SIZE:
+            _review_configs.popitem(last=False)
+    return config
+
+
 def comma_value(values):
     return [x.strip() for x in values.split(',')]
 
@@ -80,9 +138,14 @@ class ReviewConfig(object):
     """
     def __init__(self, data=None):
         self._data = {}
+        self._frozen = False
         if data:
             self._data = data
 
+    def freeze(self):
+        """Prevent further updates so the config can be shared."""
+        self._frozen = True
+
     def update(self, data):
         """
         Does a shallow merge of configuration settings.
@@ -94,6 +157,8 @@ class ReviewConfig(object):
         empty config, and the current data has non-empty config, the
         non-empty config will be retained.
         """
+        if self._frozen:
+            raise TypeError('Cannot update a frozen ReviewConfig')
         for key, value in data.items():
             if key == 'linters' and 'linters' in self._data:
                 self._update_linter_config(value)
@@ -127,7 +192,7 @@ class ReviewConfig(object):
 
     def linter_config(self, tool):
         try:
-            return self._data['linters'][tool]
+            return dict(self._data['linters'][tool])
         except Exception:
             return {}
 
@@ -143,6 +208,23 @@ class ReviewConfig(object):
         except Exception:
             return 'commit'
 
+    def fixers_combined(self):
+        """Whether or not fixers and linters should share a container run.
+        """
+        try:
+            return boolean_value(self._data['FIXERS_COMBINED'])
+        except Exception:
+            return False
+
+    def local_diff(self):
+        """Whether or not changes should be read from the clone
+        with `git diff` instead of the pull request files API.
+        """
+        try:
+            return boolean_value(self._data['LOCAL_DIFF'])
+        except Exception:
+            return False
+
     def ignore_patterns(self):
         try:
             return self._data['files']['ignore']
@@ -168,6 +250,31 @@ class ReviewConfig(object):
         except Exception:
             return None
 
+    def tool_parallelism(self):
+        """Get the number of file batches a tool can run concurrently.
+        """
+        try:
+            return max(1, int(self._data['TOOL_PARALLELISM']))
+        except Exception:
+            return 1
+
+    def profile_enabled(self, repository):
+        """Whether or not reviews of `repository` (user/repo)
+        should be profiled.
+
+        Repositories matching PROFILE_REPOSITORIES are always profiled.
+        The `[review] profile` .lintrc option is only used when
+        PROFILE_LINTRC is enabled.
+        """
+        patterns = self._data.get('PROFILE_REPOSITORIES') or []
+        if any(fnmatch.fnmatch(repository, p) for p in patterns):
+            return True
+        try:
+            return (boolean_value(self._data['PROFILE_LINTRC']) and
+                    boolean_value(self._data['review']['profile']))
+        except Exception:
+            return False
+
     def passed_review_label(self):
         """Get the label name that is managed by review publishing
         """
@@ -1,11 +1,18 @@
 from __future__ import absolute_import
-import fnmatch
+import bisect
+import difflib
+from array import array
+from itertools import chain
 import re
 import logging
 from collections import namedtuple
 
 log = logging.getLogger(__name__)
 
+# Compiled ignore patterns by the tuple of patterns.
+_matchers = {}
+MATCHER_CACHE_SIZE = 100
+
 # Adapter to make parsed text diffs quack like github API
 # responses.
 DiffAdapter = namedtuple(
@@ -15,19 +22,32 @@ DiffAdapter = namedtuple(
 )
 
 
+FILE_HEADER = 'diff --git '
+
+
 def parse_diff(text):
     """Parse the output of `git diff` into
     a DiffCollection and set of diff objects
+
+    Files without a patch, like binary files or renames
+    without changes, are skipped. Renamed files with changes
+    have the `renamed` status, like in the pull request files API.
     """
     if not text:
         raise ParseError('No diff provided')
-    file_pattern = r'diff \-\-git a/.* b/.*'
-    blocks = re.split(file_pattern, text)
     diffs = []
-    for chunk in blocks:
-        if len(chunk) == 0:
-            continue
-        diffs.append(parse_file_diff(chunk))
+    if text.startswith(FILE_HEADER):
+        start = 0
+    else:
+        start = _find_line(text, FILE_HEADER, 0)
+    while start != -1:
+        end = _find_line(text, FILE_HEADER, start + 1)
+        if _find_line(text, '+++ ', start, end) == -1:
+            log.debug('Skipping diff without a patch %s',
+                      text[start:text.find('\n', start)])
+        else:
+            diffs.append(parse_file_diff(text, start, end))
+        start = end
     if not diffs:
         msg = u'Could not parse any diffs from provided diff text.'
         raise ParseError(msg)
@@ -35,35 +55,193 @@ def parse_diff(text):
     return DiffCollection(diffs)
 
 
-def parse_file_diff(chunk):
+def parse_file_diff(text, start=0, end=-1):
+    """Parse the diff of a single file in text[start:end]
+
+    The git headers are skipped, and the patch is sliced
+    out of text in one piece.
+    """
+    if end == -1:
+        end = len(text)
     filename = None
+    status = 'modified'
+    header = _find_line(text, '+++', start, end)
+    if header != -1:
+        line_end = text.find('\n', header, end)
+        if line_end == -1:
+            line_end = end
+        filename = text[header + 6:line_end]
+        if _find_line(text, 'rename to ', start, header) != -1:
+            status = 'renamed'
+        # Deleted files have no new name, use the old one.
+        elif text.startswith('+++ /dev/null', header):
+            status = 'removed'
+            old = _find_line(text, '--- a/', start, header)
+            if old != -1:
+                filename = text[old + 6:header - 1]
+        start = line_end + 1
+    if not filename or start >= end:
+        msg = u'Could not parse diff for {}'.format(filename)
+        raise ParseError(msg)
+
+    return DiffAdapter(
+        patch=text[start:end],
+        filename=filename,
+        sha=None,
+        status=status,
+        # Placeholder values to quack like github data.
+        additions=1,
+        deletions=1,
+        changes=1)
+
+
+def _find_line(text, prefix, start, end=None):
+    """Find the offset of the first line starting with
+    prefix in text[start:end]. Returns -1 if there is none."""
+    if end is None:
+        end = len(text)
+    offset = text.find('\n' + prefix, start, end)
+    if offset == -1:
+        return -1
+    return offset + 1
+
+
+def create_file_diff(filename, original, updated):
+    """Create a DiffAdapter from the original and updated contents
+    of a file without shelling out to `git diff`.
+
+    Returns None if the contents are the same.
+    """
+    if original == updated:
+        return None
+    lines = difflib.unified_diff(
+        _split_lines(original),
+        _split_lines(updated),
+        n=3)
     patch = []
-    for line in chunk.split('\n'):
-        # Ignore the - filename and index refspec
-        if line.startswith('---') or line.startswith('index'):
-            continue
-        if line.startswith('+++'):
-            filename = line[6:]
+    for i, line in enumerate(lines):
+        # Skip the ---/+++ header lines
+        if i < 2:
             continue
-        if not filename:
+        if line.startswith('@@'):
+            patch.append(line.rstrip('\n') + '\n')
             continue
         patch.append(line)
-
-    if not patch:
-        msg = u'Could not parse diff for {}'.format(filename)
-        raise ParseError(msg)
-
+        if not line.endswith('\n'):
+            patch.append('\n\\ No newline at end of file\n')
     return DiffAdapter(
-        patch='\n'.join(patch),
+        patch=''.join(patch),
         filename=filename,
         sha=None,
         status='modified',
-        # Placeholder values to quack like github data.
         additions=1,
         deletions=1,
         changes=1)
 
 
+def _split_lines(text):
+    """Split text on newlines keeping line endings.
+    Unlike str.splitlines() only \\n is treated as a line break."""
+    lines = [line + '\n' for line in text.split('\n')]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def line_ranges(lines):
+    """Convert a collection of line numbers into a sorted
+    list of inclusive (start, end) ranges of contiguous lines.
+    """
+    return merge_ranges((line, line) for line in lines)
+
+
+def merge_ranges(ranges):
+    """Merge inclusive (start, end) ranges into a sorted list
+    of ranges, combining ranges that overlap or are adjacent.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and merged[-1][1] + 1 >= start:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def ranges_overlap(ranges, start, end):
+    """Check if the inclusive range start-end overlaps any
+    range in a sorted list of ranges from line_ranges().
+    """
+    index = bisect.bisect_right(ranges, (end, float('inf')))
+    return index > 0 and ranges[index - 1][1] >= start
+
+
+def compile_patterns(patterns):
+    """Compile glob patterns into a single match function.
+
+    Patterns use fnmatch syntax, where `*` also matches `/`.
+    A `**/` segment matches zero or more directories, so
+    `**/build/*` matches both `build/app.js` and `src/build/app.js`.
+    Compiled patterns are cached, so each set of ignore patterns
+    is only compiled once.
+    """
+    key = tuple(patterns)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        regex = u'|'.join(translate_pattern(pattern) for pattern in key)
+        matcher = re.compile(u'(?:{})\\Z'.format(regex), re.S).match
+        if len(_matchers) >= MATCHER_CACHE_SIZE:
+            _matchers.clear()
+        _matchers[key] = matcher
+    return matcher
+
+
+def translate_pattern(pattern):
+    """Translate a glob pattern into a regular expression.
+
+    Based on fnmatch.translate() with support for `**/`.
+    """
+    i, n = 0, len(pattern)
+    res = []
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == '*':
+            while i < n and pattern[i] == '*':
+                i += 1
+            double = pattern[i - 2:i] == '**'
+            at_segment = i - 2 == 0 or pattern[i - 3:i - 2] == '/'
+            if double and at_segment and pattern[i:i + 1] == '/':
+                res.append('(?:.*/)?')
+                i += 1
+            else:
+                res.append('.*')
+        elif c == '?':
+            res.append('.')
+        elif c == '[':
+            j = i
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                res.append('\\[')
+            else:
+                stuff = pattern[i:j].replace('\\', '\\\\')
+                i = j + 1
+                if stuff[0] == '!':
+                    stuff = '^' + stuff[1:]
+                elif stuff[0] == '^':
+                    stuff = '\\' + stuff
+                res.append('[{}]'.format(stuff))
+        else:
+            res.append(re.escape(c))
+    return ''.join(res)
+
+
 class ParseError(RuntimeError):
     pass
 
@@ -133,16 +311,12 @@ class DiffCollection(object):
     def get_files(self, ignore_patterns=None):
         """Get the names of all files that have changed
         """
+        if not ignore_patterns:
+            return [change.filename for change in self._diffs]
+        ignored = compile_patterns(ignore_patterns)
         return [change.filename
                 for change in self._diffs
-                if not self._ignore_file(change.filename, ignore_patterns)]
-
-    def _ignore_file(self, filename, ignore_patterns):
-        if not ignore_patterns:
-            return False
-        matches = [fnmatch.fnmatch(filename, pattern)
-                   for pattern in ignore_patterns]
-        return any(matches)
+                if not ignored(change.filename)]
 
     def all_changes(self, filename):
         """Get all the changes for a given file independant
@@ -178,15 +352,21 @@ class Diff(object):
     Github's API returns one Diff per file
     in a pull request.
     """
+    __slots__ = ('_filename', '_sha', '_hunks', '_source')
+
     def __init__(self, patch, filename, sha, hunks=None):
         self._filename = filename
         self._sha = sha
+        self._source = None
+        self._hunks = None
         if hunks is not None:
             for hunk in hunks:
                 assert isinstance(hunk, Hunk), 'Hunk objects are required.'
             self._hunks = tuple(hunks)
         else:
-            self._parse_hunks(patch)
+            # Hunks are parsed when they are first needed, so files
+            # that are ignored or never linted are not parsed.
+            self._source = patch
 
     def _parse_hunks(self, patch):
         """Parse the diff data into a collection of hunks.
@@ -195,29 +375,79 @@ class Diff(object):
         version as we care about the new state of the file when
         applying linters. When applying fixers if an added/modified
         line intersects with the previous change we also care.
+
+        The patch is scanned once. Runs of changed lines are
+        collected as each line is read, and hunks keep offsets into
+        the patch instead of copies of their text.
         """
         hunks = []
-        hunk_separator = r'(^\@\@ \-\d+,\d+ \+\d+(?:,\d+)? \@\@.*?\n)'
-        blocks = re.split(hunk_separator, patch, 0, re.M)
-
-        if len(blocks) and blocks[0] == '':
-            del blocks[0]
-
-        offset = 0
-        header = body = False
-        for block in blocks:
-            if block.startswith('@@'):
-                header = block
-            else:
-                body = block
-            if header and body:
-                hunks.append(Hunk(header, body, offset))
-                offset += 1 + body.count('\n')
-                header = body = False
+        hunk = None
+        match_header = Hunk.start_line_pattern.match
+        length = len(patch)
+        # The position of a line is its offset from the first
+        # hunk header. Github uses positions to place comments.
+        position = -1
+        line_num = old_line_num = 0
+        start = 0
+        for line in patch.split('\n'):
+            end = start + len(line) + 1
+            first = line[:1]
+            if first == '@' and end <= length:
+                match = match_header(line)
+                if match:
+                    if hunk is not None:
+                        hunk._end = start
+                        hunks.append(hunk)
+                    hunk = Hunk(patch, start)
+                    add_starts = hunk._add_starts
+                    add_ends = hunk._add_ends
+                    add_positions = hunk._add_positions
+                    del_ends = hunk._del_ends
+                    last_add = last_position = last_del = -1
+                    old_line_num = int(match.group(1)) - 1
+                    line_num = int(match.group(2)) - 1
+                    position += 1
+                    start = end
+                    continue
+            start = end
+            if hunk is None:
+                continue
+            position += 1
+            if first == '-':
+                deleted = old_line_num + 1
+                if deleted > last_del + 1:
+                    hunk._del_starts.append(deleted)
+                    del_ends.append(deleted)
+                elif deleted > last_del:
+                    del_ends[-1] = deleted
+                last_del = deleted
+                continue
+            # '\ No newline at end of file' markers are not lines.
+            if first == '\\':
+                continue
+            # Increment lines through additions and
+            # unchanged lines.
+            line_num += 1
+            old_line_num += 1
+            if first == '+':
+                # Consecutive additions extend the current run.
+                if line_num == last_add + 1 and \
+                        position == last_position + 1:
+                    add_ends[-1] = line_num
+                else:
+                    add_starts.append(line_num)
+                    add_ends.append(line_num)
+                    add_positions.append(position)
+                last_add = line_num
+                last_position = position
+        if hunk is not None:
+            hunks.append(hunk)
         self._hunks = tuple(hunks)
 
     @property
     def hunks(self):
+        if self._hunks is None:
+            self._parse_hunks(self._source)
         return self._hunks
 
     @property
@@ -226,7 +456,7 @@ class Diff(object):
 
     @property
     def patch(self):
-        return "".join([hunk.patch for hunk in self._hunks])
+        return "".join([hunk.patch for hunk in self.hunks])
 
     @property
     def commit(self):
@@ -251,7 +481,7 @@ class Diff(object):
         Find out if a particular line changed in this commit's
         diffs
         """
-        for hunk in self._hunks:
+        for hunk in self.hunks:
             if hunk.has_line_changed(line):
                 return True
         return False
@@ -259,15 +489,15 @@ class Diff(object):
     def added_lines(self):
         """Get the line numbers of lines that were added"""
         adds = set()
-        for hunk in self._hunks:
-            adds = adds.union(hunk.added_lines())
+        for hunk in self.hunks:
+            adds.update(hunk.added_lines())
         return adds
 
     def deleted_lines(self):
         """Get the line numbers of lines that were deleted"""
         dels = set()
-        for hunk in self._hunks:
-            dels = dels.union(hunk.deleted_lines())
+        for hunk in self.hunks:
+            dels.update(hunk.deleted_lines())
         return dels
 
     def line_position(self, lineno):
@@ -275,23 +505,30 @@ class Diff(object):
         Find the line number position given a line number in the new
         file content.
         """
-        for hunk in self._hunks:
+        for hunk in self.hunks:
             position = hunk.line_position(lineno)
             if position:
                 return position
         return None
 
+    def added_ranges(self):
+        """Get the sorted ranges of lines that were added"""
+        return merge_ranges(chain.from_iterable(
+            hunk.added_ranges() for hunk in self.hunks))
+
     def intersection(self, other):
         """Get the intersecting or overlapping hunks that
         intersect with hunks in `other`"""
         overlapping = []
-        other_added = other.added_lines()
-        for hunk in self._hunks:
-            added = hunk.added_lines()
-            deleted = hunk.deleted_lines()
-            if other_added.intersection(added) or \
-                    other_added.intersection(deleted):
-                overlapping.append(hunk)
+        other_added = other.added_ranges()
+        if not other_added:
+            return overlapping
+        for hunk in self.hunks:
+            ranges = hunk.added_ranges() + hunk.deleted_ranges()
+            for start, end in ranges:
+                if ranges_overlap(other_added, start, end):
+                    overlapping.append(hunk)
+                    break
         return overlapping
 
 
@@ -301,65 +538,69 @@ class Hunk(object):
     Each Diff is made of multiple hunks of various sizes.
     Each Hunk begins with the ``@@`` delimiter.
     """
-    start_line_pattern = re.compile('\@\@ \-(\d+),\d+ \+(\d+)(?:,\d+)? \@\@')
-
-    def __init__(self, header, patch, offset):
-        self._header = header
-        self._patch = patch
-        self._parse(patch, offset)
-
-    def _parse(self, patch, offset):
-        match = self.start_line_pattern.match(self._header)
-        if not match:
-            msg = u'Could not parse hunk header {}'.format(self._header)
-            raise ParseError(msg)
-
-        # Account for the header
-        offset += 1
-
-        # Compensate for the increment done in the line loop
-        line_num = int(match.group(2)) - 1
-        old_line_num = int(match.group(1)) - 1
-
-        additions = []
-        deletions = []
-        line_map = {}
-        for line in self._patch.split('\n'):
-            # Increment lines through additions and
-            # unchanged lines.
-            if not line.startswith('-'):
-                line_num += 1
-                old_line_num += 1
-            if line.startswith('-'):
-                deletions.append(old_line_num + 1)
-            if line.startswith('+'):
-                additions.append(line_num)
-                line_map[line_num] = offset
-            offset += 1
-        self._additions = set(additions)
-        self._deletions = set(deletions)
-        self._positions = line_map
+    start_line_pattern = re.compile(
+        r'\@\@ \-(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? \@\@')
+
+    __slots__ = ('_source', '_start', '_end',
+                 '_add_starts', '_add_ends', '_add_positions',
+                 '_del_starts', '_del_ends')
+
+    def __init__(self, source, start, end=None):
+        """Hunks are created by Diff, which fills in the
+        changed lines while scanning the patch in `source`.
+
+        Changed lines are stored as sorted runs of contiguous
+        lines, so memory grows with the number of runs instead
+        of the number of lines. Each run of additions also has
+        the position of its first line.
+        """
+        self._source = source
+        self._start = start
+        self._end = end
+        self._add_starts = array('i')
+        self._add_ends = array('i')
+        self._add_positions = array('i')
+        self._del_starts = array('i')
+        self._del_ends = array('i')
 
     @property
     def patch(self):
-        return "".join([self._header, self._patch])
+        return self._source[self._start:self._end]
+
+    def _find_run(self, starts, ends, lineno):
+        """Find the index of the run containing lineno or -1"""
+        if lineno is None:
+            return -1
+        index = bisect.bisect_right(starts, lineno) - 1
+        if index >= 0 and lineno <= ends[index]:
+            return index
+        return -1
 
     def contains_line(self, lineno):
         """Check if a hunk contains the provided lineno
         in either its deletions or additions"""
-        return lineno in self._additions or lineno in self._deletions
+        return (self.has_line_changed(lineno) or
+                self._find_run(self._del_starts, self._del_ends, lineno) >= 0)
 
     def has_line_changed(self, lineno):
         """Check if a line was added"""
-        return lineno in self._additions
+        return self._find_run(self._add_starts, self._add_ends, lineno) >= 0
 
     def added_lines(self):
         """Get the lines added in this hunk"""
-        return self._additions
+        return set(_expand(self._add_starts, self._add_ends))
 
     def deleted_lines(self):
         """Get the lines deleted in this hunk"""
-        return self._deletions
+        return set(_expand(self._del_starts, self._del_ends))
+
+    def added_ranges(self):
+        """Get the sorted ranges of lines added in this hunk"""
+        return merge_ranges(zip(self._add_starts, self._add_ends))
+
+    def deleted_ranges(self):
+        """Get the sorted ranges of lines deleted in this hunk"""
+        return list(zip(self._del_starts, self._del_ends))
 
     def line_position(self, line_number):
         """Find the line position given a line number in the
@@ -367,6 +608,15 @@ class Hunk(object):
 
         The line position is used to post github comments.
         """
-        if line_number in self._positions:
-            return self._positions[line_number]
-        return None
+        index = self._find_run(self._add_starts, self._add_ends, line_number)
+        if index < 0:
+            return None
+        return self._add_positions[index] + line_number - \
+            self._add_starts[index]
+
+
+def _expand(starts, ends):
+    """Iterate the lines in runs of lines"""
+    for start, end in zip(starts, ends):
+        for line in range(start, end + 1):
+            yield line
@@ -1,14 +1,27 @@
 from __future__ import absolute_import
 import logging
+import lintreview.metrics as metrics
 import subprocess
 import six
 import os
+import threading
+from contextlib import contextmanager
+from timeit import default_timer
+from six.moves import shlex_quote
 
 log = logging.getLogger(__name__)
 
 # The base path for all docker operations
 DOCKER_BASE = '/src'
 
+# State for chained container runs.
+_chain = threading.local()
+
+container_runs = metrics.histogram(
+    'lintreview_container_run_seconds',
+    'Duration of tool container runs by image',
+    ('image',))
+
 
 def replace_basedir(base, files):
     """Replace `base` with the docker base path"""
@@ -55,6 +68,43 @@ def image_exists(name):
     return len(output) > 0
 
 
+def image_digest(name):
+    """Get the full id of a docker image or None if it doesn't exist"""
+    process = subprocess.Popen(
+        ['docker', 'images', '-q', '--no-trunc', name],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        shell=False)
+    output, error = process.communicate()
+    output = output.decode('utf8').strip()
+    if not output:
+        return None
+    return output.split('\n')[0]
+
+
+def build_image(name, path):
+    """Build the named image using `<name>.Dockerfile` in path"""
+    dockerfile = os.path.join(path, name + '.Dockerfile')
+    if not os.path.exists(dockerfile):
+        raise ValueError(u'No Dockerfile for {} in {}'.format(name, path))
+    cmd = ['docker', 'build', '-t', name, '-f', dockerfile, path]
+    log.info('Building %s image', name)
+    log.debug('Running %s', cmd)
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True)
+
+    # Get output bytes/string
+    output, error = process.communicate()
+    output = error + output
+    if process.returncode != 0:
+        raise ValueError(output)
+
+
 def images():
     """Get the docker image list"""
     process = subprocess.Popen(
@@ -82,6 +132,93 @@ def containers(include_stopped=False):
     return output.decode('utf8')
 
 
+class RunChain(object):
+    """Chains the last run() made before link() is called
+    with the first run() made after it. See chain_runs().
+    """
+
+    def __init__(self):
+        self.deferring = True
+        self.done = False
+        self.pending = None
+
+    def link(self):
+        """Stop deferring runs. The next run() is chained with
+        the deferred run, if there is one."""
+        self.deferring = False
+
+    def add(self, image, command, source_dir, env):
+        """Add a run to the chain.
+
+        Returns the command to run now, or None when the
+        run was deferred.
+        """
+        current = {
+            'image': image,
+            'command': command,
+            'source_dir': source_dir,
+            'env': env,
+        }
+        pending, self.pending = self.pending, None
+        if pending is not None and (
+                self.deferring or not self._matches(pending, current)):
+            self._run(pending)
+            pending = None
+        if self.deferring:
+            log.debug('Deferring %s to chain with the next run', command)
+            self.pending = current
+            return None
+        self.done = True
+        if pending is None:
+            return command
+        log.info('Running chained commands in %s container', image)
+        return chain_commands(pending['command'], command)
+
+    def flush(self):
+        """Run the deferred run on its own, if there is one."""
+        pending, self.pending = self.pending, None
+        if pending is not None:
+            self._run(pending)
+
+    def _run(self, pending):
+        _run(pending['image'], pending['command'], pending['source_dir'],
+             env=pending['env'])
+
+    def _matches(self, pending, current):
+        return (pending['image'] == current['image'] and
+                pending['source_dir'] == current['source_dir'] and
+                pending['env'] == current['env'])
+
+
+@contextmanager
+def chain_runs():
+    """Run a fixer and linter in one container.
+
+    Inside this context calls to run() are deferred and return an
+    empty string, until link() is called on the yielded RunChain.
+    The first run() after that is executed in a single container
+    along with the last deferred run when both use the same image,
+    source_dir and env. The output of the deferred command is
+    discarded. Otherwise the deferred command is run on its own first.
+    """
+    chain = RunChain()
+    _chain.current = chain
+    try:
+        yield chain
+    finally:
+        _chain.current = None
+    chain.flush()
+
+
+def chain_commands(first, second):
+    """Create a shell command that runs `first` and then `second`.
+    Output from `first` is discarded."""
+    first = u' '.join(shlex_quote(six.text_type(arg)) for arg in first)
+    second = u' '.join(shlex_quote(six.text_type(arg)) for arg in second)
+    script = u'{} > /dev/null 2>&1; {}'.format(first, second)
+    return ['sh', '-c', script]
+
+
 def run(image, command, source_dir, env=None, timeout=None, name=None):
     """Execute tool commands in docker containers.
 
@@ -91,6 +228,15 @@ def run(image, command, source_dir, env=None, timeout=None, name=None):
     The source_dir will be mounted at `/src` in the container
     for tool execution.
     """
+    chain = getattr(_chain, 'current', None)
+    if chain is not None and not chain.done and name is None:
+        command = chain.add(image, command, source_dir, env)
+        if command is None:
+            return ''
+    return _run(image, command, source_dir, env=env, name=name)
+
+
+def _run(image, command, source_dir, env=None, name=None):
     log.info('Running %s container', image)
 
     env_args = []
@@ -119,15 +265,18 @@ def run(image, command, source_dir, env=None, timeout=None, name=None):
     cmd += [six.text_type(arg).encode('utf8') for arg in command]
 
     log.debug('Running %s', cmd)
-    process = subprocess.Popen(
-        cmd,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        universal_newlines=True)
-
-    # Get output bytes/string
-    output, error = process.communicate()
+    start = default_timer()
+    with metrics.span('container'):
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True)
+
+        # Get output bytes/string
+        output, error = process.communicate()
+    container_runs.observe(default_timer() - start, image=image)
     output = error + output
     log.debug('Container output was: %s', output)
 
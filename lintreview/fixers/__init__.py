@@ -1,10 +1,19 @@
 from __future__ import absolute_import
-from lintreview.diff import parse_diff, Diff
+from lintreview.diff import (
+    DiffCollection,
+    Diff,
+    ParseError,
+    create_file_diff,
+    parse_file_diff
+)
 from lintreview.fixers.commit_strategy import CommitStrategy
 from lintreview.fixers.error import ConfigurationError
 import lintreview.docker as docker
 import lintreview.git as git
+import lintreview.metrics as metrics
+import io
 import logging
+import os
 
 log = logging.getLogger(__name__)
 
@@ -29,22 +38,106 @@ def create_context(review_config, repo_path,
     return context
 
 
-def run_fixers(tools, base_path, files):
+def read_files(base_path, files):
+    """Read the raw bytes of files relative to base_path.
+    Files that cannot be read are omitted."""
+    contents = {}
+    for filename in files:
+        try:
+            path = os.path.join(base_path, filename)
+            with io.open(path, 'rb') as f:
+                contents[filename] = f.read()
+        except (IOError, OSError) as e:
+            log.debug('Could not read %s for fixers. Got %s', filename, e)
+    return contents
+
+
+def restore_files(base_path, original):
+    """Write back the contents of files that no longer match original.
+    Files that are unchanged are left untouched.
+    Return the list of restored filenames."""
+    current = read_files(base_path, list(original.keys()))
+    restored = []
+    for filename, contents in original.items():
+        if current.get(filename) == contents:
+            continue
+        path = os.path.join(base_path, filename)
+        with io.open(path, 'wb') as f:
+            f.write(contents)
+        restored.append(filename)
+    return restored
+
+
+def _git_file_diff(base_path, filename):
+    """Get the diff of a single file from `git diff`"""
+    output = git.diff(base_path, [filename])
+    if not output:
+        return None
+    try:
+        return parse_file_diff(output)
+    except ParseError as e:
+        log.warning('Could not parse fixer diff for %s. Got %s', filename, e)
+        return None
+
+
+def diff_files(original, updated, base_path=None):
+    """Compare file contents before and after fixers ran.
+    Return a DiffCollection of the changes, or an empty list
+    if there were no changes.
+
+    Files that are not valid utf8 are diffed with `git diff`
+    in base_path instead, and skipped when base_path is not set.
+    """
+    changes = []
+    for filename, contents in original.items():
+        if filename not in updated or contents == updated[filename]:
+            continue
+        try:
+            change = create_file_diff(
+                filename,
+                contents.decode('utf8'),
+                updated[filename].decode('utf8'))
+        except UnicodeDecodeError:
+            if base_path is None:
+                log.warning('Could not decode %s, skipping fixer changes',
+                            filename)
+                continue
+            log.debug('Could not decode %s, using git diff', filename)
+            change = _git_file_diff(base_path, filename)
+        if change is not None:
+            changes.append(change)
+    if not changes:
+        return []
+    return DiffCollection(changes)
+
+
+def run_fixers(tools, base_path, files, combined=False, original=None):
     """Run fixer mode of each tool on each file
-    Return a DiffCollection based on the parsed diff
-    from the fixer changes.
+    Return a DiffCollection based on the changes made
+    by the fixers.
+
+    When combined is True, each tool is also linted in the same
+    container run as its fixer.
+
+    original is a snapshot from read_files(). When omitted
+    the files are read before the fixers run.
 
     If no diff is generated an empty list will be returned"""
     log.info('Running fixers on %d files', len(files))
 
+    if original is None:
+        original = read_files(base_path, files)
     docker_files = [docker.apply_base(f) for f in files]
     for tool in tools:
-        if tool.has_fixer():
-            tool.execute_fixer(docker_files)
-    diff = git.diff(base_path, files)
-    if diff:
-        return parse_diff(diff)
-    return []
+        if not tool.has_fixer():
+            continue
+        with metrics.span(tool.name):
+            if combined:
+                tool.execute_fixer_and_lint(docker_files)
+            else:
+                tool.execute_fixer(docker_files)
+    updated = read_files(base_path, list(original.keys()))
+    return diff_files(original, updated, base_path)
 
 
 def find_intersecting_diffs(original, fixed):
@@ -100,5 +193,24 @@ def add_strategy(name, implementation):
     workflow_strategies[name] = implementation
 
 
-def rollback_changes(path):
-    git.reset_hard(path)
+def rollback_changes(path, original=None, files=None):
+    """Undo changes made by fixers.
+
+    When a snapshot from read_files() is provided only the
+    files that were modified are restored, and changes staged by
+    a workflow strategy are unstaged. The whole working tree is
+    reset when there is no snapshot, or when any of `files`
+    is missing from it.
+    """
+    missing = []
+    if original is not None:
+        missing = [f for f in files or [] if f not in original]
+    if original is None or missing:
+        if missing:
+            log.info('%d files missing from snapshot, resetting %s',
+                     len(missing), path)
+        git.reset_hard(path)
+        return
+    restored = restore_files(path, original)
+    git.reset(path)
+    log.info('Restored %d files modified by fixers', len(restored))
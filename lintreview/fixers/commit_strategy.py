@@ -30,8 +30,15 @@ class CommitStrategy(object):
 
         git.create_branch(self.path, 'stylefixes')
         git.checkout(self.path, 'stylefixes')
+
+        # Stage all the diffs with a single index update.
+        patches = []
         for diff in diffs:
-            git.apply_cached(self.path, diff.as_diff())
+            patch = diff.as_diff()
+            if not patch.endswith('\n'):
+                patch += '\n'
+            patches.append(patch)
+        git.apply_cached(self.path, ''.join(patches))
 
         author = u'{} <{}>'.format(self.author_name, self.author_email)
         remote_branch = self.pull_request.head_branch
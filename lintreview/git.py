@@ -109,6 +109,28 @@ def diff(path, files=None):
     return output
 
 
+@log_io_error
+def diff_range(path, base, head):
+    """Get the diff of the changes made in `head` since it
+    diverged from `base`, like a pull request diff.
+
+    Options are set so user configuration can't change the
+    output that lintreview.diff.parse_diff reads. Renames are
+    detected so they match the pull request files API.
+    """
+    command = [
+        'git', '-c', 'core.quotepath=false',
+        'diff', '--no-color', '--no-ext-diff', '--find-renames',
+        '--diff-algorithm=default', '--unified=3',
+        '--src-prefix=a/', '--dst-prefix=b/',
+        u'{}...{}'.format(base, head),
+    ]
+    return_code, output = _process(command, chdir=path)
+    if return_code:
+        raise IOError(u"Unable to create diff '{}'".format(output))
+    return output
+
+
 @log_io_error
 def apply_cached(path, patch):
     """Apply a patch to the index.
@@ -213,6 +235,17 @@ def reset_hard(path):
     return True
 
 
+@log_io_error
+def reset(path):
+    """Reset the index to HEAD, leaving the working tree as is.
+    """
+    command = ['git', 'reset', '--quiet']
+    return_code, output = _process(command, chdir=path)
+    if return_code:
+        raise IOError(u"Unable to reset index '{}'".format(output))
+    return True
+
+
 @log_io_error
 def destroy(path):
     """Blow up a repo and all its contents.
@@ -238,27 +271,28 @@ def exists(path):
 def _process(command, input_val=None, chdir=False):
     """Helper method for running processes related to git.
     """
+    cwd = None
     if chdir:
-        log.debug('Changing directories to %s', chdir)
-        cwd = os.getcwd()
-        os.chdir(chdir)
+        log.debug('Running in directory %s', chdir)
+        cwd = chdir
 
     log.debug('Running %s', command)
 
+    # Use cwd instead of os.chdir() so concurrent reviews
+    # don't change each other's working directory.
     process = subprocess.Popen(
         command,
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
+        cwd=cwd,
         shell=False)
     if isinstance(input_val, six.string_types):
         input_val = input_val.encode('utf8')
     output, error = process.communicate(input=input_val)
     return_code = process.returncode
 
-    if chdir:
-        os.chdir(cwd)
     if return_code > 0:
         log.error('STDERR output: %s', error)
 
-    return return_code, (output + error).decode('utf-8')
+    return return_code, (output + error).decode('utf-8', 'replace')
@@ -1,24 +1,70 @@
 from __future__ import absolute_import
 import logging
 import github3
+import lintreview.metrics as metrics
+import os
+import six
+import threading
 from functools import partial
 
 log = logging.getLogger(__name__)
 
 GITHUB_BASE_URL = 'https://api.github.com/'
 
+# Clients by API url and token. Clients hold connection pools that
+# can't be shared with forked processes, so each process has its own.
+_clients = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+
+api_requests = metrics.counter(
+    'lintreview_github_requests_total',
+    'GitHub API requests by method and status code',
+    ('method', 'status'))
+rate_limit = metrics.gauge(
+    'lintreview_github_rate_limit_remaining',
+    'GitHub API requests remaining in the current rate limit window')
+
 
 def get_client(config):
     """
-    Factory for the Github client
+    Get the Github client for the config. Clients are re-used
+    within a process so reviews share connections to the API.
     """
-    login = github3.login
-    if config.get('GITHUB_URL', GITHUB_BASE_URL) != GITHUB_BASE_URL:
-        login = partial(github3.enterprise_login, url=config['GITHUB_URL'])
+    global _clients_pid
     if 'GITHUB_OAUTH_TOKEN' not in config:
         raise KeyError('Missing GITHUB_OAUTH_TOKEN in application config. '
                        'Update your settings.py file.')
-    return login(token=config['GITHUB_OAUTH_TOKEN'])
+    url = config.get('GITHUB_URL', GITHUB_BASE_URL)
+    key = (url, config['GITHUB_OAUTH_TOKEN'])
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        if key not in _clients:
+            _clients[key] = create_client(url, key[1])
+        return _clients[key]
+
+
+def create_client(url, token):
+    """
+    Factory for the Github client
+    """
+    login = github3.login
+    if url != GITHUB_BASE_URL:
+        login = partial(github3.enterprise_login, url=url)
+    client = login(token=token)
+    client.session.hooks['response'].append(record_response)
+    return client
+
+
+def record_response(response, *args, **kwargs):
+    """Response hook counting API requests and tracking the rate limit"""
+    api_requests.inc(method=response.request.method,
+                     status=response.status_code)
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    if remaining is not None:
+        rate_limit.set(int(remaining))
 
 
 def get_repository(config, user, repo):
@@ -32,7 +78,10 @@ def get_lintrc(repo, ref):
     """
     log.info('Fetching lintrc file')
     response = repo.file_contents('.lintrc', ref)
-    return response.decoded
+    content = response.decoded
+    if isinstance(content, six.binary_type):
+        content = content.decode('utf8')
+    return content
 
 
 def register_hook(repo, hook_url):
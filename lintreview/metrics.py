@@ -0,0 +1,384 @@
+from __future__ import absolute_import
+import json
+import logging
+import math
+import six
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer
+
+log = logging.getLogger(__name__)
+
+# The timings being recorded by the current thread, and
+# the names of the spans currently open.
+_local = threading.local()
+
+# Callables that receive timings when a review completes.
+_sinks = []
+
+# Counters, gauges and histograms by name.
+_registry = OrderedDict()
+_registry_lock = threading.Lock()
+
+# Content type of the prometheus text exposition format.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Timings(object):
+    """Durations of the stages of a single review.
+
+    Span durations are in seconds. Spans with the same name are
+    accumulated, so repeated or concurrent work is summed.
+
+    When timeline is True each span is also kept as an event
+    with its start offset and thread, in the order spans end.
+    """
+
+    def __init__(self, timeline=False):
+        self._spans = OrderedDict()
+        self._lock = threading.Lock()
+        self._created = default_timer()
+        self.timeline = [] if timeline else None
+
+    def add(self, name, duration, start=None):
+        with self._lock:
+            self._spans[name] = self._spans.get(name, 0.0) + duration
+            if self.timeline is not None and start is not None:
+                self.timeline.append({
+                    'name': name,
+                    'start': round(start - self._created, 4),
+                    'duration': round(duration, 4),
+                    'thread': threading.current_thread().name,
+                })
+
+    @contextmanager
+    def span(self, name):
+        """Record the time spent in the block as `name`"""
+        start = default_timer()
+        try:
+            yield
+        finally:
+            self.add(name, default_timer() - start, start)
+
+    def get(self, name, default=None):
+        return self._spans.get(name, default)
+
+    def as_dict(self):
+        with self._lock:
+            return OrderedDict(
+                (name, round(duration, 4))
+                for name, duration in self._spans.items())
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __iter__(self):
+        return iter(self.as_dict().items())
+
+
+def current():
+    """Get the timings and open span names of the current thread.
+
+    Pass the result to resume() to record from another thread.
+    """
+    return (getattr(_local, 'timings', None),
+            tuple(getattr(_local, 'names', ())))
+
+
+@contextmanager
+def resume(state):
+    """Record spans into the timings from current() of another thread."""
+    previous = current()
+    _local.timings, names = state
+    _local.names = list(names)
+    try:
+        yield
+    finally:
+        _local.timings, names = previous
+        _local.names = list(names)
+
+
+@contextmanager
+def activate(timings):
+    """Record spans from this thread into `timings`"""
+    with resume((timings, ())):
+        yield timings
+
+
+@contextmanager
+def span(name):
+    """Time a block of work in the active timings.
+
+    Spans opened inside other spans are named with their
+    parents, eg. `tool.flake8.container`. When no timings are
+    active this does nothing.
+    """
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        yield
+        return
+    names = _local.names
+    names.append(name)
+    full_name = '.'.join(names)
+    start = default_timer()
+    try:
+        yield
+    finally:
+        timings.add(full_name, default_timer() - start, start)
+        names.pop()
+
+
+def add_sink(sink):
+    """Add a metrics sink.
+
+    Sinks are called with the timings and a dict of tags
+    describing the review when each review completes.
+    """
+    if sink not in _sinks:
+        _sinks.append(sink)
+
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def emit(timings, **tags):
+    """Send the timings of a completed review to all sinks."""
+    for sink in list(_sinks):
+        try:
+            sink(timings, tags)
+        except Exception as e:
+            log.warning('Metrics sink %s failed. Got %s', sink, e)
+
+
+def log_sink(timings, tags):
+    """Log timings as a single JSON line"""
+    data = OrderedDict(sorted(tags.items()))
+    data['timings'] = timings.as_dict()
+    log.info('Review timings %s', json.dumps(data))
+
+
+def stage_sink(timings, tags):
+    """Observe the duration of each review stage"""
+    for name, duration in timings:
+        review_stages.observe(duration, stage=name)
+
+
+class Metric(object):
+    """Base class for metrics exposed in the prometheus text format.
+
+    Values are tracked for each combination of label values.
+    """
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        unknown = set(labels) - set(self.labels)
+        if unknown:
+            raise ValueError(u'Unknown labels {} for {}'.format(
+                ', '.join(sorted(unknown)), self.name))
+        return tuple(six.text_type(labels.get(name, ''))
+                     for name in self.labels)
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels))
+
+    def samples(self):
+        """Get (suffix, labels, value) tuples for each value"""
+        with self._lock:
+            for key, value in self._values.items():
+                yield '', list(zip(self.labels, key)), value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that can go up and down.
+
+    Gauges with a function read their value when rendered. When the
+    gauge has labels, the function returns a dict of label values,
+    as a tuple or a single value for one label, to gauge values.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, description, labels=(), function=None):
+        super(Gauge, self).__init__(name, description, labels)
+        self.function = function
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.function is None:
+            for sample in super(Gauge, self).samples():
+                yield sample
+            return
+        try:
+            value = self.function()
+        except Exception as e:
+            log.debug('Could not read %s. Got %s', self.name, e)
+            return
+        if value is None:
+            return
+        if not self.labels:
+            yield '', [], value
+            return
+        for key, sample in sorted(value.items()):
+            if not isinstance(key, tuple):
+                key = (key,)
+            yield '', list(zip(self.labels, key)), sample
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=None):
+        super(Histogram, self).__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS))
+
+    def observe(self, amount, **labels):
+        key = self._key(labels)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            value = self._values[key]
+            for i, bound in enumerate(self.buckets):
+                if amount <= bound:
+                    value[0][i] += 1
+            value[1] += amount
+            value[2] += 1
+
+    def value(self, **labels):
+        value = self._values.get(self._key(labels))
+        if value is None:
+            return None
+        return {'sum': value[1], 'count': value[2]}
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total, count)
+                      for key, (counts, total, count) in self._values.items()]
+        for key, counts, total, count in values:
+            labels = list(zip(self.labels, key))
+            for bound, bucket in zip(self.buckets, counts):
+                yield '_bucket', labels + [('le', _format(bound))], bucket
+            yield '_bucket', labels + [('le', '+Inf')], count
+            yield '_sum', labels, total
+            yield '_count', labels, count
+
+
+def register(metric):
+    """Register a metric, returning the existing metric
+    if one with the same name is already registered."""
+    with _registry_lock:
+        if metric.name in _registry:
+            return _registry[metric.name]
+        _registry[metric.name] = metric
+        return metric
+
+
+def counter(name, description, labels=()):
+    return register(Counter(name, description, labels))
+
+
+def gauge(name, description, labels=(), function=None):
+    return register(Gauge(name, description, labels, function))
+
+
+def histogram(name, description, labels=(), buckets=None):
+    return register(Histogram(name, description, labels, buckets))
+
+
+def _format(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return six.text_type(value)
+
+
+def _escape(value):
+    return (value.replace('\\', '\\\\')
+            .replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def render():
+    """Render all registered metrics in the prometheus text format"""
+    lines = []
+    for metric in list(_registry.values()):
+        lines.append(u'# HELP {} {}'.format(metric.name, metric.description))
+        lines.append(u'# TYPE {} {}'.format(metric.name, metric.kind))
+        for suffix, labels, value in metric.samples():
+            label_text = ''
+            if labels:
+                label_text = u'{{{}}}'.format(u','.join(
+                    u'{}="{}"'.format(name, _escape(label))
+                    for name, label in labels))
+            lines.append(u'{}{}{} {}'.format(
+                metric.name, suffix, label_text, _format(value)))
+    return u'\n'.join(lines) + u'\n'
+
+
+def exporter_app(environ, start_response):
+    """WSGI application serving the registered metrics"""
+    body = render().encode('utf8')
+    start_response('200 OK', [
+        ('Content-Type', CONTENT_TYPE),
+        ('Content-Length', str(len(body))),
+    ])
+    return [body]
+
+
+def start_exporter(port, host='0.0.0.0', attempts=1):
+    """Serve metrics from a background thread.
+
+    When attempts is more than one, the following ports are tried
+    if `port` is in use, so that each worker process can export
+    its own metrics. Returns the server, or None if no port was free.
+    """
+    from werkzeug.serving import make_server
+    for offset in range(attempts):
+        try:
+            server = make_server(host, port + offset, exporter_app)
+        except (IOError, OSError) as e:
+            log.debug('Could not export metrics on %s. Got %s',
+                      port + offset, e)
+            continue
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        log.info('Exporting metrics on %s:%s', host, port + offset)
+        return server
+    log.warning('Unable to export metrics. Ports %s-%s are in use.',
+                port, port + attempts - 1)
+    return None
+
+
+review_stages = histogram(
+    'lintreview_review_stage_seconds',
+    'Time spent in each stage of a review',
+    ('stage',))
+
+add_sink(log_sink)
+add_sink(stage_sink)
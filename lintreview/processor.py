@@ -1,8 +1,10 @@
 from __future__ import absolute_import
 import logging
+import lintreview.git as git
 import lintreview.tools as tools
 import lintreview.fixers as fixers
-from lintreview.diff import DiffCollection
+import lintreview.metrics as metrics
+from lintreview.diff import DiffCollection, ParseError, parse_diff
 from lintreview.fixers.error import ConfigurationError, WorkflowError
 from lintreview.review import Problems, Review, IssueComment
 
@@ -18,21 +20,66 @@ class Processor(object):
     _review = None
     _config = None
     problems = None
+    timings = None
 
-    def __init__(self, repository, pull_request, target_path, config):
+    def __init__(self, repository, pull_request, target_path, config,
+                 timings=None):
         self._config = config
         self._repository = repository
         self._pull_request = pull_request
         self._target_path = target_path
         self.problems = Problems()
+        if timings is None:
+            timings = metrics.Timings()
+        self.timings = timings
         self._review = Review(repository, pull_request, config)
 
     def load_changes(self):
-        log.info('Loading pull request patches from github.')
-        files = self._pull_request.files()
-        self._changes = DiffCollection(files)
+        with metrics.activate(self.timings), metrics.span('fetch_files'):
+            changes = None
+            if self._config.local_diff():
+                changes = self.load_local_changes()
+            if changes is None:
+                log.info('Loading pull request patches from github.')
+                files = self._pull_request.files()
+                changes = DiffCollection(files)
+            self._changes = changes
         self.problems.set_changes(self._changes)
 
+    def load_local_changes(self):
+        """Create the pull request diff from the cloned repository.
+
+        Returns None if the diff could not be created, so
+        changes can be loaded from github instead.
+        """
+        log.info('Loading pull request patches from %s.', self._target_path)
+        try:
+            text = git.diff_range(
+                self._target_path,
+                self._pull_request.base,
+                self._pull_request.head)
+            return parse_diff(text)
+        except (IOError, ParseError) as e:
+            log.warning('Could not diff %s locally, using github. Got %s',
+                        self._pull_request.display_name, e)
+            return None
+
+    def prefetch(self):
+        """Load pull request data from github before it is needed.
+
+        Used to fetch the changes, commits and existing comments while
+        the repository is cloned. Existing comments are loaded in the
+        background until the review is published. Changes read from
+        the clone are loaded later with load_changes().
+        """
+        with metrics.activate(self.timings):
+            self._review.preload_comments()
+        if not self._config.local_diff():
+            self.load_changes()
+        if tools.needs_commits(self._config.linters()):
+            with metrics.activate(self.timings):
+                self.load_commits()
+
     def run_tools(self):
         if self._changes is None:
             raise RuntimeError('No loaded changes, cannot run tools. '
@@ -42,19 +89,26 @@ class Processor(object):
         files_to_check = self._changes.get_files(
             ignore_patterns=config.ignore_patterns()
         )
-        commits_to_check = self._pull_request.commits()
-
         tool_list = tools.factory(
             config,
             self.problems,
             self._target_path)
 
-        if config.fixers_enabled():
-            self.apply_fixers(tool_list, files_to_check)
+        with metrics.activate(self.timings):
+            if config.fixers_enabled():
+                with metrics.span('fixers'):
+                    self.apply_fixers(tool_list, files_to_check)
+
+            with metrics.span('tools'):
+                tools.run(tool_list, files_to_check, self.load_commits)
 
-        tools.run(tool_list, files_to_check, commits_to_check)
+    def load_commits(self):
+        with metrics.span('fetch_commits'):
+            return self._pull_request.commits()
 
     def apply_fixers(self, tool_list, files_to_check):
+        snapshot = fixers.read_files(self._target_path, files_to_check)
+        found = len(self.problems)
         try:
             fixer_context = fixers.create_context(
                 self._config,
@@ -65,7 +119,9 @@ class Processor(object):
             fixer_diff = fixers.run_fixers(
                 tool_list,
                 self._target_path,
-                files_to_check)
+                files_to_check,
+                combined=self._config.fixers_combined(),
+                original=snapshot)
             fixers.apply_fixer_diff(
                 self._changes,
                 fixer_diff,
@@ -76,16 +132,25 @@ class Processor(object):
             self.problems.add(IssueComment(message))
         except Exception as e:
             log.warn('Fixer application failed, '
-                     'rolling back working tree. Got %s', e)
-            fixers.rollback_changes(self._target_path)
+                     'rolling back fixed files. Got %s', e)
+            fixers.rollback_changes(
+                self._target_path,
+                snapshot,
+                files_to_check)
+            # Tools linted along with their fixer found problems in
+            # the fixed files. Lint the restored files instead.
+            for tool in tool_list:
+                tool.lint_complete = False
+            self.problems.truncate(found)
 
     def publish(self, check_run_id=None):
         self.problems.limit_to_changes()
-        if check_run_id:
-            self._review.publish_checkrun(
-                self.problems,
-                check_run_id)
-        else:
-            self._review.publish_review(
-                self.problems,
-                self._pull_request.head)
+        with metrics.activate(self.timings), metrics.span('publish'):
+            if check_run_id:
+                self._review.publish_checkrun(
+                    self.problems,
+                    check_run_id)
+            else:
+                self._review.publish_review(
+                    self.problems,
+                    self._pull_request.head)
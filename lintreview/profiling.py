@@ -0,0 +1,48 @@
+from __future__ import absolute_import
+import cProfile
+import json
+import logging
+import os
+import time
+
+log = logging.getLogger(__name__)
+
+# Where profiles are written when PROFILE_PATH is not set.
+DEFAULT_PATH = '/tmp/lintreview-profiles'
+
+
+def start():
+    """Start profiling the current thread"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def save(profiler, timings, path, name):
+    """Stop the profiler and write the profile and review timings.
+
+    Creates `<name>-<timestamp>.prof`, which can be read with pstats
+    or snakeviz, and `<name>-<timestamp>.timeline.json` containing the
+    stage durations and the timeline of spans and container runs.
+
+    Returns the base path of the files, or None if they could
+    not be written.
+    """
+    profiler.disable()
+    base = os.path.join(path, u'{}-{}'.format(
+        name.replace('/', '-'),
+        time.strftime('%Y%m%d%H%M%S')))
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        profiler.dump_stats(base + '.prof')
+        with open(base + '.timeline.json', 'w') as f:
+            json.dump({
+                'timings': timings.as_dict(),
+                'timeline': timings.timeline or [],
+            }, f, indent=2)
+    except (IOError, OSError) as e:
+        log.error('Could not save profile to %s. Got %s', path, e)
+        return None
+    log.info('Saved review profile to %s', base)
+    return base
@@ -2,9 +2,17 @@ from __future__ import absolute_import
 import lintreview.github as github
 import logging
 import json
+import threading
+from collections import OrderedDict
 
 log = logging.getLogger(__name__)
 
+# Commits of recently reviewed pull requests by repository,
+# number and head sha.
+_commits = OrderedDict()
+_commits_lock = threading.Lock()
+COMMIT_CACHE_SIZE = 50
+
 
 class GithubRepository(object):
     """Abstracting wrapper for the
@@ -102,6 +110,11 @@ class GithubPullRequest(object):
         data = self.pull.as_dict()
         return data['head']['sha']
 
+    @property
+    def base(self):
+        data = self.pull.as_dict()
+        return data['base']['sha']
+
     @property
     def clone_url(self):
         """Get the clone url
@@ -160,7 +173,24 @@ class GithubPullRequest(object):
         return data['maintainer_can_modify']
 
     def commits(self):
-        return self.pull.commits()
+        """Get the list of commits in the pull request.
+
+        Commits are cached by head sha, so reviewing the same
+        head again doesn't fetch them from github.
+        """
+        data = self.pull.as_dict()
+        key = (data['base']['repo']['full_name'], self.number, self.head)
+        with _commits_lock:
+            if key in _commits:
+                commits = _commits.pop(key)
+                _commits[key] = commits
+                return commits
+        commits = list(self.pull.commits())
+        with _commits_lock:
+            _commits[key] = commits
+            while len(_commits) > COMMIT_CACHE_SIZE:
+                _commits.popitem(last=False)
+        return commits
 
     def review_comments(self):
         return self.pull.review_comments()
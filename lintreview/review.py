@@ -1,7 +1,10 @@
 from __future__ import absolute_import
 from collections import OrderedDict
 from datetime import datetime
+import hashlib
+import lintreview.metrics as metrics
 import logging
+import threading
 
 log = logging.getLogger(__name__)
 
@@ -129,6 +132,13 @@ class Comment(BaseComment):
             self.body)
 
 
+def body_hash(body):
+    """Hash a comment body for comparing with existing comments"""
+    if not isinstance(body, bytes):
+        body = body.encode('utf8')
+    return hashlib.sha1(body).digest()
+
+
 class Review(object):
     """Holds the comments from a review can
     add track problems logged and post new problems
@@ -137,12 +147,23 @@ class Review(object):
 
     def __init__(self, repo, pull_request, config):
         self._repo = repo
-        self._comments = Problems()
+        # (path, position, body hash) of existing comments.
+        self._comments = set()
+        self._comments_loaded = False
+        self._loader = None
         self._pr = pull_request
         self.config = config
 
     def comments(self, filename):
-        return self._comments.all(filename)
+        """Get the sorted (position, body hash) pairs of the
+        existing comments on a file."""
+        return sorted((position, digest)
+                      for path, position, digest in self._comments
+                      if path == filename)
+
+    def has_comment(self, filename, position, body):
+        """Check if an identical comment already exists"""
+        return (filename, position, body_hash(body)) in self._comments
 
     def publish_checkrun(self, problems, check_run_id):
         """Publish the review as a checkrun
@@ -210,7 +231,12 @@ class Review(object):
 
         # If we are submitting a comment review
         # we drop comments that have already been posted.
-        self.load_comments()
+        if self._loader is not None:
+            self._loader.join()
+            self._loader = None
+        if not self._comments_loaded:
+            with metrics.span('load_comments'):
+                self.load_comments()
         self.remove_existing(problems)
 
         has_problems = len(problems) > 0
@@ -220,34 +246,56 @@ class Review(object):
         under_threshold = (threshold is None or
                            new_problem_count < threshold)
 
-        if under_threshold:
-            self.publish_pull_review(problems, head_sha)
-        else:
-            self.publish_summary(problems)
-        self.publish_status(has_problems)
+        with metrics.span('review'):
+            if under_threshold:
+                self.publish_pull_review(problems, head_sha)
+            else:
+                self.publish_summary(problems)
+        with metrics.span('status'):
+            self.publish_status(has_problems)
 
     def load_comments(self):
         """Load the existing comments on a pull request
 
-        Results in a structure that is similar to the one used
-        for problems
+        Comments are read a page at a time, and only the path,
+        position and a hash of the body are kept.
         """
         log.debug("Loading comments for pull request '%s'", self._pr.number)
-        comments = list(self._pr.review_comments())
-
-        for comment in comments:
+        comments = set()
+        # Share path strings between comments on the same file.
+        paths = {}
+        for comment in self._pr.review_comments():
             # Workaround github3 not exposing attributes for what we need.
             guts = comment.as_dict()
-            filename = guts['path']
             if not guts['position']:
                 log.debug("Ignoring outdated diff comment '%s'", comment.id)
                 continue
-            self._comments.add(
-                filename,
-                None,
-                comment.body,
-                int(guts['position']))
-        log.debug("'%s' comments loaded", len(self._comments))
+            path = paths.setdefault(guts['path'], guts['path'])
+            comments.add((
+                path,
+                int(guts['position']),
+                body_hash(comment.body)))
+        self._comments = comments
+        self._comments_loaded = True
+        log.debug("'%s' comments loaded", len(comments))
+
+    def preload_comments(self):
+        """Start loading the existing comments in a background thread.
+
+        publish_review() waits for them to load, and loads them
+        again if loading in the background failed.
+        """
+        state = metrics.current()
+
+        def load():
+            with metrics.resume(state), metrics.span('load_comments'):
+                try:
+                    self.load_comments()
+                except Exception as e:
+                    log.warning('Could not preload comments. Got %s', e)
+        self._loader = threading.Thread(target=load)
+        self._loader.daemon = True
+        self._loader.start()
 
     def remove_existing(self, problems):
         """Modifies the problems parameter removing
@@ -258,8 +306,15 @@ class Review(object):
         an existing comment. We'll assume the program put
         the comment there, and not a human.
         """
-        for comment in self._comments:
-            problems.remove(comment)
+        if not self._comments:
+            return
+        for problem in list(problems):
+            if not isinstance(problem, Comment):
+                continue
+            if self.has_comment(problem.filename,
+                                problem.position,
+                                problem.body):
+                problems.remove(problem)
 
     def publish_pull_review(self, problems, head_commit):
         """Publish the issues contains in the problems
@@ -370,6 +425,9 @@ class Problems(object):
     def set_changes(self, changes):
         self._changes = changes
 
+    def get_changes(self):
+        return self._changes
+
     def has_changes(self):
         return self._changes and len(self._changes) > 0
 
@@ -422,6 +480,21 @@ class Problems(object):
         for p in problems:
             self.add(p)
 
+    def merge(self, other):
+        """Merge the problems from another Problems collection.
+
+        Line comments on the same position have their bodies
+        combined just as they would when added individually.
+        """
+        for problem in other:
+            if isinstance(problem, Comment):
+                self.add(problem.filename,
+                         problem.line,
+                         problem.body,
+                         problem.position)
+            else:
+                self.add(problem)
+
     def limit_to_changes(self):
         """Limit the contained problems to only those changed
         in the DiffCollection
@@ -441,17 +514,19 @@ class Problems(object):
                 items[error.key()] = error
         self._items = items
 
+    def truncate(self, size):
+        """Remove the problems added after the first `size` problems.
+        """
+        for key in list(self._items.keys())[size:]:
+            del self._items[key]
+
     def remove(self, comment):
         """Remove a problem from the list based on the filename
         position and comment.
         """
-        found = False
-        for i, item in self._items.items():
-            if item == comment:
-                found = i
-                break
-        if found is not False:
-            del self._items[found]
+        key = comment.key()
+        if key in self._items and self._items[key] == comment:
+            del self._items[key]
 
     def __len__(self):
         return len(self._items)
@@ -1,34 +1,248 @@
 from __future__ import absolute_import
+import lintreview.concurrency as concurrency
+import lintreview.diff as diff
 import lintreview.git as git
+import lintreview.github as github
+import lintreview.metrics as metrics
+import lintreview.profiling as profiling
+import lintreview.tools as tools
+import gc
+import importlib
 import logging
+import os
 
 from celery import Celery
-from copy import deepcopy
-from lintreview.config import load_config, build_review_config
+from celery.signals import worker_init, worker_process_init
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer
+from lintreview.config import get_config, cached_review_config
 from lintreview.repo import GithubRepository
 from lintreview.processor import Processor
 
-config = load_config()
+# Celery settings are read from the config when
+# the celery app is first used.
 celery = Celery('lintreview.tasks')
-celery.config_from_object(config)
+celery.add_defaults(get_config)
 
 log = logging.getLogger(__name__)
 
+# Modules that github3, requests and ThreadPool
+# import during the first review.
+PRELOAD_MODULES = ('_strptime', 'netrc', 'multiprocessing.dummy')
 
-@celery.task(ignore_result=True)
-def process_pull_request(user, repo_name, number, lintrc):
+# Seconds queue_depths() re-uses the depths it read,
+# and the last depths read with when they were read.
+QUEUE_DEPTH_TTL = 5
+_queue_depths = (None, {})
+
+# Times a review waits for a repository slot when
+# REPOSITORY_MAX_RETRIES isn't set.
+REPOSITORY_MAX_RETRIES = 60
+
+
+@worker_init.connect
+def load_tools(**kwargs):
+    """
+    Resolve the tool registry and check tool images once when
+    the worker starts so reviews don't pay the lookup cost.
+    """
+    log.info('Loaded %d tools', len(tools.registry()))
+    images = tools.check_images(get_config().get('DOCKER_IMAGE_BUILD_PATH'))
+    missing = [name for name, digest in images.items() if not digest]
+    if missing:
+        log.warning('Missing docker images: %s', ', '.join(missing))
+
+
+@worker_init.connect
+def preload(**kwargs):
+    """
+    Import and build what reviews use before the worker pool
+    forks, so child processes share it copy-on-write instead
+    of each loading it during their first review.
+    """
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    ignore = cached_review_config('', get_config()).ignore_patterns()
+    if ignore:
+        diff.compile_patterns(ignore)
+    if hasattr(gc, 'freeze'):
+        # Keep collections in child processes from writing
+        # to, and so copying, the objects loaded so far.
+        gc.freeze()
+
+
+@worker_process_init.connect
+def connect_github(**kwargs):
+    """
+    Create the GitHub client of each worker process
+    when it starts instead of in its first review.
+    """
+    config = get_config()
+    if 'GITHUB_OAUTH_TOKEN' in config:
+        github.get_client(config)
+
+
+@worker_process_init.connect
+def refresh_images(**kwargs):
+    """
+    Re-check tool images in the background of each worker
+    process, so reviews only read the image cache.
+    """
+    config = get_config()
+    tools.start_image_refresher(
+        config.get('DOCKER_IMAGE_CHECK_INTERVAL',
+                   tools.IMAGE_CHECK_INTERVAL))
+
+
+@worker_process_init.connect
+def start_metrics_exporter(**kwargs):
+    """
+    Export metrics from each worker process when METRICS_WORKER_PORT
+    is set. Each process uses the first free port at or after it.
+    """
+    config = get_config()
+    port = config.get('METRICS_WORKER_PORT')
+    if not port:
+        return
+    metrics.start_exporter(
+        int(port),
+        config.get('METRICS_WORKER_HOST', '0.0.0.0'),
+        attempts=int(config.get('METRICS_WORKER_PORTS', 32)))
+
+
+def review_queues():
+    """Get the names of the queues reviews are sent to."""
+    queues = celery.conf.CELERY_QUEUES
+    if not queues:
+        return [celery.conf.CELERY_DEFAULT_QUEUE]
+    return [queue.name for queue in queues]
+
+
+def queue_depths():
+    """
+    Get the number of pull requests waiting in each review queue.
+
+    Depths are re-used for QUEUE_DEPTH_TTL seconds, so frequent
+    metrics scrapes don't each open a broker connection.
+    """
+    global _queue_depths
+    checked_at, depths = _queue_depths
+    if checked_at is not None and \
+            default_timer() - checked_at < QUEUE_DEPTH_TTL:
+        return depths
+    depths = {}
+    with celery.connection() as conn:
+        conn.ensure_connection(max_retries=1)
+        for queue in review_queues():
+            # Missing queues close the channel, so each gets its own.
+            channel = conn.channel()
+            try:
+                result = channel.queue_declare(queue, passive=True)
+                depths[queue] = result.message_count
+            except Exception as e:
+                log.debug('Could not read depth of %s. Got %s', queue, e)
+            finally:
+                channel.close()
+    _queue_depths = (default_timer(), depths)
+    return depths
+
+
+def review_queue(changed_files, linters):
+    """
+    Choose the queue for a review based on its estimated cost.
+
+    Reviews changing many files with many linters go to
+    LARGE_REVIEW_QUEUE so they don't delay smaller reviews.
+    None is returned for the default queue.
+    """
+    config = get_config()
+    queue = config.get('LARGE_REVIEW_QUEUE')
+    threshold = config.get('LARGE_REVIEW_COST')
+    if not queue or not threshold:
+        return None
+    cost = max(1, changed_files) * max(1, linters)
+    if cost >= threshold:
+        log.info('Routing review with cost %s to %s', cost, queue)
+        return queue
+    return None
+
+
+def acquire_repository_slot(user, repo_name):
+    """
+    Acquire a review slot for the repository when
+    REPOSITORY_CONCURRENCY limits concurrent reviews.
+    Returns a tuple of (acquired, slot).
+    """
+    config = get_config()
+    limit = config.get('REPOSITORY_CONCURRENCY')
+    if not limit:
+        return True, None
+    path = config.get('REPOSITORY_SLOTS_PATH') or os.path.join(
+        config['WORKSPACE'], '.slots')
+    key = u'{}/{}'.format(user, repo_name)
+    slot = concurrency.acquire(path, key, int(limit))
+    return slot is not None, slot
+
+
+def give_up_review(config, user, repo_name, number):
+    """
+    Set an error status on a pull request that could not
+    get a repository slot after all of its retries.
+    """
+    message = u'Too many reviews of {}/{} are running, review skipped.'.format(
+        user, repo_name)
+    log.error('%s Pull request %s', message, number)
+    try:
+        repo = GithubRepository(config, user, repo_name)
+        pull_request = repo.pull_request(number)
+        repo.create_status(pull_request.head, 'error', message)
+    except Exception as e:
+        log.exception(e)
+
+
+def clone_repository(url, path, head, timings):
+    """Clone the pull request head, recording the time taken."""
+    with timings.span('clone'):
+        git.clone_or_update(get_config(), url, path, head)
+
+
+@celery.task(bind=True, ignore_result=True,
+             max_retries=REPOSITORY_MAX_RETRIES)
+def process_pull_request(self, user, repo_name, number, lintrc):
     """
     Starts processing a pull request and running the various
     lint tools against it.
     """
     log.info('Starting to process lint for %s/%s/%s', user, repo_name, number)
     log.debug("lintrc contents '%s'", lintrc)
-    review_config = build_review_config(lintrc, deepcopy(config))
+    start = default_timer()
+    config = get_config()
+    review_config = cached_review_config(lintrc, config)
 
     if len(review_config.linters()) == 0:
         log.info('No configured linters, skipping processing.')
         return
 
+    acquired, slot = acquire_repository_slot(user, repo_name)
+    if not acquired:
+        max_retries = config.get('REPOSITORY_MAX_RETRIES',
+                                 REPOSITORY_MAX_RETRIES)
+        if self.request.retries >= max_retries:
+            give_up_review(config, user, repo_name, number)
+            return
+        log.info('Too many reviews running for %s/%s. Retrying %s later.',
+                 user, repo_name, number)
+        raise self.retry(countdown=config.get('REPOSITORY_RETRY_DELAY', 10),
+                         max_retries=max_retries)
+
+    profiler = None
+    if review_config.profile_enabled(u'{}/{}'.format(user, repo_name)):
+        log.info('Profiling review of %s/%s/%s', user, repo_name, number)
+        profiler = profiling.start()
+    timings = metrics.Timings(timeline=profiler is not None)
+
+    processor = None
+    target_path = None
     try:
         log.info('Loading pull request data from github. user=%s '
                  'repo=%s number=%s', user, repo_name, number)
@@ -45,14 +259,41 @@ def process_pull_request(user, repo_name, number, lintrc):
                      target_branch)
             return
 
-        repo.create_status(pr_head, 'pending', 'Lintreview processing')
+        unknown = tools.unknown_linters(review_config.linters())
+        if unknown:
+            message = u'Unknown lint tools: {}'.format(', '.join(unknown))
+            log.error(message)
+            repo.create_status(pr_head, 'error', message)
+            return
+
+        missing = tools.missing_images(review_config)
+        if missing:
+            message = u'Lint tools are not available: {}'.format(
+                ', '.join(missing))
+            log.error(message)
+            repo.create_status(pr_head, 'error', message)
+            return
 
-        # Clone/Update repository
         target_path = git.get_repo_path(user, repo_name, number, config)
-        git.clone_or_update(config, clone_url, target_path, pr_head)
+        processor = Processor(repo, pull_request, target_path, review_config,
+                              timings=timings)
 
-        processor = Processor(repo, pull_request, target_path, review_config)
-        processor.load_changes()
+        # Clone/Update repository while pull request data is
+        # loaded from github.
+        pool = ThreadPool(1)
+        try:
+            clone = pool.apply_async(
+                clone_repository,
+                (clone_url, target_path, pr_head, timings))
+            repo.create_status(pr_head, 'pending', 'Lintreview processing')
+            processor.prefetch()
+            clone.get()
+        finally:
+            pool.close()
+            pool.join()
+
+        if review_config.local_diff():
+            processor.load_changes()
         processor.run_tools()
         processor.publish()
 
@@ -62,12 +303,26 @@ def process_pull_request(user, repo_name, number, lintrc):
     except BaseException as e:
         log.exception(e)
     finally:
-        try:
-            git.destroy(target_path)
-            log.info('Cleaned up pull request %s/%s/%s',
-                     user, repo_name, number)
-        except BaseException as e:
-            log.exception(e)
+        concurrency.release(slot)
+        timings.add('total', default_timer() - start)
+        if processor:
+            metrics.emit(timings,
+                         user=user,
+                         repo=repo_name,
+                         number=number)
+        if profiler:
+            profiling.save(
+                profiler,
+                timings,
+                config.get('PROFILE_PATH', profiling.DEFAULT_PATH),
+                u'{}-{}-{}'.format(user, repo_name, number))
+        if target_path:
+            try:
+                git.destroy(target_path)
+                log.info('Cleaned up pull request %s/%s/%s',
+                         user, repo_name, number)
+            except BaseException as e:
+                log.exception(e)
 
 
 @celery.task(ignore_result=True)
@@ -1,13 +1,62 @@
 from __future__ import absolute_import
 import lintreview.docker as docker
+import lintreview.metrics as metrics
 import logging
 import os
 import collections
+import copy
+import fnmatch
+import importlib
+import re
+import threading
+from functools import partial
+from lintreview.review import Problems
+from multiprocessing.pool import ThreadPool
 from xml.etree import ElementTree
 import six
 
 log = logging.getLogger(__name__)
 
+# Entry point group third-party tools can register under.
+ENTRY_POINT_GROUP = 'lintreview.tools'
+
+cache_requests = metrics.counter(
+    'lintreview_cache_requests_total',
+    'Cache lookups by cache and result',
+    ('cache', 'result'))
+tool_problems = metrics.counter(
+    'lintreview_problems_total',
+    'Problems found by each tool',
+    ('tool',))
+
+# Modules in lintreview.tools that provide a tool.
+BUILTIN_TOOLS = (
+    'ansible', 'black', 'checkstyle', 'commitcheck', 'credo', 'csslint',
+    'eslint', 'flake8', 'foodcritic', 'golint', 'goodcheck', 'gpg',
+    'jscs', 'jshint', 'jsonlint', 'luacheck', 'pep8', 'phpcs', 'puppet',
+    'py3k', 'rubocop', 'sasslint', 'shellcheck', 'standardjs',
+    'swiftlint', 'tslint', 'xo', 'yamllint',
+)
+
+# Precomputed metadata for a registered tool.
+ToolInfo = collections.namedtuple(
+    'ToolInfo',
+    ('name', 'tool_class', 'image', 'extensions', 'supports_fixer')
+)
+
+_registry = None
+
+# Cache of image name -> image id for registered tools, and
+# images reviews used that have not been checked yet.
+_images = {}
+_pending_images = set()
+_images_lock = threading.Lock()
+_check_images = threading.Event()
+_image_refresher = None
+
+# Seconds between image checks when DOCKER_IMAGE_CHECK_INTERVAL isn't set.
+IMAGE_CHECK_INTERVAL = 300
+
 
 class Tool(object):
     """
@@ -15,6 +64,41 @@ class Tool(object):
     """
     name = ''
 
+    # The docker image the tool runs in.
+    image = None
+
+    # File extensions the tool handles. None matches all files
+    # unless file_patterns or match_predicate are defined.
+    extensions = None
+
+    # Glob patterns matched against the basename of files that
+    # can't be matched by extension. eg. ('Dockerfile', '*.min.js')
+    file_patterns = None
+
+    # Tools can define a `match_predicate(filename)` method for files
+    # that neither extensions or file_patterns can match.
+    match_predicate = None
+
+    # Whether or not the tool has a fixer mode.
+    supports_fixer = False
+
+    # Whether or not execute_commits() needs the pull request commits.
+    # Commits are only fetched from github when an enabled tool needs them.
+    needs_commits = False
+
+    # Large file lists are split into batches that are bounded
+    # by file count and the byte length of the arguments.
+    # Tools that need whole-project context should disable batching.
+    batch_files = True
+    max_batch_files = 500
+    max_batch_bytes = 100000
+
+    # The number of batches that can be run concurrently.
+    parallelism = 1
+
+    # Set once linting has been done with execute_fixer_and_lint()
+    lint_complete = False
+
     def __init__(self, problems, options=None, base_path=None):
         self.problems = problems
         self.base_path = base_path
@@ -27,8 +111,18 @@ class Tool(object):
         Used to check for a tools commandline
         executable or other dependencies.
         """
+        image = self.image_name()
+        if image:
+            return docker.image_exists(image)
         return True
 
+    def image_name(self):
+        """
+        Get the docker image the tool runs in. Tools that choose
+        their image based on their options override this.
+        """
+        return self.image
+
     def execute(self, files):
         """
         Execute the tool against the files in a
@@ -36,14 +130,67 @@ class Tool(object):
         match_file()
         """
         matching_files = [f for f in files if self.match_file(f)]
-        num_files = len(matching_files)
+        self.execute_matched(matching_files)
 
+    def execute_matched(self, matching_files):
+        """
+        Execute the tool against files that are known to
+        match this tool. Used with FileRouter to avoid
+        re-checking each file.
+        """
+        if self.lint_complete:
+            log.debug('%s has already been run with its fixer', self.name)
+            return
+        num_files = len(matching_files)
         if not num_files:
             log.debug('No matching files for %s', self.name)
             return
 
         log.info('Running %s on %d files', self.name, num_files)
-        self.process_files(matching_files)
+        if not self.batch_files:
+            return self.process_files(matching_files)
+
+        batches = batch_files(
+            matching_files,
+            self.max_batch_files,
+            self.max_batch_bytes)
+        if len(batches) == 1:
+            return self.process_files(matching_files)
+        self.process_batches(batches)
+
+    def process_batches(self, batches):
+        """
+        Process each batch of files, running up to `parallelism`
+        batches concurrently.
+
+        Concurrent batches are run on copies of the tool that collect
+        problems separately. Once all batches are complete the problems
+        are merged in batch order.
+        """
+        workers = max(1, min(self.parallelism, len(batches)))
+        log.info('Running %s in %d batches with %d workers',
+                 self.name, len(batches), workers)
+        if workers == 1:
+            for batch in batches:
+                self.process_files(batch)
+            return
+
+        process = partial(self._process_batch, state=metrics.current())
+        pool = ThreadPool(workers)
+        try:
+            results = pool.map(process, batches)
+        finally:
+            pool.close()
+            pool.join()
+        for problems in results:
+            self.problems.merge(problems)
+
+    def _process_batch(self, files, state=None):
+        tool = copy.copy(self)
+        tool.problems = Problems(self.problems.get_changes())
+        with metrics.resume(state or metrics.current()):
+            tool.process_files(files)
+        return tool.problems
 
     def execute_commits(self, commits):
         """
@@ -53,7 +200,8 @@ class Tool(object):
         commit comments or other parts of individual commits.
 
         Tools implementing this method can expect a list of
-        commit objects from the github API.
+        commit objects from the github API when `needs_commits`
+        is set, and an empty list otherwise.
         """
         pass
 
@@ -71,6 +219,34 @@ class Tool(object):
         log.info('Running fixer %s on %d files', self.name, num_files)
         self.process_fixer(matching_files)
 
+    def execute_fixer_and_lint(self, files):
+        """
+        Execute the fixer and then the linter on all of the provided
+        files. When both use the same image, the last fixer run and
+        the first linter run are done in a single container.
+
+        Once complete, execute() will not lint files again.
+        """
+        matching_files = [f for f in files if self.match_file(f)]
+        num_files = len(matching_files)
+        if not num_files:
+            return
+        log.info('Running fixer and %s on %d files', self.name, num_files)
+
+        batches = batch_files(
+            matching_files,
+            self.max_batch_files,
+            self.max_batch_bytes)
+        if self.batch_files and len(batches) > 1:
+            self.process_fixer(matching_files)
+            self.process_batches(batches)
+        else:
+            with docker.chain_runs() as chain:
+                self.process_fixer(matching_files)
+                chain.link()
+                self.process_files(matching_files)
+        self.lint_complete = True
+
     def has_fixer(self):
         """
         Hook method to check if a fixer exists and should be run.
@@ -83,9 +259,30 @@ class Tool(object):
     def match_file(self, filename):
         """
         Used to check if files can be handled by this
-        tool. Often this will just file extension checks.
+        tool. Files are matched on `extensions`, `file_patterns`
+        and `match_predicate`.
         """
-        return True
+        if self.matches_all():
+            return True
+        base = os.path.basename(filename)
+        name, ext = os.path.splitext(base)
+        if self.extensions and ext in self.extensions:
+            return True
+        if self.file_patterns:
+            for pattern in self.file_patterns:
+                if fnmatch.fnmatch(base, pattern):
+                    return True
+        if self.match_predicate is not None:
+            return bool(self.match_predicate(filename))
+        return False
+
+    def matches_all(self):
+        """
+        Check if this tool handles all files.
+        """
+        return (self.extensions is None and
+                not self.file_patterns and
+                self.match_predicate is None)
 
     def process_files(self, files):
         """
@@ -144,6 +341,173 @@ class Tool(object):
         return '<%sTool config: %s>' % (self.name, self.options)
 
 
+def tool_info(name, tool_class):
+    return ToolInfo(
+        name=name,
+        tool_class=tool_class,
+        image=tool_class.image,
+        extensions=tool_class.extensions,
+        supports_fixer=tool_class.supports_fixer)
+
+
+def load_registry():
+    """
+    Import all builtin tools and tools registered
+    under the `lintreview.tools` entry point group.
+
+    Returns a dict of linter name -> ToolInfo. Tools that
+    fail to import are logged and left out of the registry.
+    """
+    import pkg_resources
+    tools = {}
+    for name in BUILTIN_TOOLS:
+        try:
+            mod = importlib.import_module('lintreview.tools.' + name)
+            tools[name] = tool_info(name, getattr(mod, name.capitalize()))
+        except Exception as e:
+            log.error("Unable to import tool '%s'. Got %s", name, e)
+
+    for entry_point in pkg_resources.iter_entry_points(ENTRY_POINT_GROUP):
+        try:
+            tool_class = entry_point.load()
+            tools[entry_point.name] = tool_info(entry_point.name, tool_class)
+        except Exception as e:
+            log.error("Unable to load tool '%s' from %s. Got %s",
+                      entry_point.name, entry_point.module_name, e)
+    log.debug('Loaded %d tools into the registry', len(tools))
+    return tools
+
+
+def registry():
+    """
+    Get the tool registry. The registry is built
+    on first use and re-used afterwards.
+    """
+    global _registry
+    if _registry is None:
+        _registry = load_registry()
+    return _registry
+
+
+def check_images(build_path=None):
+    """
+    Check that the docker image for each registered tool exists,
+    and cache the image ids.
+
+    Images found by earlier checks or queued by missing_images()
+    are checked as well.
+
+    When build_path is provided, missing images are built
+    from the `<image>.Dockerfile` files in that directory.
+    """
+    global _images
+    names = set(info.image for info in registry().values() if info.image)
+    with _images_lock:
+        names.update(_images)
+        names.update(_pending_images)
+        _pending_images.clear()
+    images = {}
+    for name in sorted(names):
+        digest = docker.image_digest(name)
+        if digest is None and build_path:
+            try:
+                docker.build_image(name, build_path)
+                digest = docker.image_digest(name)
+            except Exception as e:
+                log.error("Unable to build image '%s'. Got %s", name, e)
+        if digest is None:
+            log.warning("Docker image '%s' is missing. Tools using it "
+                        "will not be available.", name)
+        images[name] = digest
+    _images = images
+    return images
+
+
+def image_digests():
+    """
+    Get the cached image name -> image id mapping.
+    The cache is only updated by check_images().
+    """
+    return _images
+
+
+def start_image_refresher(interval):
+    """
+    Start a daemon thread that calls check_images() every interval
+    seconds, or sooner when missing_images() queues an image.
+    Only one refresher runs in each process.
+    """
+    global _image_refresher
+    if _image_refresher is not None and _image_refresher.is_alive():
+        return _image_refresher
+
+    def refresh():
+        while True:
+            _check_images.wait(interval)
+            _check_images.clear()
+            try:
+                check_images()
+            except Exception as e:
+                log.error('Unable to check docker images. Got %s', e)
+
+    _image_refresher = threading.Thread(target=refresh,
+                                        name='image-refresher')
+    _image_refresher.daemon = True
+    _image_refresher.start()
+    return _image_refresher
+
+
+def unknown_linters(linters):
+    """
+    Get the names of linters that are not in the tool registry.
+    """
+    available = registry()
+    return [linter for linter in linters if linter not in available]
+
+
+def missing_images(config):
+    """
+    Get the names of the linters in a ReviewConfig whose docker
+    image is not available. Unknown linters are ignored.
+
+    Images are resolved with each linter's options and only looked
+    up in the image cache. Images that have not been checked are
+    not reported, but queued for the image refresher instead.
+    """
+    available = registry()
+    digests = image_digests()
+    missing = []
+    for linter in config.linters():
+        if linter not in available:
+            continue
+        tool = available[linter].tool_class(
+            None, config.linter_config(linter))
+        image = tool.image_name()
+        if not image:
+            continue
+        if image not in digests:
+            cache_requests.inc(cache='images', result='miss')
+            log.debug("Image '%s' has not been checked yet", image)
+            with _images_lock:
+                _pending_images.add(image)
+            _check_images.set()
+            continue
+        cache_requests.inc(cache='images', result='hit')
+        if not digests[image]:
+            missing.append(linter)
+    return missing
+
+
+def needs_commits(linters):
+    """
+    Check if any of the named linters need the pull request commits.
+    """
+    available = registry()
+    return any(available[linter].tool_class.needs_commits
+               for linter in linters
+               if linter in available)
+
+
 def factory(config, problems, base_path):
     """
     Consumes a lintreview.config.ReviewConfig object
@@ -151,21 +515,86 @@ def factory(config, problems, base_path):
     """
     log.debug('Generating tool list from repository configuration')
     tools = []
+    available = registry()
+    parallelism = config.tool_parallelism()
     for linter in config.linters():
+        if linter not in available:
+            msg = u"Unknown tool '{}'. Available tools are {}".format(
+                linter, ', '.join(sorted(available)))
+            log.error(msg)
+            raise ImportError(msg)
         linter_config = config.linter_config(linter)
-        try:
-            classname = linter.capitalize()
-            log.debug("Attempting to import 'lintreview.tools.%s'", linter)
-            mod = __import__('lintreview.tools.' + linter, fromlist='*')
-            clazz = getattr(mod, classname)
-            tool = clazz(problems, linter_config, base_path)
-            tools.append(tool)
-        except:
-            log.error("Unable to import tool '%s'", linter)
-            raise
+        tool = available[linter].tool_class(problems, linter_config, base_path)
+        tool.parallelism = parallelism
+        tools.append(tool)
     return tools
 
 
+class FileRouter(object):
+    """
+    Route files to tools in a single pass.
+
+    Each file's basename and extension are computed once,
+    and files are dispatched using a precomputed extension -> tools
+    map. Tools with file_patterns or a match_predicate are
+    consulted for files their extensions didn't match.
+
+    Tools that override match_file() are asked about every file,
+    so routing always agrees with Tool.execute().
+    """
+
+    def __init__(self, tools):
+        self._tools = tools
+        self._by_extension = {}
+        self._patterns = []
+        self._predicates = []
+        self._match_all = []
+        self._custom = []
+        base_match = six.get_unbound_function(Tool.match_file)
+        for tool in tools:
+            match = getattr(type(tool), 'match_file', None)
+            if match and six.get_unbound_function(match) is not base_match:
+                self._custom.append(tool)
+                continue
+            if tool.matches_all():
+                self._match_all.append(tool)
+                continue
+            for ext in tool.extensions or ():
+                self._by_extension.setdefault(ext, []).append(tool)
+            if tool.file_patterns:
+                regex = '|'.join(fnmatch.translate(pattern)
+                                 for pattern in tool.file_patterns)
+                self._patterns.append((tool, re.compile(regex)))
+            if tool.match_predicate is not None:
+                self._predicates.append(tool)
+
+    def route(self, files):
+        """
+        Get an OrderedDict of tool -> matching files.
+        """
+        routed = collections.OrderedDict(
+            (tool, []) for tool in self._tools)
+        for filename in files:
+            base = os.path.basename(filename)
+            name, ext = os.path.splitext(base)
+
+            matched = set(self._by_extension.get(ext, ()))
+            for tool, regex in self._patterns:
+                if tool not in matched and regex.match(base):
+                    matched.add(tool)
+            for tool in self._predicates:
+                if tool not in matched and tool.match_predicate(filename):
+                    matched.add(tool)
+            matched.update(self._match_all)
+            for tool in self._custom:
+                if tool.match_file(filename):
+                    matched.add(tool)
+
+            for tool in matched:
+                routed[tool].append(filename)
+        return routed
+
+
 def run(lint_tools, files, commits):
     """
     Create and run tools.
@@ -175,14 +604,48 @@ def run(lint_tools, files, commits):
 
     file paths are converted into docker paths as all
     tools run in docker containers.
+
+    `commits` can be a callable that loads the commits. It is
+    only called when one of the tools needs commits.
     """
     files = [docker.apply_base(f) for f in files]
+    if not any(tool.needs_commits for tool in lint_tools):
+        commits = []
+    elif callable(commits):
+        commits = commits()
 
     log.info('Running lint tools on %d files', len(files))
+    routed = FileRouter(lint_tools).route(files)
     for tool in lint_tools:
         log.debug('Runnning %s', tool)
-        tool.execute(files)
-        tool.execute_commits(commits)
+        found = len(tool.problems)
+        with metrics.span(tool.name):
+            tool.execute_matched(routed[tool])
+            tool.execute_commits(commits)
+        tool_problems.inc(len(tool.problems) - found, tool=tool.name)
+
+
+def batch_files(files, max_files, max_bytes):
+    """
+    Split a list of files into batches. Each batch will contain
+    at most `max_files` files, and the combined length of the
+    filenames will not exceed `max_bytes` unless a single
+    filename is longer than `max_bytes`.
+    """
+    batches = []
+    batch = []
+    size = 0
+    for filename in files:
+        length = len(six.text_type(filename).encode('utf8')) + 1
+        if batch and (len(batch) >= max_files or size + length > max_bytes):
+            batches.append(batch)
+            batch = []
+            size = 0
+        batch.append(filename)
+        size += length
+    if batch:
+        batches.append(batch)
+    return batches
 
 
 def process_quickfix(problems, output, filename_converter):
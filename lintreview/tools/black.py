@@ -1,5 +1,4 @@
 from __future__ import absolute_import
-import os
 import logging
 import lintreview.docker as docker
 from lintreview.review import IssueComment
@@ -11,16 +10,12 @@ log = logging.getLogger(__name__)
 class Black(Tool):
 
     name = 'black'
+    image = 'python3'
+    extensions = ('.py',)
+    supports_fixer = True
 
-    def check_dependencies(self):
-        """See if the python3 image exists
-        """
-        return docker.image_exists('python3')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.py'
+    # Results are reported as a single summary comment.
+    batch_files = False
 
     def process_files(self, files):
         """
@@ -26,17 +26,8 @@ class Checkstyle(Tool):
     """
 
     name = 'checkstyle'
-
-    def check_dependencies(self):
-        """
-        See if checkstyle image exists
-        """
-        return docker.image_exists('checkstyle')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.java'
+    image = 'checkstyle'
+    extensions = ('.java',)
 
     def process_files(self, files):
         """
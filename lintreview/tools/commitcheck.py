@@ -1,29 +1,22 @@
 from __future__ import absolute_import
 from lintreview.tools import Tool
 from lintreview.review import IssueComment
-from lintreview.config import load_config
+from lintreview.config import get_config
 import logging
 import re
 
 
 log = logging.getLogger(__name__)
 
-config = load_config()
-
 
 class Commitcheck(Tool):
 
     name = 'commitcheck'
+    needs_commits = True
 
     def __init__(self, problems, options=None, base_path=None):
         super(Commitcheck, self).__init__(problems, options, base_path)
-        self.author = config.get('GITHUB_AUTHOR_EMAIL', None)
-
-    def check_dependencies(self):
-        """
-        No dependencies.
-        """
-        return True
+        self.author = get_config().get('GITHUB_AUTHOR_EMAIL', None)
 
     def execute_commits(self, commits):
         """
@@ -1,5 +1,4 @@
 from __future__ import absolute_import
-import os
 import logging
 import lintreview.docker as docker
 from lintreview.tools import Tool, process_quickfix
@@ -13,17 +12,8 @@ class Credo(Tool):
     """
 
     name = 'credo'
-
-    def check_dependencies(self):
-        """
-        See if credo image exists
-        """
-        return docker.image_exists('credo')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext in ('.ex', '.exs')
+    image = 'credo'
+    extensions = ('.ex', '.exs')
 
     def process_files(self, files):
         """
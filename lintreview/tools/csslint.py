@@ -1,6 +1,5 @@
 from __future__ import absolute_import
 import logging
-import os
 import re
 import lintreview.docker as docker
 from lintreview.tools import Tool
@@ -12,17 +11,8 @@ log = logging.getLogger(__name__)
 class Csslint(Tool):
 
     name = 'csslint'
-
-    def check_dependencies(self):
-        """
-        See if nodejs image exists.
-        """
-        return docker.image_exists('nodejs')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.css'
+    image = 'nodejs'
+    extensions = ('.css',)
 
     def process_files(self, files):
         """
@@ -1,7 +1,6 @@
 from __future__ import absolute_import
 import hashlib
 import logging
-import os
 import re
 from lintreview.config import comma_value
 from lintreview.review import IssueComment
@@ -14,21 +13,16 @@ log = logging.getLogger(__name__)
 class Eslint(Tool):
 
     name = 'eslint'
+    image = 'eslint'
+    extensions = ('.js', '.jsx')
+    supports_fixer = True
 
     installed_plugins = False
 
-    def check_dependencies(self):
-        """See if the nodejs image exists
-        """
-        return docker.image_exists('nodejs')
-
-    def match_file(self, filename):
-        """Check if a file should be linted using ESLint.
-        """
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        extensions = comma_value(self.options.get('extensions', '.js,.jsx'))
-        return ext in extensions
+    def __init__(self, problems, options=None, base_path=None):
+        super(Eslint, self).__init__(problems, options, base_path)
+        if self.options.get('extensions'):
+            self.extensions = tuple(comma_value(self.options['extensions']))
 
     def has_fixer(self):
         """Eslint has a fixer that can be enabled
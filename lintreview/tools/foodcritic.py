@@ -10,12 +10,7 @@ log = logging.getLogger(__name__)
 class Foodcritic(Tool):
 
     name = 'foodcritic'
-
-    def check_dependencies(self):
-        """
-        See if foodcritic is on the PATH
-        """
-        return docker.image_exists('ruby2')
+    image = 'ruby2'
 
     def process_files(self, files):
         command = ['foodcritic', '--no-progress']
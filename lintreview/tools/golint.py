@@ -2,37 +2,39 @@ from __future__ import absolute_import
 import logging
 import os
 import lintreview.docker as docker
+from collections import OrderedDict
 from lintreview.tools import Tool, process_quickfix
+from six.moves import shlex_quote
 
 log = logging.getLogger(__name__)
 
 
 class Golint(Tool):
     """
-    Run golint on files. This may need to offer config options
-    to map packages -> dirs so we can run golint once per package.
+    Run golint on files.
+
+    golint only accepts files from a single package per invocation.
+    Files are grouped by directory and all groups are linted
+    by a driver script running inside a single container.
     """
 
     name = 'golint'
-
-    def check_dependencies(self):
-        """
-        See if golint image exists
-        """
-        return docker.image_exists('golint')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.go'
+    image = 'golint'
+    extensions = ('.go',)
+    supports_fixer = True
 
     def process_files(self, files):
         """
         Run code checks with golint.
-        Only a single process is made for all files
+        Only a single container is used for all files
         to save resources.
         """
-        command = self.create_command(files)
+        packages = self.group_by_package(files)
+        if len(packages) == 1:
+            command = self.create_command(files)
+        else:
+            log.debug('Running golint on %d packages', len(packages))
+            command = self.create_driver_command(packages.values())
         output = docker.run('golint', command, self.base_path)
         output = output.strip().split("\n")
         # Look for multi-package error message, and re-run tools
@@ -44,6 +46,18 @@ class Golint(Tool):
         else:
             process_quickfix(self.problems, output, docker.strip_base)
 
+    def group_by_package(self, files):
+        """
+        Group files by their directory. Go packages map to
+        directories, so each group can generally be linted
+        in a single golint invocation.
+        """
+        packages = OrderedDict()
+        for filename in files:
+            dirname = os.path.dirname(filename)
+            packages.setdefault(dirname, []).append(filename)
+        return packages
+
     def create_command(self, files):
         command = ['golint']
         if 'min_confidence' in self.options:
@@ -51,17 +65,40 @@ class Golint(Tool):
         command += files
         return command
 
+    def create_driver_command(self, groups):
+        """
+        Create a shell command that runs golint once per group of files.
+
+        Directories can contain files from more than one package
+        (eg. `foo` and `foo_test`). When golint rejects a group,
+        each file in that group is linted individually.
+        """
+        script = []
+        for group in groups:
+            group_cmd = self._shell_command(self.create_command(group))
+            single_cmds = [self._shell_command(self.create_command([f]))
+                           for f in group]
+            script.append(
+                u'out=$({} 2>&1); '
+                u'case "$out" in '
+                u'*"is in package"*) {};; '
+                u'*) [ -n "$out" ] && printf \'%s\\n\' "$out";; '
+                u'esac'.format(group_cmd, '; '.join(single_cmds)))
+        return ['sh', '-c', u'\n'.join(script)]
+
+    def _shell_command(self, command):
+        return u' '.join(shlex_quote(u'{}'.format(arg)) for arg in command)
+
     def run_individual_files(self, files, filename_converter):
         """
         If we get an error from golint about different packages
         we have to re-run golint on each file as figuring out package
-        relations is hard.
+        relations is hard. All files are linted in one container.
         """
-        for filename in files:
-            command = self.create_command([filename])
-            output = docker.run('golint', command, self.base_path)
-            output = output.split("\n")
-            process_quickfix(self.problems, output, filename_converter)
+        command = self.create_driver_command([[f] for f in files])
+        output = docker.run('golint', command, self.base_path)
+        output = output.split("\n")
+        process_quickfix(self.problems, output, filename_converter)
 
     def has_fixer(self):
         """golint has a fixer that can be enabled through configuration.
@@ -10,12 +10,7 @@ log = logging.getLogger(__name__)
 class Goodcheck(Tool):
 
     name = 'goodcheck'
-
-    def check_dependencies(self):
-        """
-        See if ruby image exists
-        """
-        return docker.image_exists('ruby2')
+    image = 'ruby2'
 
     def process_files(self, files):
         """
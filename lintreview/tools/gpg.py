@@ -11,12 +11,7 @@ log = logging.getLogger(__name__)
 class Gpg(Tool):
 
     name = 'gpg'
-
-    def check_dependencies(self):
-        """
-        See if the gpg image exists
-        """
-        return docker.image_exists('gpg')
+    image = 'gpg'
 
     def execute_commits(self, commits):
         """
@@ -1,6 +1,5 @@
 from __future__ import absolute_import
 import logging
-import os
 from lintreview.tools import Tool, process_checkstyle
 import lintreview.docker as docker
 
@@ -10,17 +9,8 @@ log = logging.getLogger(__name__)
 class Jshint(Tool):
 
     name = 'jshint'
-
-    def check_dependencies(self):
-        """
-        See if the nodejs docker image exists
-        """
-        return docker.image_exists('nodejs')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.js'
+    image = 'nodejs'
+    extensions = ('.js',)
 
     def process_files(self, files):
         """
@@ -1,5 +1,4 @@
 from __future__ import absolute_import
-import os
 import logging
 import lintreview.docker as docker
 from lintreview.tools import Tool, process_quickfix
@@ -10,17 +9,8 @@ log = logging.getLogger(__name__)
 class Jsonlint(Tool):
 
     name = 'jsonlint'
-
-    def check_dependencies(self):
-        """
-        See if the python2 image exists
-        """
-        return docker.image_exists('python2')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.json'
+    image = 'python2'
+    extensions = ('.json',)
 
     def process_files(self, files):
         """
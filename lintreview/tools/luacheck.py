@@ -1,6 +1,5 @@
 from __future__ import absolute_import
 import logging
-import os
 import lintreview.docker as docker
 from lintreview.review import IssueComment
 from lintreview.tools import Tool, process_quickfix
@@ -11,17 +10,8 @@ log = logging.getLogger(__name__)
 class Luacheck(Tool):
 
     name = 'luacheck'
-
-    def check_dependencies(self):
-        """
-        See if luacheck image exists
-        """
-        return docker.image_exists('luacheck')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.lua'
+    image = 'luacheck'
+    extensions = ('.lua',)
 
     def process_files(self, files):
         """
@@ -1,5 +1,4 @@
 from __future__ import absolute_import
-import os
 import logging
 import lintreview.docker as docker
 from lintreview.tools import Tool, process_quickfix, python_image
@@ -10,6 +9,9 @@ log = logging.getLogger(__name__)
 class Pep8(Tool):
 
     name = 'pep8'
+    image = 'python2'
+    extensions = ('.py',)
+    supports_fixer = True
 
     AUTOPEP8_OPTIONS = [
         'exclude',
@@ -18,15 +20,9 @@ class Pep8(Tool):
         'ignore',
     ]
 
-    def check_dependencies(self):
-        """See if the python2 image exists
-        """
-        return docker.image_exists('python2')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.py'
+    def image_name(self):
+        """Use the python version from the tool options."""
+        return python_image(self.options)
 
     def process_files(self, files):
         """
@@ -46,7 +42,7 @@ class Pep8(Tool):
                 command += [u'--{}'.format(option), value]
         command += files
 
-        image = python_image(self.options)
+        image = self.image_name()
         output = docker.run(image, command, source_dir=self.base_path)
         if not output:
             log.debug('No pep8 errors found.')
@@ -65,7 +61,7 @@ class Pep8(Tool):
         """Run autopep8, as pep8 has no fixer mode.
         """
         command = self.create_fixer_command(files)
-        image = python_image(self.options)
+        image = self.image_name()
         docker.run(image, command, source_dir=self.base_path)
 
     def create_fixer_command(self, files):
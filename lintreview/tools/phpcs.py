@@ -15,17 +15,9 @@ log = logging.getLogger(__name__)
 class Phpcs(Tool):
 
     name = 'phpcs'
-
-    def check_dependencies(self):
-        """
-        See if PHPCS is on the system path.
-        """
-        return docker.image_exists('phpcs')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.php'
+    image = 'phpcs'
+    extensions = ('.php',)
+    supports_fixer = True
 
     def process_files(self, files):
         """
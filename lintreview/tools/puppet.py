@@ -1,5 +1,4 @@
 from __future__ import absolute_import
-import os
 import logging
 import lintreview.docker as docker
 from lintreview.tools import Tool, process_quickfix
@@ -10,17 +9,9 @@ log = logging.getLogger(__name__)
 class Puppet(Tool):
 
     name = 'puppet-lint'
-
-    def check_dependencies(self):
-        """
-        See if ruby image exists
-        """
-        return docker.image_exists('ruby2')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.pp'
+    image = 'ruby2'
+    extensions = ('.pp',)
+    supports_fixer = True
 
     def process_files(self, files):
         """
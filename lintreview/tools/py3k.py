@@ -1,5 +1,4 @@
 from __future__ import absolute_import
-import os
 import logging
 import lintreview.docker as docker
 from lintreview.tools import Tool, process_quickfix, stringify
@@ -15,17 +14,8 @@ class Py3k(Tool):
     """
 
     name = 'py3k'
-
-    def check_dependencies(self):
-        """
-        See if python image is available
-        """
-        return docker.image_exists('python2')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.py'
+    image = 'python2'
+    extensions = ('.py',)
 
     def process_files(self, files):
         """
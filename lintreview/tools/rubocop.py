@@ -1,5 +1,4 @@
 from __future__ import absolute_import
-import os
 import logging
 import lintreview.docker as docker
 from lintreview.tools import Tool, process_quickfix
@@ -10,17 +9,9 @@ log = logging.getLogger(__name__)
 class Rubocop(Tool):
 
     name = 'rubocop'
-
-    def check_dependencies(self):
-        """
-        See if ruby image exists
-        """
-        return docker.image_exists('ruby2')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.rb'
+    image = 'ruby2'
+    extensions = ('.rb',)
+    supports_fixer = True
 
     def process_files(self, files):
         """
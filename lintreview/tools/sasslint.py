@@ -1,6 +1,5 @@
 from __future__ import absolute_import
 import logging
-import os
 from lintreview.tools import Tool, process_checkstyle
 import lintreview.docker as docker
 
@@ -11,17 +10,8 @@ log = logging.getLogger(__name__)
 class Sasslint(Tool):
 
     name = 'sasslint'
-
-    def check_dependencies(self):
-        """
-        See if sass-lint is on the system path.
-        """
-        return docker.image_exists('nodejs')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.sass' or ext == '.scss'
+    image = 'nodejs'
+    extensions = ('.sass', '.scss')
 
     def process_files(self, files):
         """
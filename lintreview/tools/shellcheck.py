@@ -11,19 +11,13 @@ log = logging.getLogger(__name__)
 class Shellcheck(Tool):
 
     name = 'shellcheck'
+    image = 'shellcheck'
+    extensions = ('.sh', '.bash', '.ksh', '.zsh')
 
-    def check_dependencies(self):
+    def match_predicate(self, filename):
         """
-        See if shellcheck image exists
+        Match executable files with a shell shebang.
         """
-        return docker.image_exists('shellcheck')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        if ext in ('.sh', '.bash', '.ksh', '.zsh'):
-            return True
-
         if not os.path.exists(filename) or not os.access(filename, os.X_OK):
             return False
 
@@ -1,6 +1,5 @@
 from __future__ import absolute_import
 import logging
-import os
 from lintreview.tools import Tool, process_quickfix
 import lintreview.docker as docker
 
@@ -10,20 +9,8 @@ log = logging.getLogger(__name__)
 class Standardjs(Tool):
 
     name = 'standardjs'
-
-    def check_dependencies(self):
-        """
-        See if standard is on the system path.
-        """
-        return docker.image_exists('nodejs')
-
-    def match_file(self, filename):
-        """
-        Check if a file should be linted using standard.
-        """
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.js'
+    image = 'nodejs'
+    extensions = ('.js',)
 
     def process_files(self, files):
         """
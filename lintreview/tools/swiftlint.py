@@ -1,6 +1,5 @@
 from __future__ import absolute_import
 import logging
-import os
 import lintreview.docker as docker
 from lintreview.tools import Tool, process_checkstyle
 
@@ -10,20 +9,8 @@ log = logging.getLogger(__name__)
 class Swiftlint(Tool):
 
     name = 'swiftlint'
-
-    def check_dependencies(self):
-        """
-        See if swiftlint is on the system path.
-        """
-        return docker.image_exists('swiftlint')
-
-    def match_file(self, filename):
-        """
-        Check if a file should be linted using ESLint.
-        """
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.swift'
+    image = 'swiftlint'
+    extensions = ('.swift',)
 
     def process_files(self, files):
         """
@@ -1,6 +1,5 @@
 from __future__ import absolute_import
 import logging
-import os
 import re
 from lintreview.review import IssueComment
 from lintreview.tools import Tool, process_checkstyle
@@ -12,20 +11,8 @@ log = logging.getLogger(__name__)
 class Tslint(Tool):
 
     name = 'tslint'
-
-    def check_dependencies(self):
-        """
-        See if nodejs image exists
-        """
-        return docker.image_exists('nodejs')
-
-    def match_file(self, filename):
-        """
-        Check if a file should be linted using TSLint.
-        """
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.ts'
+    image = 'nodejs'
+    extensions = ('.ts',)
 
     def process_files(self, files):
         """
@@ -1,6 +1,5 @@
 from __future__ import absolute_import
 import logging
-import os
 from lintreview.tools import Tool, process_checkstyle
 import lintreview.docker as docker
 
@@ -10,20 +9,8 @@ log = logging.getLogger(__name__)
 class Xo(Tool):
 
     name = 'xo'
-
-    def check_dependencies(self):
-        """
-        See if XO is on the system path.
-        """
-        return docker.image_exists('nodejs')
-
-    def match_file(self, filename):
-        """
-        Check if a file should be linted using XO.
-        """
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext == '.js' or ext == '.jsx'
+    image = 'nodejs'
+    extensions = ('.js', '.jsx')
 
     def process_files(self, files):
         """
@@ -1,5 +1,4 @@
 from __future__ import absolute_import
-import os
 import logging
 import lintreview.docker as docker
 from lintreview.review import IssueComment
@@ -11,17 +10,8 @@ log = logging.getLogger(__name__)
 class Yamllint(Tool):
 
     name = 'yamllint'
-
-    def check_dependencies(self):
-        """
-        See if python2 image is installed
-        """
-        return docker.image_exists('python2')
-
-    def match_file(self, filename):
-        base = os.path.basename(filename)
-        name, ext = os.path.splitext(base)
-        return ext in ['.yml', '.yaml']
+    image = 'python2'
+    extensions = ('.yml', '.yaml')
 
     def process_files(self, files):
         """
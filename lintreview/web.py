@@ -1,18 +1,27 @@
 from __future__ import absolute_import
 import logging
-import pkg_resources
 
+import lintreview.metrics as metrics
 from flask import Flask, request, Response
-from lintreview.config import load_config
+from lintreview import __version__ as version
+from lintreview.config import get_config, cached_review_config
 from lintreview.github import get_repository, get_lintrc
-from lintreview.tasks import process_pull_request
+from lintreview.tasks import process_pull_request, queue_depths, review_queue
 
-config = load_config()
 app = Flask("lintreview")
-app.config.update(config)
+app.config.update(get_config())
 
 log = logging.getLogger(__name__)
-version = pkg_resources.get_distribution('lintreview').version
+
+webhooks = metrics.counter(
+    'lintreview_webhooks_total',
+    'Pull request webhooks received by result',
+    ('result',))
+metrics.gauge(
+    'lintreview_queue_depth',
+    'Pull requests waiting in each task queue',
+    ('queue',),
+    function=lambda: queue_depths())
 
 
 @app.route("/ping")
@@ -20,6 +29,11 @@ def ping():
     return "lint-review: %s pong\n" % (version,)
 
 
+@app.route("/metrics")
+def show_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @app.route("/review/start", methods=["POST"])
 def start_review():
     event = request.headers.get('X-Github-Event')
@@ -39,6 +53,7 @@ def start_review():
         head_repo = pull_request["head"]["repo"]["name"]
     except Exception as e:
         log.error("Got an invalid JSON body. '%s'", e)
+        webhooks.inc(result='invalid')
         return Response(status=403,
                         response="You must provide a valid JSON body\n")
 
@@ -48,6 +63,7 @@ def start_review():
 
     if action not in ("opened", "synchronize", "reopened"):
         log.info("Ignored '%s' action." % action)
+        webhooks.inc(result='ignored')
         return Response(status=204)
 
     gh = get_repository(app.config, head_user, head_repo)
@@ -58,11 +74,19 @@ def start_review():
         log.warn("Cannot download .lintrc file for '%s', "
                  "skipping lint checks.", base_repo_url)
         log.warn(e)
+        webhooks.inc(result='no_lintrc')
         return Response(status=204)
     try:
+        linters = cached_review_config(lintrc, app.config).linters()
+        queue = review_queue(pull_request.get('changed_files', 0),
+                             len(linters))
         log.info("Scheduling pull request for %s/%s %s", user, repo, number)
-        process_pull_request.delay(user, repo, number, lintrc)
+        process_pull_request.apply_async(
+            (user, repo, number, lintrc),
+            queue=queue)
     except:
         log.error('Could not publish job to celery. Make sure its running.')
+        webhooks.inc(result='error')
         return Response(status=500)
+    webhooks.inc(result='scheduled')
     return Response(status=204)
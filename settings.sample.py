@@ -51,6 +51,32 @@ CELERY_ACCEPT_CONTENT = ['json']
 # Show dates and times in UTC
 CELERY_ENABLE_UTC = True
 
+# Reviews are sent to the `celery` queue, unless their estimated cost
+# (changed files * linters) is at least LARGE_REVIEW_COST. Those go
+# to LARGE_REVIEW_QUEUE so they can be processed by separate workers:
+#
+#   celery -A lintreview.tasks worker -Q celery
+#   celery -A lintreview.tasks worker -Q lintreview.large
+LARGE_REVIEW_QUEUE = 'lintreview.large'
+LARGE_REVIEW_COST = env('LINTREVIEW_LARGE_REVIEW_COST', 1000, int)
+
+CELERY_DEFAULT_QUEUE = 'celery'
+CELERY_QUEUES = (
+    Queue('celery', Exchange('celery'), routing_key='celery'),
+    Queue(LARGE_REVIEW_QUEUE, Exchange(LARGE_REVIEW_QUEUE),
+          routing_key=LARGE_REVIEW_QUEUE),
+)
+
+# Limit how many reviews of a single repository run at the same
+# time. Reviews over the limit are retried after REPOSITORY_RETRY_DELAY
+# seconds, up to REPOSITORY_MAX_RETRIES times before the pull request
+# gets an error status. Slots are lock files in REPOSITORY_SLOTS_PATH
+# which must be shared by all workers. 0 disables the limit.
+REPOSITORY_CONCURRENCY = env('LINTREVIEW_REPOSITORY_CONCURRENCY', 0, int)
+REPOSITORY_RETRY_DELAY = env('LINTREVIEW_REPOSITORY_RETRY_DELAY', 10, int)
+REPOSITORY_MAX_RETRIES = env('LINTREVIEW_REPOSITORY_MAX_RETRIES', 60, int)
+# REPOSITORY_SLOTS_PATH = '/tmp/workspace/.slots'
+
 
 # General project configuration
 ###############################
@@ -65,6 +91,47 @@ WORKSPACE = env('LINTREVIEW_WORKSPACE', '/tmp/workspace')
 # LINTRC_DEFAULTS = './lintrc_defaults.ini'
 
 
+# Tools split large file lists into batches to stay under
+# command line length limits. This controls how many batches of
+# a single tool can run in concurrent containers.
+TOOL_PARALLELISM = env('LINTREVIEW_TOOL_PARALLELISM', 1, int)
+
+# Run each tool's fixer and linter in a single container. This halves
+# container runs for repositories with fixers enabled, but linters
+# will not see changes made by fixers of tools that run after them.
+FIXERS_COMBINED = env('LINTREVIEW_FIXERS_COMBINED', False, bool)
+
+# Read pull request changes from the clone with `git diff` instead of
+# the paginated pull request files API. This saves many API requests
+# on large pull requests, and avoids github truncating large patches.
+# Reviews fall back to the API if the diff can't be created.
+LOCAL_DIFF = env('LINTREVIEW_LOCAL_DIFF', False, bool)
+
+# Tool images are checked when workers start, and re-checked
+# in the background of each worker process after this many seconds.
+DOCKER_IMAGE_CHECK_INTERVAL = env('LINTREVIEW_DOCKER_IMAGE_CHECK_INTERVAL',
+                                  300, int)
+
+# Port for celery workers to export prometheus metrics on. Each
+# worker process uses the first free port from METRICS_WORKER_PORT
+# onwards. The web app exports metrics at /metrics.
+# METRICS_WORKER_PORT = 9540
+
+# Reviews of repositories matching these patterns are profiled.
+# Profiles and a timeline of review stages are written to PROFILE_PATH.
+# eg: PROFILE_REPOSITORIES = ['markstory/lint-review', 'myorg/*']
+PROFILE_REPOSITORIES = []
+PROFILE_PATH = env('LINTREVIEW_PROFILE_PATH', '/tmp/lintreview-profiles')
+
+# Allow repositories to enable profiling with `profile = true` in the
+# [review] section of their .lintrc files.
+PROFILE_LINTRC = env('LINTREVIEW_PROFILE_LINTRC', False, bool)
+
+# Directory containing the tool Dockerfiles. When set, missing
+# images are built when workers start.
+# DOCKER_IMAGE_BUILD_PATH = './docker'
+
+
 # Github Configuration
 ######################
 
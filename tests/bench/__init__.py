@@ -0,0 +1,6 @@
+"""
+Benchmarks for the diff and review hot paths.
+
+Run with ``python -m tests.bench``. See ``python -m tests.bench --help``
+for saving and comparing against the stored baseline.
+"""
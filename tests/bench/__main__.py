@@ -0,0 +1,141 @@
+"""
+Run the benchmark suite and compare against the stored baseline.
+
+    python -m tests.bench                 # run and compare
+    python -m tests.bench --save          # update baseline.json
+    python -m tests.bench --check         # exit 1 on regressions
+    python -m tests.bench diff.           # only cases matching 'diff.'
+    python -m tests.bench --memory diff.  # also report peak memory
+"""
+from __future__ import absolute_import, print_function
+from timeit import default_timer
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'baseline.json')
+
+
+def time_case(case, repeat):
+    """Time a case, returning the timings of each repetition."""
+    timings = []
+    for _ in range(repeat):
+        state = case.setup()
+        gc.collect()
+        start = default_timer()
+        case.func(state)
+        timings.append(default_timer() - start)
+    return timings
+
+
+def peak_memory(case):
+    """Get the peak memory allocated while running a case, in MB."""
+    import tracemalloc
+    state = case.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.func(state)
+        return tracemalloc.get_traced_memory()[1] / (1024.0 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get('results', {})
+
+
+def save_baseline(path, results):
+    data = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run lint-review benchmarks')
+    parser.add_argument('patterns', nargs='*',
+                        help='Only run cases containing one of these')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repetitions per case; the fastest is kept')
+    parser.add_argument('--baseline', default=BASELINE,
+                        help='Baseline results file')
+    parser.add_argument('--save', action='store_true',
+                        help='Save results as the new baseline')
+    parser.add_argument('--check', action='store_true',
+                        help='Exit non-zero if a case regressed')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='Slowdown ratio considered a regression')
+    parser.add_argument('--memory', action='store_true',
+                        help='Report the peak memory of each case. '
+                             'Requires python 3.')
+    args = parser.parse_args(argv)
+
+    # Problems and diffs log every item at debug level.
+    logging.disable(logging.WARNING)
+
+    from .cases import cases
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = []
+
+    selected = [case for name, case in cases.items()
+                if not args.patterns or
+                any(p in name for p in args.patterns)]
+    width = max([len(c.name) for c in selected] + [10])
+    print('{:<{w}} {:>10} {:>10} {:>8}{}'.format(
+        'case', 'best (s)', 'baseline', 'ratio',
+        ' {:>10}'.format('peak (MB)') if args.memory else '', w=width))
+    for case in selected:
+        best = min(time_case(case, args.repeat))
+        results[case.name] = round(best, 6)
+
+        previous = baseline.get(case.name)
+        ratio = ''
+        if previous:
+            change = best / previous
+            ratio = '{:.2f}x'.format(change)
+            if change > args.threshold:
+                ratio += ' !'
+                regressions.append(case.name)
+        memory = ''
+        if args.memory:
+            memory = ' {:>10.1f}'.format(peak_memory(case))
+        print('{:<{w}} {:>10.4f} {:>10} {:>8}{}'.format(
+            case.name,
+            best,
+            '{:.4f}'.format(previous) if previous else '-',
+            ratio,
+            memory,
+            w=width))
+        sys.stdout.flush()
+
+    if args.save:
+        if args.patterns:
+            merged = dict(baseline)
+            merged.update(results)
+            results = merged
+        save_baseline(args.baseline, results)
+        print('Saved baseline to {}'.format(args.baseline))
+
+    if regressions:
+        print('Regressions: {}'.format(', '.join(regressions)))
+        if args.check:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Benchmark cases for the diff and review hot paths, and startup time.
+
+Each case has a setup function that builds its inputs, and
+a function that is timed. Setup runs before every repetition
+so cases are free to mutate their inputs.
+"""
+from __future__ import absolute_import
+from collections import namedtuple, OrderedDict
+from tests import root_dir
+import subprocess
+import sys
+from lintreview.diff import DiffCollection, parse_diff
+from lintreview.review import Problems, Review
+from lintreview.tools import process_checkstyle, process_quickfix
+from . import generators
+
+Case = namedtuple('Case', ('name', 'setup', 'func'))
+
+cases = OrderedDict()
+
+PR_SIZES = (10, 1000, 10000)
+FINDING_COUNT = 100000
+COMMENT_COUNT = 2000
+
+# Modules imported by the CLI, tools and workers when they start.
+STARTUP_MODULES = ('lintreview.tools', 'lintreview.tools.commitcheck',
+                   'lintreview.cli', 'lintreview.tasks')
+
+
+def benchmark(name, sizes):
+    """Register the decorated function as a benchmark case for each size.
+
+    The decorated function receives the size and returns a
+    (setup, func) pair.
+    """
+    def decorator(factory):
+        for size in sizes:
+            case_name = '{}[{}]'.format(name, size)
+            setup, func = factory(size)
+            cases[case_name] = Case(case_name, setup, func)
+        return factory
+    return decorator
+
+
+def _identity(filename):
+    return filename
+
+
+def _changed_findings(pull_files, count):
+    """Generate findings that land on changed lines."""
+    changes = DiffCollection(pull_files)
+    lines = dict((diff.filename, sorted(diff.added_lines()))
+                 for diff in changes
+                 if diff.added_lines())
+    return generators.make_findings(sorted(lines), count, lines=lines)
+
+
+def _problems(pull_files, findings):
+    problems = Problems(DiffCollection(pull_files))
+    for filename, line, message in findings:
+        problems.add(filename, line, message)
+    return problems
+
+
+@benchmark('diff.DiffCollection', PR_SIZES)
+def diff_collection(size):
+    def setup():
+        return generators.make_pull_files(size)
+
+    def func(pull_files):
+        DiffCollection(pull_files)
+    return setup, func
+
+
+@benchmark('diff.Diff.hunks', PR_SIZES)
+def diff_hunks(size):
+    def setup():
+        return DiffCollection(generators.make_pull_files(size))
+
+    def func(changes):
+        for diff in changes:
+            diff.hunks
+    return setup, func
+
+
+@benchmark('diff.DiffCollection.get_files', PR_SIZES)
+def diff_get_files(size):
+    patterns = ['dir%d/*' % i for i in range(0, 50, 2)]
+    patterns += ['*.min.js', '*/generated/*', 'vendor/*', 'docs/*.md']
+
+    def setup():
+        return DiffCollection(generators.make_pull_files(size))
+
+    def func(changes):
+        changes.get_files(ignore_patterns=patterns)
+    return setup, func
+
+
+@benchmark('diff.parse_diff', (1, 50))
+def diff_parse(size):
+    """Parse `size` MB of git diff output"""
+    text = []
+
+    def setup():
+        if not text:
+            text.append(generators.make_git_diff(size * 1024 * 1024))
+        return text[0]
+
+    def func(text):
+        parse_diff(text)
+    return setup, func
+
+
+@benchmark('review.Problems.add', (FINDING_COUNT,))
+def problems_add(size):
+    def setup():
+        pull_files = generators.make_pull_files(1000)
+        names = [f.filename for f in pull_files]
+        findings = generators.make_findings(names, size)
+        return Problems(DiffCollection(pull_files)), findings
+
+    def func(state):
+        problems, findings = state
+        for filename, line, message in findings:
+            problems.add(filename, line, message)
+    return setup, func
+
+
+@benchmark('review.Problems.limit_to_changes', (FINDING_COUNT,))
+def limit_to_changes(size):
+    def setup():
+        pull_files = generators.make_pull_files(1000)
+        names = [f.filename for f in pull_files]
+        return _problems(pull_files, generators.make_findings(names, size))
+
+    def func(problems):
+        problems.limit_to_changes()
+    return setup, func
+
+
+@benchmark('review.Review.load_comments', (COMMENT_COUNT, 50000))
+def load_comments(size):
+    def setup():
+        pull_files = generators.make_pull_files(1000)
+        problems = _problems(
+            pull_files,
+            _changed_findings(pull_files, 10000))
+        entries = [(p.filename, p.position, p.body) for p in problems]
+        history = generators.make_comment_history(entries, size)
+        return Review(None, generators.FakePullRequest(history), None)
+
+    def func(review):
+        review.load_comments()
+    return setup, func
+
+
+@benchmark('review.Review.remove_existing', (10000,))
+def remove_existing(size):
+    def setup():
+        pull_files = generators.make_pull_files(1000)
+        problems = _problems(
+            pull_files,
+            _changed_findings(pull_files, size))
+        entries = [(p.filename, p.position, p.body) for p in problems]
+        history = generators.make_comment_history(entries, COMMENT_COUNT)
+        review = Review(None, generators.FakePullRequest(history), None)
+        review.load_comments()
+        return review, problems
+
+    def func(state):
+        review, problems = state
+        review.remove_existing(problems)
+    return setup, func
+
+
+@benchmark('review.Review._build_review', (FINDING_COUNT,))
+def build_review(size):
+    def setup():
+        pull_files = generators.make_pull_files(1000)
+        problems = _problems(
+            pull_files,
+            _changed_findings(pull_files, size))
+        return Review(None, None, None), problems
+
+    def func(state):
+        review, problems = state
+        review._build_review(problems, 'abc123')
+    return setup, func
+
+
+@benchmark('tools.process_checkstyle', (FINDING_COUNT,))
+def checkstyle(size):
+    def setup():
+        pull_files = generators.make_pull_files(1000)
+        names = [f.filename for f in pull_files]
+        xml = generators.make_checkstyle(
+            generators.make_findings(names, size))
+        return Problems(DiffCollection(pull_files)), xml
+
+    def func(state):
+        problems, xml = state
+        process_checkstyle(problems, xml, _identity)
+    return setup, func
+
+
+@benchmark('tools.process_quickfix', (FINDING_COUNT,))
+def quickfix(size):
+    def setup():
+        pull_files = generators.make_pull_files(1000)
+        names = [f.filename for f in pull_files]
+        output = generators.make_quickfix(
+            generators.make_findings(names, size))
+        return Problems(DiffCollection(pull_files)), output
+
+    def func(state):
+        problems, output = state
+        process_quickfix(problems, output, _identity)
+    return setup, func
+
+
+@benchmark('startup.import', STARTUP_MODULES)
+def startup_import(module):
+    """Start a new interpreter and import `module`"""
+    command = [sys.executable, '-c', 'import ' + module]
+
+    def setup():
+        return None
+
+    def func(state):
+        subprocess.check_call(command, cwd=root_dir)
+    return setup, func
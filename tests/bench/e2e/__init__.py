@@ -0,0 +1,7 @@
+"""
+Offline end-to-end review benchmark.
+
+Runs process_pull_request through the webhook endpoint against a fake
+GitHub API and a fake docker executable. See ``python -m tests.bench.e2e
+--help``.
+"""
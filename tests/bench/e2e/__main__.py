@@ -0,0 +1,169 @@
+"""
+Fire webhooks at /review/start and report review latency.
+
+Reviews are processed with celery in eager mode, so each worker is a
+thread sending webhooks and running the resulting review. GitHub is
+replaced by a local fake API server and docker by a script that replays
+recorded tool output.
+
+    python -m tests.bench.e2e --reviews 50 --workers 1,2,4 --latency 0.2
+"""
+from __future__ import absolute_import, division, print_function
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer
+import argparse
+import itertools
+import json
+import logging
+import os
+import shutil
+import stat
+import sys
+import tempfile
+
+from tests import fixtures_path, root_dir
+from .fake_github import FakeGithub, create_app, create_repository
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+LINTRC = """
+[tools]
+linters = phpcs
+"""
+
+
+def install_fake_docker(path, latency):
+    """Put a `docker` executable running fake_docker.py first on PATH"""
+    bin_dir = os.path.join(path, 'bin')
+    os.makedirs(bin_dir)
+    script = os.path.join(bin_dir, 'docker')
+    with open(script, 'w') as f:
+        f.write('#!/bin/sh\nexec "{}" "{}" "$@"\n'.format(
+            sys.executable, os.path.join(here, 'fake_docker.py')))
+    os.chmod(script, os.stat(script).st_mode | stat.S_IEXEC)
+    os.environ['PATH'] = bin_dir + os.pathsep + os.environ['PATH']
+    os.environ['FAKE_DOCKER_RECORDINGS'] = os.path.join(here, 'recordings')
+    os.environ['FAKE_DOCKER_LATENCY'] = str(latency)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = int(round(pct / 100 * (len(values) - 1)))
+    return values[index]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark reviews end to end without network access')
+    parser.add_argument('--reviews', type=int, default=20,
+                        help='Webhooks to send per worker count')
+    parser.add_argument('--workers', default='1,2,4',
+                        help='Comma separated worker counts to measure')
+    parser.add_argument('--latency', type=float, default=0.1,
+                        help='Seconds each fake container run takes')
+    parser.add_argument('--files', default='one_file_pull_request.json',
+                        help='Pull request files fixture to serve')
+    parser.add_argument('--lintrc', help='Path to a .lintrc to serve')
+    parser.add_argument('--verbose', action='store_true',
+                        help='Show lintreview logging')
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    lintrc = LINTRC
+    if args.lintrc:
+        with open(args.lintrc) as f:
+            lintrc = f.read()
+
+    os.environ.setdefault(
+        'LINTREVIEW_SETTINGS',
+        os.path.join(root_dir, 'settings.sample.py'))
+
+    tmp = tempfile.mkdtemp(prefix='lintreview-bench-')
+    try:
+        install_fake_docker(tmp, args.latency)
+        with open(os.path.join(fixtures_path, args.files)) as f:
+            pull_files = json.load(f)
+        git_root = os.path.join(tmp, 'git')
+        os.makedirs(git_root)
+        head_sha = create_repository(git_root, pull_files)
+        server = FakeGithub(
+            create_app(git_root, head_sha, lintrc, args.files)).start()
+        try:
+            return run(args, tmp, server)
+        finally:
+            server.stop()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run(args, tmp, server):
+    # Importing web loads the settings, so these wait until the
+    # environment is set up.
+    import lintreview.tasks as tasks
+    import lintreview.web as web
+    from lintreview.config import get_config
+
+    overrides = {
+        'GITHUB_URL': server.url + '/',
+        'GITHUB_OAUTH_TOKEN': 'bench',
+        'WORKSPACE': os.path.join(tmp, 'workspace'),
+        'OK_COMMENT': '',
+        'OK_LABEL': '',
+    }
+    get_config().update(overrides)
+    web.app.config.update(overrides)
+    tasks.celery.conf.update(CELERY_ALWAYS_EAGER=True)
+
+    with open(os.path.join(fixtures_path, 'pull_request.json')) as f:
+        payload = json.load(f)
+    numbers = itertools.count(1)
+    headers = {'X-Github-Event': 'pull_request'}
+
+    def fire(number):
+        data = dict(payload)
+        data['pull_request'] = dict(payload['pull_request'], number=number)
+        client = web.app.test_client()
+        start = default_timer()
+        res = client.post('/review/start',
+                          data=json.dumps(data),
+                          headers=headers,
+                          content_type='application/json')
+        return default_timer() - start, res.status_code
+
+    # Warm up imports, image checks and the fake server.
+    fire(next(numbers))
+
+    print('{:>7} {:>7} {:>8} {:>10} {:>8} {:>8} {:>7}'.format(
+        'workers', 'reviews', 'wall (s)', 'reviews/s',
+        'p50 (s)', 'p95 (s)', 'errors'))
+    failed = False
+    for workers in [int(w) for w in args.workers.split(',')]:
+        published = server.app.stats['reviews']
+        pool = ThreadPool(workers)
+        start = default_timer()
+        results = pool.map(fire, [next(numbers)
+                                  for _ in range(args.reviews)])
+        wall = default_timer() - start
+        pool.close()
+        pool.join()
+
+        latencies = [elapsed for elapsed, _ in results]
+        errors = len([s for _, s in results if s != 204])
+        errors += args.reviews - (server.app.stats['reviews'] - published)
+        failed = failed or errors > 0
+        print('{:>7} {:>7} {:>8.2f} {:>10.2f} {:>8.3f} {:>8.3f} {:>7}'.format(
+            workers,
+            args.reviews,
+            wall,
+            args.reviews / wall,
+            percentile(latencies, 50),
+            percentile(latencies, 95),
+            errors))
+        sys.stdout.flush()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Stand-in for the docker command line used by the e2e benchmark.
+
+`docker run` replays a recorded tool output for the image after
+sleeping for FAKE_DOCKER_LATENCY seconds. Recordings are read from
+FAKE_DOCKER_RECORDINGS/<image>.txt. Images with a recording are
+reported by `docker images`.
+"""
+from __future__ import print_function
+import hashlib
+import os
+import sys
+import time
+
+
+def recording_path(image):
+    base = os.environ.get('FAKE_DOCKER_RECORDINGS', '')
+    return os.path.join(base, image + '.txt')
+
+
+def run_image(args):
+    """Find the image in `docker run` arguments."""
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('-v', '-e', '--name'):
+            i += 2
+            continue
+        if arg.startswith('-'):
+            i += 1
+            continue
+        return arg
+    return None
+
+
+def main(args):
+    if not args:
+        return 1
+    command = args[0]
+    if command == 'images':
+        names = [a for a in args[1:] if not a.startswith('-')]
+        for name in names:
+            if os.path.exists(recording_path(name)):
+                digest = hashlib.sha256(name.encode('utf8')).hexdigest()
+                print('sha256:' + digest)
+        return 0
+    if command == 'run':
+        image = run_image(args[1:])
+        time.sleep(float(os.environ.get('FAKE_DOCKER_LATENCY', 0)))
+        path = recording_path(image)
+        if os.path.exists(path):
+            with open(path) as f:
+                sys.stdout.write(f.read())
+        return 0
+    # ps, rm, build and friends are no-ops.
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,164 @@
+"""
+A stand-in GitHub API serving the pull request fixtures.
+
+Fixture URLs are rewritten to point at this server, and the pull
+request is cloned over git's dumb HTTP protocol from a local bare
+repository created by create_repository().
+"""
+from __future__ import absolute_import
+from flask import Flask, Response, jsonify, request, send_from_directory
+from tests import fixtures_path
+from werkzeug.serving import make_server
+import base64
+import json
+import os
+import subprocess
+import threading
+
+GITHUB_API = 'https://api.github.com/'
+REPO_NAME = 'lint-test.git'
+
+
+def load_json(name, base_url):
+    """Load a fixture with its api urls pointing at base_url"""
+    with open(os.path.join(fixtures_path, name)) as f:
+        data = f.read()
+    return json.loads(data.replace(GITHUB_API, base_url + '/api/v3/'))
+
+
+def create_repository(path, pull_files):
+    """Create a bare repository in path containing the files from
+    the pull request. Returns the sha of the head commit.
+    """
+    work = os.path.join(path, 'work')
+    for item in pull_files:
+        filename = os.path.join(work, item['filename'])
+        if not os.path.exists(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with open(filename, 'w') as f:
+            f.write('\n'.join('line %d' % i for i in range(1, 1000)))
+
+    def git(*args, **kwargs):
+        cwd = kwargs.get('cwd', work)
+        command = ['git', '-c', 'user.name=bench',
+                   '-c', 'user.email=bench@example.com'] + list(args)
+        return subprocess.check_output(command, cwd=cwd).decode('utf8')
+
+    git('init', '-q', '.')
+    git('add', '.')
+    git('commit', '-q', '-m', 'Benchmark fixture')
+    sha = git('rev-parse', 'HEAD').strip()
+    git('clone', '-q', '--bare', work, REPO_NAME, cwd=path)
+    git('update-server-info', cwd=os.path.join(path, REPO_NAME))
+    return sha
+
+
+def create_app(git_root, head_sha, lintrc, files_fixture):
+    app = Flask('fake-github')
+    stats = {'requests': 0, 'reviews': 0, 'statuses': 0, 'comments': 0}
+    lock = threading.Lock()
+    app.stats = stats
+
+    def base_url():
+        return request.host_url.rstrip('/')
+
+    @app.before_request
+    def count():
+        with lock:
+            stats['requests'] += 1
+
+    @app.route('/api/v3/repos/<owner>/<repo>')
+    def repository(owner, repo):
+        return jsonify(load_json('repository.json', base_url()))
+
+    @app.route('/api/v3/repos/<owner>/<repo>/pulls/<int:number>')
+    def pull_request(owner, repo, number):
+        url = base_url()
+        data = load_json('pull_request.json', url)['pull_request']
+        clone_url = u'{}/git/{}'.format(url, REPO_NAME)
+        data['number'] = number
+        data['url'] = u'{}/api/v3/repos/{}/{}/pulls/{}'.format(
+            url, owner, repo, number)
+        data['head']['sha'] = head_sha
+        data['head']['repo']['clone_url'] = clone_url
+        data['base']['repo']['clone_url'] = clone_url
+        return jsonify(data)
+
+    @app.route('/api/v3/repos/<owner>/<repo>/pulls/<int:number>/files')
+    def pull_files(owner, repo, number):
+        return _list(load_json(files_fixture, base_url()))
+
+    @app.route('/api/v3/repos/<owner>/<repo>/pulls/<int:number>/commits')
+    def pull_commits(owner, repo, number):
+        return _list(load_json('commits.json', base_url()))
+
+    @app.route('/api/v3/repos/<owner>/<repo>/pulls/<int:number>/comments')
+    def pull_comments(owner, repo, number):
+        return _list(load_json('comments_current.json', base_url()))
+
+    @app.route('/api/v3/repos/<owner>/<repo>/pulls/<int:number>/reviews',
+               methods=['POST'])
+    def create_review(owner, repo, number):
+        with lock:
+            stats['reviews'] += 1
+        return jsonify({'id': stats['reviews']}), 201
+
+    @app.route('/api/v3/repos/<owner>/<repo>/issues/<int:number>/comments',
+               methods=['POST'])
+    def create_comment(owner, repo, number):
+        with lock:
+            stats['comments'] += 1
+        return jsonify({'id': stats['comments'], 'body': ''}), 201
+
+    @app.route('/api/v3/repos/<owner>/<repo>/statuses/<sha>',
+               methods=['POST'])
+    def create_status(owner, repo, sha):
+        with lock:
+            stats['statuses'] += 1
+        data = request.get_json(force=True)
+        data['id'] = stats['statuses']
+        data['creator'] = load_json('repository.json', base_url())['owner']
+        return jsonify(data), 201
+
+    @app.route('/api/v3/repos/<owner>/<repo>/contents/<path:path>')
+    def contents(owner, repo, path):
+        if path != '.lintrc':
+            return Response(status=404)
+        content = base64.b64encode(lintrc.encode('utf8')).decode('utf8')
+        return jsonify({
+            'type': 'file',
+            'encoding': 'base64',
+            'name': '.lintrc',
+            'path': '.lintrc',
+            'content': content,
+            'size': len(lintrc),
+            'sha': 'abc123',
+        })
+
+    @app.route('/git/<path:path>')
+    def git_files(path):
+        return send_from_directory(git_root, path)
+
+    return app
+
+
+def _list(data):
+    return Response(json.dumps(data), mimetype='application/json')
+
+
+class FakeGithub(object):
+    """Run the fake GitHub app on a local port in a background thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_port)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
@@ -0,0 +1,177 @@
+"""
+Synthetic data generators for benchmarks.
+
+All generators are deterministic for a given seed so that
+results are comparable between runs.
+"""
+from __future__ import absolute_import
+from lintreview.diff import DiffAdapter
+from xml.sax.saxutils import quoteattr
+import random
+
+EXTENSIONS = ('py', 'js', 'php', 'rb', 'go')
+
+
+def make_filenames(count, seed=1):
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        depth = rng.randint(1, 4)
+        dirs = ['dir%d' % rng.randint(0, 50) for _ in range(depth)]
+        ext = EXTENSIONS[i % len(EXTENSIONS)]
+        names.append('/'.join(dirs + ['file%d.%s' % (i, ext)]))
+    return names
+
+
+def make_patch(rng, hunks=3, hunk_lines=12):
+    """Build a patch body like the ones in github pull request files."""
+    lines = []
+    old_start = new_start = 1
+    for _ in range(hunks):
+        gap = rng.randint(5, 40)
+        old_start += gap
+        new_start += gap
+        body = []
+        old_count = new_count = 0
+        for _ in range(hunk_lines):
+            kind = rng.random()
+            if kind < 0.5:
+                body.append(' context line')
+                old_count += 1
+                new_count += 1
+            elif kind < 0.8:
+                body.append('+added line')
+                new_count += 1
+            else:
+                body.append('-removed line')
+                old_count += 1
+        lines.append('@@ -%d,%d +%d,%d @@' % (
+            old_start, old_count, new_start, new_count))
+        lines.extend(body)
+        old_start += old_count
+        new_start += new_count
+    return '\n'.join(lines)
+
+
+def make_pull_files(count, seed=1):
+    """Generate pull request file data for `count` files."""
+    rng = random.Random(seed)
+    files = []
+    for filename in make_filenames(count, seed):
+        patch = make_patch(rng, hunks=rng.randint(1, 5))
+        files.append(DiffAdapter(
+            patch=patch,
+            filename=filename,
+            sha='abc123',
+            status='modified',
+            additions=1,
+            deletions=1,
+            changes=1))
+    return files
+
+
+def make_git_diff(size, seed=1):
+    """Generate `git diff` output of at least `size` bytes."""
+    rng = random.Random(seed)
+    chunks = []
+    total = 0
+    i = 0
+    while total < size:
+        filename = 'dir%d/file%d.%s' % (
+            i % 50, i, EXTENSIONS[i % len(EXTENSIONS)])
+        chunk = (
+            'diff --git a/{0} b/{0}\n'
+            'index 1234567..89abcde 100644\n'
+            '--- a/{0}\n'
+            '+++ b/{0}\n'
+            '{1}\n').format(filename, make_patch(rng, hunks=5, hunk_lines=40))
+        chunks.append(chunk)
+        total += len(chunk)
+        i += 1
+    return ''.join(chunks)
+
+
+def make_findings(filenames, count, seed=1, max_line=300, lines=None):
+    """Generate (filename, line, message) lint findings.
+
+    When lines is a mapping of filename to line numbers, findings
+    are only placed on those lines.
+    """
+    rng = random.Random(seed)
+    findings = []
+    for i in range(count):
+        filename = filenames[rng.randint(0, len(filenames) - 1)]
+        if lines:
+            candidates = lines[filename]
+            line = candidates[rng.randint(0, len(candidates) - 1)]
+        else:
+            line = rng.randint(1, max_line)
+        findings.append((filename, line, 'Finding %d is bad' % (i % 50)))
+    return findings
+
+
+def make_checkstyle(findings):
+    """Render findings as checkstyle XML."""
+    by_file = {}
+    for filename, line, message in findings:
+        by_file.setdefault(filename, []).append((line, message))
+    out = ['<?xml version="1.0" encoding="UTF-8"?>',
+           '<checkstyle version="4.3">']
+    for filename in sorted(by_file):
+        out.append('<file name=%s>' % quoteattr(filename))
+        for line, message in by_file[filename]:
+            out.append('<error line="%d" column="1" severity="error" '
+                       'message=%s source="bench"/>' %
+                       (line, quoteattr(message)))
+        out.append('</file>')
+    out.append('</checkstyle>')
+    return '\n'.join(out)
+
+
+def make_quickfix(findings):
+    """Render findings as vim quickfix output lines."""
+    return ['%s:%d:1: %s' % finding for finding in findings]
+
+
+class FakeReviewComment(object):
+    """Quacks like a github3 ReviewComment"""
+
+    def __init__(self, id, path, position, body):
+        self.id = id
+        self.body = body
+        self._guts = {'path': path, 'position': position}
+
+    def as_dict(self):
+        return self._guts
+
+
+class FakePullRequest(object):
+    """Pull request with a fixed review comment history."""
+
+    number = 1
+    display_name = 'bench/bench#1'
+
+    def __init__(self, comments):
+        self._comments = comments
+
+    def review_comments(self):
+        return iter(self._comments)
+
+
+def make_comment_history(entries, count, seed=1):
+    """Generate review comments from (filename, position, body) entries.
+
+    Every other comment matches an entry exactly so a portion
+    of the history overlaps with the problems being published.
+    """
+    rng = random.Random(seed)
+    comments = []
+    for i in range(count):
+        filename, position, body = entries[rng.randint(0, len(entries) - 1)]
+        if i % 10 == 0:
+            # Outdated comments have no position
+            position = None
+        elif i % 2:
+            body = 'Human reply %d' % i
+        comments.append(FakeReviewComment(i, filename, position, body))
+    return comments
@@ -36,8 +36,10 @@ def test_execute__git_flow(mock_apply, mock_push, mock_commit):
     strategy = CommitStrategy(context)
 
     diff = Mock()
-    diff.as_diff.return_value = sentinel.diff
-    out = strategy.execute([diff])
+    diff.as_diff.return_value = 'first diff\n'
+    other = Mock()
+    other.as_diff.return_value = 'second diff'
+    out = strategy.execute([diff, other])
     eq_(None, out)
 
     mock_commit.assert_called_with(
@@ -48,9 +50,9 @@ def test_execute__git_flow(mock_apply, mock_push, mock_commit):
         clone_path,
         'origin',
         'stylefixes:patch-1')
-    mock_apply.assert_called_with(
+    mock_apply.assert_called_once_with(
         clone_path,
-        sentinel.diff)
+        'first diff\nsecond diff\n')
 
 
 @patch('lintreview.git.commit')
@@ -3,7 +3,11 @@ import lintreview.fixers as fixers
 from lintreview.config import build_review_config
 from lintreview.diff import parse_diff, Diff
 from lintreview.tools.phpcs import Phpcs
-from mock import Mock, sentinel
+from mock import Mock, patch, sentinel
+import os
+import shutil
+import subprocess
+import tempfile
 from nose.tools import (
     assert_raises,
     assert_in,
@@ -31,6 +35,124 @@ def test_run_fixers():
     eq_(0, len(out))
 
 
+def test_run_fixers__changes():
+    path = tempfile.mkdtemp()
+    filename = 'fixme.py'
+    with open(os.path.join(path, filename), 'w') as f:
+        f.write('import os\nx=1\n')
+
+    def fixer(files):
+        with open(os.path.join(path, filename), 'w') as f:
+            f.write('import os\nx = 1\n')
+
+    mock_tool = Mock()
+    mock_tool.has_fixer.return_value = True
+    mock_tool.execute_fixer.side_effect = fixer
+    try:
+        out = fixers.run_fixers([mock_tool], path, [filename, 'missing.py'])
+    finally:
+        shutil.rmtree(path)
+    eq_(1, len(out))
+    eq_(filename, out[0].filename)
+    eq_(set([2]), out[0].added_lines())
+    eq_(set([2]), out[0].deleted_lines())
+
+
+def test_restore_files():
+    path = tempfile.mkdtemp()
+    for name in ('changed.py', 'same.py'):
+        with open(os.path.join(path, name), 'w') as f:
+            f.write('original\n')
+    original = fixers.read_files(path, ['changed.py', 'same.py'])
+    with open(os.path.join(path, 'changed.py'), 'w') as f:
+        f.write('fixed\n')
+    same_mtime = os.path.getmtime(os.path.join(path, 'same.py'))
+
+    try:
+        restored = fixers.restore_files(path, original)
+        eq_(['changed.py'], restored)
+        with open(os.path.join(path, 'changed.py')) as f:
+            eq_('original\n', f.read())
+        eq_(same_mtime, os.path.getmtime(os.path.join(path, 'same.py')))
+    finally:
+        shutil.rmtree(path)
+
+
+def test_rollback_changes__no_snapshot():
+    with patch('lintreview.fixers.git') as git_stub:
+        fixers.rollback_changes('some/path')
+        git_stub.reset_hard.assert_called_with('some/path')
+
+
+def test_rollback_changes__snapshot():
+    original = {'a.py': b'one\n'}
+    with patch('lintreview.fixers.git') as git_stub, \
+            patch('lintreview.fixers.restore_files') as restore:
+        restore.return_value = ['a.py']
+        fixers.rollback_changes('some/path', original, ['a.py'])
+        restore.assert_called_with('some/path', original)
+        git_stub.reset.assert_called_with('some/path')
+        eq_(False, git_stub.reset_hard.called)
+
+
+def test_rollback_changes__missing_from_snapshot():
+    original = {'a.py': b'one\n'}
+    with patch('lintreview.fixers.git') as git_stub, \
+            patch('lintreview.fixers.restore_files') as restore:
+        fixers.rollback_changes('some/path', original, ['a.py', 'b.py'])
+        git_stub.reset_hard.assert_called_with('some/path')
+        eq_(False, restore.called)
+
+
+def test_diff_files():
+    original = {'a.py': b'one\n', 'b.py': b'two\n', 'c.py': b'three\n'}
+    updated = {'a.py': b'one\n', 'b.py': b'TWO\n'}
+    result = fixers.diff_files(original, updated)
+    eq_(['b.py'], result.get_files())
+
+    eq_([], fixers.diff_files(original, original))
+
+
+def test_run_fixers__latin1():
+    path = tempfile.mkdtemp()
+    filename = 'latin.py'
+    with open(os.path.join(path, filename), 'wb') as f:
+        f.write(u'# caf\xe9\nx=1\n'.encode('latin-1'))
+    subprocess.check_call(['git', 'init', '-q', path])
+    subprocess.check_call(['git', 'add', filename], cwd=path)
+    subprocess.check_call(
+        ['git', '-c', 'user.name=bot', '-c', 'user.email=bot@example.com',
+         'commit', '-q', '-m', 'initial'],
+        cwd=path)
+
+    def fixer(files):
+        with open(os.path.join(path, filename), 'wb') as f:
+            f.write(u'# caf\xe9\nx = 1\n'.encode('latin-1'))
+
+    mock_tool = Mock()
+    mock_tool.has_fixer.return_value = True
+    mock_tool.execute_fixer.side_effect = fixer
+    try:
+        out = fixers.run_fixers([mock_tool], path, [filename])
+    finally:
+        shutil.rmtree(path)
+    eq_(1, len(out))
+    eq_(filename, out[0].filename)
+    eq_(set([2]), out[0].added_lines())
+    eq_(set([2]), out[0].deleted_lines())
+
+
+def test_run_fixers__combined():
+    mock_tool = Mock()
+    mock_tool.has_fixer.return_value = True
+    files = ['diff/adjacent_original.txt']
+
+    out = fixers.run_fixers([mock_tool], fixtures_path, files, combined=True)
+    eq_(0, mock_tool.execute_fixer.call_count)
+    eq_(1, mock_tool.execute_fixer_and_lint.call_count)
+    eq_(0, len(out))
+
+
 def test_run_fixers__no_fixer_mode():
     # Test that fixers are skipped when has_fixer fails
     # Test that fixers are executed if fixer is enabled
@@ -0,0 +1,24 @@
+from __future__ import absolute_import
+from flask import url_for
+from lintreview import web
+from lintreview.cli import hook_url
+from mock import patch
+from nose.tools import eq_, raises
+
+
+def test_hook_url():
+    settings = {
+        'SERVER_NAME': 'lint.example.com',
+        'PREFERRED_URL_SCHEME': 'https',
+        'APPLICATION_ROOT': '/lintreview',
+    }
+    for config in ({'SERVER_NAME': 'lint.example.com'}, settings):
+        with patch.dict(web.app.config, config):
+            with web.app.app_context():
+                expected = url_for('start_review', _external=True)
+        eq_(expected, hook_url(config))
+
+
+@raises(ValueError)
+def test_hook_url__no_server_name():
+    hook_url({})
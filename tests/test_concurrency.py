@@ -0,0 +1,41 @@
+from __future__ import absolute_import
+import lintreview.concurrency as concurrency
+from nose.tools import eq_
+import shutil
+import tempfile
+
+
+def test_acquire_release():
+    path = tempfile.mkdtemp()
+    try:
+        first = concurrency.acquire(path, 'markstory/lint-test', 2)
+        second = concurrency.acquire(path, 'markstory/lint-test', 2)
+        assert first is not None
+        assert second is not None
+        eq_(None, concurrency.acquire(path, 'markstory/lint-test', 2))
+
+        other = concurrency.acquire(path, 'markstory/other', 2)
+        assert other is not None, 'Repositories have separate slots'
+
+        concurrency.release(first)
+        third = concurrency.acquire(path, 'markstory/lint-test', 2)
+        assert third is not None, 'Released slots are reused'
+
+        for slot in (second, other, third):
+            concurrency.release(slot)
+    finally:
+        shutil.rmtree(path)
+
+
+def test_acquire__creates_path():
+    path = tempfile.mkdtemp()
+    try:
+        slot = concurrency.acquire(path + '/slots', 'markstory/lint-test', 1)
+        assert slot is not None
+        concurrency.release(slot)
+    finally:
+        shutil.rmtree(path)
+
+
+def test_release__none():
+    concurrency.release(None)
@@ -1,9 +1,12 @@
 from __future__ import absolute_import
+import os
+import tempfile
 from unittest import TestCase
 
 from nose.tools import eq_, raises
 
 from lintreview.config import build_review_config, get_lintrc_defaults
+from lintreview.config import cached_review_config, get_config
 from lintreview.config import load_config, ReviewConfig
 
 sample_ini = """
@@ -78,6 +81,12 @@ def test_load_config():
     assert res['GITHUB_URL'].endswith, 'Exists and is stringy'
 
 
+def test_get_config():
+    config = get_config()
+    assert config['GITHUB_URL'].endswith, 'Exists and is stringy'
+    assert config is get_config(), 'Loaded once'
+
+
 def test_get_lintrc_defaults():
     config = load_config()
     res = get_lintrc_defaults(config)
@@ -90,6 +99,50 @@ def test_build_review_config():
     eq_(3, len(config.linters()))
 
 
+def test_cached_review_config():
+    app_config = {'SUMMARY_THRESHOLD': 10}
+    config = cached_review_config(sample_ini, app_config)
+    eq_(3, len(config.linters()))
+    eq_(10, config.summary_threshold())
+    assert config is cached_review_config(sample_ini, app_config)
+    assert config is not cached_review_config(simple_ini, app_config)
+    assert config is not cached_review_config(sample_ini, {})
+    assert 'linters' not in app_config, 'App config should not change'
+
+
+@raises(TypeError)
+def test_cached_review_config__frozen():
+    config = cached_review_config(simple_ini, {})
+    config.update({'linters': {'pep8': {}}})
+
+
+def test_cached_review_config__linter_config_copies():
+    config = cached_review_config(sample_ini, {})
+    config.linter_config('jshint')['config'] = 'changed'
+    eq_('./jshint.json', config.linter_config('jshint')['config'])
+
+
+def test_cached_review_config__defaults_changed():
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        with open(path, 'w') as f:
+            f.write(defaults_ini)
+        app_config = {'LINTRC_DEFAULTS': path}
+        config = cached_review_config(simple_ini, app_config)
+        eq_('/etc/jshint.json', config.linter_config('jshint')['config'])
+        assert config is cached_review_config(simple_ini, app_config)
+
+        with open(path, 'w') as f:
+            f.write(defaults_ini.replace('/etc/', '/usr/local/etc/'))
+        os.utime(path, (0, 0))
+        config = cached_review_config(simple_ini, app_config)
+        eq_('/usr/local/etc/jshint.json',
+            config.linter_config('jshint')['config'])
+    finally:
+        os.remove(path)
+
+
 class ReviewConfigTest(TestCase):
 
     def test_linter_listing_bad(self):
@@ -222,3 +275,45 @@ class ReviewConfigTest(TestCase):
         ini = "[review]\nfail_on_comments = true"
         config = build_review_config(ini, app_config)
         eq_('failure', config.failed_review_status())
+
+    def test_tool_parallelism(self):
+        config = build_review_config(simple_ini)
+        eq_(1, config.tool_parallelism())
+
+        config = build_review_config(simple_ini, {'TOOL_PARALLELISM': 4})
+        eq_(4, config.tool_parallelism())
+
+        config = build_review_config(simple_ini, {'TOOL_PARALLELISM': 0})
+        eq_(1, config.tool_parallelism())
+
+    def test_fixers_combined(self):
+        config = build_review_config(simple_ini)
+        eq_(False, config.fixers_combined())
+
+        config = build_review_config(simple_ini, {'FIXERS_COMBINED': True})
+        eq_(True, config.fixers_combined())
+
+    def test_local_diff(self):
+        config = build_review_config(simple_ini)
+        eq_(False, config.local_diff())
+
+        config = build_review_config(simple_ini, {'LOCAL_DIFF': True})
+        eq_(True, config.local_diff())
+
+    def test_profile_enabled(self):
+        config = build_review_config(simple_ini)
+        eq_(False, config.profile_enabled('markstory/lint-test'))
+
+        app_config = {'PROFILE_REPOSITORIES': ['markstory/*']}
+        config = build_review_config(simple_ini, app_config)
+        eq_(True, config.profile_enabled('markstory/lint-test'))
+        eq_(False, config.profile_enabled('other/lint-test'))
+
+    def test_profile_enabled__lintrc(self):
+        ini = "[review]\nprofile = true\n"
+        config = build_review_config(ini)
+        eq_(False, config.profile_enabled('markstory/lint-test'),
+            'Needs PROFILE_LINTRC')
+
+        config = build_review_config(ini, {'PROFILE_LINTRC': True})
+        eq_(True, config.profile_enabled('markstory/lint-test'))
@@ -1,6 +1,16 @@
 from __future__ import absolute_import
 from . import load_fixture, create_pull_files
-from lintreview.diff import DiffCollection, Diff, parse_diff, ParseError
+from lintreview.diff import (
+    DiffCollection,
+    Diff,
+    ParseError,
+    compile_patterns,
+    create_file_diff,
+    line_ranges,
+    parse_diff,
+    parse_file_diff,
+    ranges_overlap
+)
 from unittest import TestCase
 from mock import patch
 from nose.tools import eq_, assert_raises, assert_in, assert_not_in
@@ -74,6 +84,179 @@ def test_parse_diff__bad_input():
     assert_in('Could not parse', str(ctx.exception))
 
 
+def test_parse_diff__single_line_hunk_header():
+    data = """diff --git a/thing.py b/thing.py
+--- a/thing.py
++++ b/thing.py
+@@ -3 +3 @@ def thing():
+-    return 1
++    return 2
+"""
+    out = parse_diff(data)
+    change = out.all_changes('thing.py')[0]
+    eq_(1, len(change.hunks))
+    eq_(set([3]), change.added_lines())
+
+
+def test_parse_diff__leading_text():
+    data = """commit abc123
+Author: Mark <mark@example.com>
+
+    Update thing
+
+diff --git a/thing.py b/thing.py
+index 1234567..89abcde 100644
+--- a/thing.py
++++ b/thing.py
+@@ -1,2 +1,2 @@
+-one
++uno
+ two
+\\ No newline at end of file
+diff --git a/other.py b/other.py
+--- a/other.py
++++ b/other.py
+@@ -10,2 +10,3 @@
+ ten
++--- not a header
+ eleven
+"""
+    out = parse_diff(data)
+    eq_(['thing.py', 'other.py'], out.get_files())
+
+    change = out.all_changes('thing.py')[0]
+    eq_(set([1]), change.added_lines())
+    eq_(2, change.line_position(1))
+    assert_not_in('other.py', change.patch)
+    eq_('@@ -1,2 +1,2 @@\n', change.patch[:16])
+
+    change = out.all_changes('other.py')[0]
+    eq_(set([11]), change.added_lines())
+    eq_(2, change.line_position(11))
+    eq_(change.patch, change.hunks[0].patch)
+    assert_in('+--- not a header', change.patch)
+
+
+def test_parse_diff__binary_and_removed():
+    data = """diff --git a/image.png b/image.png
+index 87ae6b6..22f6b3b 100644
+Binary files a/image.png and b/image.png differ
+diff --git a/gone.py b/gone.py
+deleted file mode 100644
+index 587be6b..0000000
+--- a/gone.py
++++ /dev/null
+@@ -1 +0,0 @@
+-x = 1+1
+diff --git a/thing.py b/thing.py
+--- a/thing.py
++++ b/thing.py
+@@ -1 +1 @@
+-x = 1
++x = 2
+"""
+    out = parse_diff(data)
+    eq_(['thing.py'], out.get_files())
+
+
+def test_parse_diff__renamed():
+    data = """diff --git a/old.py b/moved.py
+similarity index 100%
+rename from old.py
+rename to moved.py
+diff --git a/lib/util.py b/src/util.py
+similarity index 90%
+rename from lib/util.py
+rename to src/util.py
+index 587be6b..22f6b3b 100644
+--- a/lib/util.py
++++ b/src/util.py
+@@ -1 +1 @@
+-x = 1
++x = 2
+diff --git a/thing.py b/thing.py
+--- a/thing.py
++++ b/thing.py
+@@ -1 +1 @@
+-x = 1
++x = 2
+"""
+    out = parse_diff(data)
+    eq_(['thing.py'], out.get_files(), 'Renames are not linted')
+
+    start = data.index('diff --git a/lib')
+    end = data.index('diff --git a/thing')
+    change = parse_file_diff(data, start, end)
+    eq_('src/util.py', change.filename)
+    eq_('renamed', change.status)
+
+
+def test_create_file_diff():
+    original = 'one\ntwo\nthree\nfour\n'
+    updated = 'one\n2\nthree\nfour\nfive'
+    result = create_file_diff('numbers.txt', original, updated)
+
+    eq_('numbers.txt', result.filename)
+    eq_('modified', result.status)
+    assert_not_in('---', result.patch)
+    assert_not_in('+++', result.patch)
+    assert_in('\\ No newline at end of file', result.patch)
+
+    diff = Diff(result.patch, result.filename, result.sha)
+    eq_(set([2, 5]), diff.added_lines())
+
+
+def test_create_file_diff__no_changes():
+    eq_(None, create_file_diff('same.txt', 'one\n', 'one\n'))
+
+
+def test_create_file_diff__removed_dashes():
+    original = '-- a comment\ncode\n'
+    updated = 'code\n'
+    result = create_file_diff('query.sql', original, updated)
+    assert_in('--- a comment', result.patch)
+
+
+def test_compile_patterns():
+    ignored = compile_patterns(['vendor/*', '*.min.js', 'docs/[ab]?.md'])
+    assert ignored('vendor/lib/thing.js'), '* matches directories'
+    assert ignored('lib/app.min.js')
+    assert ignored('docs/a1.md')
+    assert not ignored('docs/c1.md')
+    assert not ignored('src/vendor/thing.js')
+    assert not ignored('app.min.jsx')
+
+
+def test_compile_patterns__double_star():
+    ignored = compile_patterns(['**/build/*', 'docs/**/index.md', 'tmp/**'])
+    assert ignored('build/app.js')
+    assert ignored('src/ui/build/app.js')
+    assert ignored('docs/index.md')
+    assert ignored('docs/api/v1/index.md')
+    assert ignored('tmp/a/b')
+    assert not ignored('rebuild/app.js')
+    assert not ignored('docs/api/index.rst')
+
+
+def test_compile_patterns__cached():
+    eq_(compile_patterns(['*.py']), compile_patterns(['*.py']))
+
+
+def test_line_ranges():
+    eq_([], line_ranges([]))
+    eq_([(1, 3), (7, 7), (9, 10)], line_ranges(set([9, 1, 2, 3, 7, 10])))
+
+
+def test_ranges_overlap():
+    ranges = [(1, 3), (7, 7), (9, 10)]
+    eq_(True, ranges_overlap(ranges, 3, 5))
+    eq_(True, ranges_overlap(ranges, 5, 7))
+    eq_(True, ranges_overlap(ranges, 8, 12))
+    eq_(False, ranges_overlap(ranges, 4, 6))
+    eq_(False, ranges_overlap(ranges, 11, 20))
+    eq_(False, ranges_overlap([], 1, 1))
+
+
 class TestDiffCollection(TestCase):
 
     # Single file, single commit
@@ -142,6 +325,18 @@ class TestDiffCollection(TestCase):
         result = changes.get_files(ignore_patterns=ignore)
         eq_(expected, result)
 
+    def test_parse_deferred(self):
+        changes = DiffCollection(self.two_files)
+        changes.get_files(ignore_patterns=['tests/*'])
+        for change in changes:
+            eq_(None, change._hunks, 'Hunks should not be parsed yet')
+
+        self.assertTrue(changes.has_line_changed('Console/Command/Task/'
+                                                 'AssetBuildTask.php', 117))
+        parsed = [change.filename for change in changes
+                  if change._hunks is not None]
+        eq_(['Console/Command/Task/AssetBuildTask.php'], parsed)
+
     def test_has_line_changed__no_file(self):
         changes = DiffCollection(self.two_files)
         self.assertFalse(changes.has_line_changed('derp', 99))
@@ -288,6 +483,44 @@ class TestDiff(TestCase):
         overlap = diff.added_lines().intersection(diff.deleted_lines())
         eq_(set([117, 119]), overlap)
 
+    def test_added_runs(self):
+        patch = (
+            '@@ -1,4 +1,7 @@\n'
+            '+one\n'
+            '+two\n'
+            ' three\n'
+            '-four\n'
+            '-five\n'
+            '+4\n'
+            '+5\n'
+            '+6\n'
+            '\\ No newline at end of file\n'
+            '+7\n'
+        )
+        diff = Diff(patch, 'numbers.txt', 'abc123')
+        hunk = diff.hunks[0]
+
+        eq_(set([1, 2, 4, 5, 6, 7]), diff.added_lines())
+        eq_(set([4]), diff.deleted_lines())
+        eq_([(1, 2), (4, 7)], diff.added_ranges())
+        eq_([(4, 4)], hunk.deleted_ranges())
+        self.assertFalse(diff.has_line_changed(3))
+        self.assertFalse(diff.has_line_changed(8))
+        self.assertTrue(hunk.contains_line(4))
+
+        eq_(1, diff.line_position(1))
+        eq_(2, diff.line_position(2))
+        eq_(6, diff.line_position(4))
+        eq_(8, diff.line_position(6))
+        eq_(10, diff.line_position(7), 'markers are counted in positions')
+        eq_(None, diff.line_position(3))
+
+    def test_slots(self):
+        res = create_pull_files(self.two_files_json)
+        diff = Diff(res[0].patch, res[0].filename, res[0].sha)
+        assert not hasattr(diff, '__dict__')
+        assert not hasattr(diff.hunks[0], '__dict__')
+
     def test_hunk_parsing(self):
         res = create_pull_files(self.two_files_json)
         diff = Diff(res[0].patch, res[0].filename, res[0].sha)
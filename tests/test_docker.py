@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 import lintreview.docker as docker
+from mock import patch
 from nose.tools import eq_, assert_in
 from tests import requires_image, test_dir
 
@@ -49,3 +50,96 @@ def test_run__named_container():
 def test_images():
     result = docker.images()
     assert_in('python2', result)
+
+
+@requires_image('python2')
+def test_image_digest():
+    result = docker.image_digest('python2')
+    assert result.startswith('sha256:')
+
+
+def test_image_digest__missing():
+    eq_(None, docker.image_digest('lintreview-not-an-image'))
+
+
+def test_chain_commands():
+    result = docker.chain_commands(
+        ['phpcbf', '/src/a file.php'],
+        ['phpcs', '/src/a file.php'])
+    expected = [
+        'sh',
+        '-c',
+        "phpcbf '/src/a file.php' > /dev/null 2>&1; phpcs '/src/a file.php'"
+    ]
+    eq_(expected, result)
+
+
+@patch('lintreview.docker._run')
+def test_chain_runs(mock_run):
+    mock_run.return_value = 'lint output'
+    with docker.chain_runs() as chain:
+        eq_('', docker.run('phpcs', ['phpcbf', 'a.php'], '/tmp'))
+        chain.link()
+        eq_('lint output', docker.run('phpcs', ['phpcs', 'a.php'], '/tmp'))
+        docker.run('phpcs', ['phpcs', 'b.php'], '/tmp')
+
+    eq_(2, mock_run.call_count)
+    command = mock_run.call_args_list[0][0][1]
+    eq_(docker.chain_commands(['phpcbf', 'a.php'], ['phpcs', 'a.php']),
+        command)
+    eq_(['phpcs', 'b.php'], mock_run.call_args_list[1][0][1])
+
+
+@patch('lintreview.docker._run')
+def test_chain_runs__different_image(mock_run):
+    with docker.chain_runs() as chain:
+        docker.run('python2', ['autopep8', 'a.py'], '/tmp')
+        chain.link()
+        docker.run('python3', ['flake8', 'a.py'], '/tmp')
+
+    eq_(2, mock_run.call_count)
+    eq_(['autopep8', 'a.py'], mock_run.call_args_list[0][0][1])
+    eq_(['flake8', 'a.py'], mock_run.call_args_list[1][0][1])
+
+
+@patch('lintreview.docker._run')
+def test_chain_runs__flush_pending(mock_run):
+    with docker.chain_runs():
+        docker.run('python2', ['autopep8', 'a.py'], '/tmp')
+    mock_run.assert_called_once_with(
+        'python2',
+        ['autopep8', 'a.py'],
+        '/tmp',
+        env=None)
+
+    docker.run('python2', ['flake8', 'a.py'], '/tmp')
+    eq_(2, mock_run.call_count, 'Runs outside a chain are not deferred')
+
+
+@patch('lintreview.docker._run')
+def test_chain_runs__only_last_deferred(mock_run):
+    with docker.chain_runs() as chain:
+        docker.run('python2', ['autopep8', 'a.py'], '/tmp')
+        docker.run('python2', ['autopep8', 'b.py'], '/tmp')
+        eq_(1, mock_run.call_count, 'Earlier deferred run is flushed')
+        chain.link()
+        docker.run('python2', ['flake8', 'b.py'], '/tmp')
+
+    eq_(2, mock_run.call_count)
+    eq_(['autopep8', 'a.py'], mock_run.call_args_list[0][0][1])
+    eq_(docker.chain_commands(['autopep8', 'b.py'], ['flake8', 'b.py']),
+        mock_run.call_args_list[1][0][1])
+
+
+@patch('lintreview.docker._run')
+def test_chain_runs__nothing_deferred(mock_run):
+    mock_run.return_value = 'lint output'
+    with docker.chain_runs() as chain:
+        chain.link()
+        eq_('lint output', docker.run('python2', ['flake8', 'a.py'], '/tmp'))
+    mock_run.assert_called_once_with(
+        'python2',
+        ['flake8', 'a.py'],
+        '/tmp',
+        env=None,
+        name=None)
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 import lintreview.git as git
 import os
+import subprocess
 from .test_github import config
 from . import (
     setup_repo,
@@ -8,7 +9,7 @@ from . import (
     clone_path,
     cant_write_to_test
 )
-from nose.tools import eq_, raises, assert_in, with_setup
+from nose.tools import eq_, raises, assert_in, assert_not_in, with_setup
 from unittest import skipIf
 
 settings = {
@@ -114,6 +115,38 @@ def test_diff__files_list():
     eq_('', result)
 
 
+@skipIf(cant_write_to_test, 'Cannot write to ./tests skipping')
+@with_setup(setup_repo, teardown_repo)
+def test_diff_range():
+    git.create_branch(clone_path, 'testing')
+    with open(clone_path + '/README.mdown', 'w') as f:
+        f.write('New readme')
+    git.apply_cached(clone_path, git.diff(clone_path))
+    git.commit(clone_path, 'bot <bot@example.com>', 'Update readme')
+
+    result = git.diff_range(clone_path, 'master', 'testing')
+    assert_in('diff --git a/README.mdown b/README.mdown', result)
+    assert_in('+New readme', result)
+    eq_('', git.diff_range(clone_path, 'testing', 'master'))
+
+
+@skipIf(cant_write_to_test, 'Cannot write to ./tests skipping')
+@with_setup(setup_repo, teardown_repo)
+def test_diff_range__renamed():
+    git.create_branch(clone_path, 'testing')
+    os.rename(clone_path + '/README.mdown', clone_path + '/README.md')
+    with open(clone_path + '/README.md', 'a') as f:
+        f.write('More readme\n')
+    subprocess.check_call(['git', 'add', '-A'], cwd=clone_path)
+    git.commit(clone_path, 'bot <bot@example.com>', 'Rename readme')
+
+    result = git.diff_range(clone_path, 'master', 'testing')
+    assert_in('rename from README.mdown', result)
+    assert_in('rename to README.md', result)
+    assert_not_in('deleted file mode', result)
+    assert_in('+More readme', result)
+
+
 @skipIf(cant_write_to_test, 'Cannot write to ./tests skipping')
 @raises(IOError)
 def test_diff__non_git_path():
@@ -2,7 +2,7 @@ from __future__ import absolute_import
 import lintreview.github as github
 
 from . import load_fixture
-from mock import call, Mock
+from mock import call, Mock, patch
 from nose.tools import eq_
 import github3
 from github3 import GitHub
@@ -21,12 +21,42 @@ def test_get_client():
     assert isinstance(gh, GitHub)
 
 
+def test_get_client__reused():
+    conf = dict(config, GITHUB_OAUTH_TOKEN='an-oauth-token')
+    gh = github.get_client(conf)
+    assert gh is github.get_client(dict(conf))
+    other = github.get_client(dict(conf, GITHUB_OAUTH_TOKEN='other-token'))
+    assert gh is not other
+
+    with patch('lintreview.github.os.getpid', Mock(return_value=-1)):
+        assert gh is not github.get_client(conf), 'New client after fork'
+
+
+def test_record_response():
+    response = Mock()
+    response.request.method = 'GET'
+    response.status_code = 200
+    response.headers = {'X-RateLimit-Remaining': '4999'}
+    before = github.api_requests.value(method='GET', status=200) or 0
+
+    github.record_response(response)
+    eq_(before + 1, github.api_requests.value(method='GET', status=200))
+    eq_(4999, github.rate_limit.value())
+
+
 def test_get_lintrc():
     repo = Mock(spec=github3.repos.repo.Repository)
     github.get_lintrc(repo, 'HEAD')
     repo.file_contents.assert_called_with('.lintrc', 'HEAD')
 
 
+def test_get_lintrc__decodes_bytes():
+    repo = Mock(spec=github3.repos.repo.Repository)
+    repo.file_contents.return_value.decoded = b'[tools]\nlinters = pep8'
+    result = github.get_lintrc(repo, 'HEAD')
+    eq_(u'[tools]\nlinters = pep8', result)
+
+
 def test_register_hook():
     repo = Mock(spec=github3.repos.repo.Repository,
                 full_name='mark/lint-review')
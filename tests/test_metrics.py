@@ -0,0 +1,197 @@
+from __future__ import absolute_import
+import lintreview.metrics as metrics
+from mock import Mock, patch
+from multiprocessing.pool import ThreadPool
+from nose.tools import eq_, assert_in, assert_raises
+import json
+
+
+def test_timings_add():
+    timings = metrics.Timings()
+    timings.add('clone', 1.5)
+    timings.add('clone', 0.5)
+    timings.add('publish', 0.25)
+    eq_(2.0, timings.get('clone'))
+    eq_(None, timings.get('nope'))
+    eq_(['clone', 'publish'], list(timings.as_dict().keys()))
+    eq_(2, len(timings))
+
+
+def test_timings_span():
+    timings = metrics.Timings()
+    with timings.span('clone'):
+        pass
+    assert timings.get('clone') >= 0
+
+
+def test_timings__timeline():
+    timings = metrics.Timings()
+    with timings.span('clone'):
+        pass
+    eq_(None, timings.timeline)
+
+    timings = metrics.Timings(timeline=True)
+    with metrics.activate(timings):
+        with metrics.span('tools'):
+            with metrics.span('container'):
+                pass
+    timings.add('total', 1.0)
+    eq_(['tools.container', 'tools'],
+        [event['name'] for event in timings.timeline])
+    event = timings.timeline[0]
+    assert event['start'] >= 0
+    assert_in('thread', event)
+
+
+def test_span__no_active_timings():
+    with metrics.span('nothing'):
+        pass
+    eq_((None, ()), metrics.current())
+
+
+def test_span__nested_names():
+    timings = metrics.Timings()
+    with metrics.activate(timings):
+        with metrics.span('tools'):
+            with metrics.span('flake8'):
+                with metrics.span('container'):
+                    pass
+            with metrics.span('pep8'):
+                pass
+    eq_(['tools.flake8.container', 'tools.flake8', 'tools.pep8', 'tools'],
+        list(timings.as_dict().keys()))
+    eq_((None, ()), metrics.current())
+
+
+def test_resume__other_threads():
+    timings = metrics.Timings()
+
+    def work(state):
+        with metrics.resume(state):
+            with metrics.span('container'):
+                pass
+
+    with metrics.activate(timings), metrics.span('flake8'):
+        state = metrics.current()
+        pool = ThreadPool(2)
+        pool.map(work, [state, state])
+        pool.close()
+        pool.join()
+    assert_in('flake8.container', timings.as_dict())
+
+
+def test_emit():
+    timings = metrics.Timings()
+    broken = Mock(side_effect=ValueError('bad sink'))
+    sink = Mock()
+    metrics.add_sink(broken)
+    metrics.add_sink(sink)
+    try:
+        metrics.emit(timings, number=1)
+    finally:
+        metrics.remove_sink(broken)
+        metrics.remove_sink(sink)
+    sink.assert_called_with(timings, {'number': 1})
+
+    metrics.emit(timings, number=2)
+    eq_(1, sink.call_count)
+
+
+@patch('lintreview.metrics.log')
+def test_log_sink(log):
+    timings = metrics.Timings()
+    timings.add('clone', 1.23456)
+    metrics.log_sink(timings, {'repo': 'lint-test', 'number': 1})
+
+    args = log.info.call_args[0]
+    data = json.loads(args[1])
+    eq_({'number': 1, 'repo': 'lint-test', 'timings': {'clone': 1.2346}},
+        data)
+
+
+def test_counter():
+    counter = metrics.Counter('things_total', 'Things', ('kind',))
+    counter.inc(kind='a')
+    counter.inc(2, kind='a')
+    counter.inc(kind='b')
+    eq_(3, counter.value(kind='a'))
+    eq_(1, counter.value(kind='b'))
+    eq_(None, counter.value(kind='c'))
+
+
+def test_counter__unknown_label():
+    counter = metrics.Counter('things_total', 'Things', ('kind',))
+    with assert_raises(ValueError):
+        counter.inc(color='red')
+
+
+def test_gauge__function():
+    gauge = metrics.Gauge('depth', 'Depth', function=lambda: 4)
+    eq_([('', [], 4)], list(gauge.samples()))
+
+    def broken():
+        raise IOError('no broker')
+    gauge = metrics.Gauge('depth', 'Depth', function=broken)
+    eq_([], list(gauge.samples()))
+
+
+def test_gauge__function_labels():
+    depths = {'large': 2, 'celery': 5}
+    gauge = metrics.Gauge('depth', 'Depth', ('queue',),
+                          function=lambda: depths)
+    eq_([('', [('queue', 'celery')], 5),
+         ('', [('queue', 'large')], 2)],
+        list(gauge.samples()))
+
+
+def test_histogram():
+    histogram = metrics.Histogram('run_seconds', 'Runs', ('image',),
+                                  buckets=(1, 5))
+    histogram.observe(0.5, image='python2')
+    histogram.observe(3, image='python2')
+    eq_({'sum': 3.5, 'count': 2}, histogram.value(image='python2'))
+
+    samples = list(histogram.samples())
+    expected = [
+        ('_bucket', [('image', 'python2'), ('le', '1')], 1),
+        ('_bucket', [('image', 'python2'), ('le', '5')], 2),
+        ('_bucket', [('image', 'python2'), ('le', '+Inf')], 2),
+        ('_sum', [('image', 'python2')], 3.5),
+        ('_count', [('image', 'python2')], 2),
+    ]
+    eq_(expected, samples)
+
+
+def test_register__existing():
+    first = metrics.counter('test_register_total', 'Test')
+    second = metrics.counter('test_register_total', 'Test')
+    assert first is second
+
+
+def test_render():
+    counter = metrics.counter('test_render_total', 'Rendered things',
+                              ('name',))
+    counter.inc(name='say "hi"')
+    out = metrics.render()
+    assert_in('# HELP test_render_total Rendered things\n', out)
+    assert_in('# TYPE test_render_total counter\n', out)
+    assert_in('test_render_total{name="say \\"hi\\""} 1\n', out)
+
+
+def test_stage_sink():
+    timings = metrics.Timings()
+    timings.add('test_stage', 0.5)
+    before = metrics.review_stages.value(stage='test_stage')
+    eq_(None, before)
+    metrics.stage_sink(timings, {})
+    eq_({'sum': 0.5, 'count': 1},
+        metrics.review_stages.value(stage='test_stage'))
+
+
+def test_exporter_app():
+    start_response = Mock()
+    body = metrics.exporter_app({}, start_response)
+    status, headers = start_response.call_args[0]
+    eq_('200 OK', status)
+    assert_in(('Content-Type', metrics.CONTENT_TYPE), headers)
+    assert_in(b'# TYPE', body[0])
@@ -4,6 +4,7 @@ from lintreview.config import build_review_config
 from lintreview.diff import DiffCollection
 from lintreview.processor import Processor
 from lintreview.repo import GithubPullRequest
+from lintreview.tools import Tool
 from lintreview.fixers.error import ConfigurationError, WorkflowError
 from github3.pulls import PullRequest
 from mock import patch, sentinel, Mock, ANY
@@ -38,8 +39,65 @@ class TestProcessor(object):
         subject.load_changes()
 
         eq_(1, len(subject._changes), 'File count is wrong')
+        assert subject.timings.get('fetch_files') is not None
         assert isinstance(subject._changes, DiffCollection)
 
+    @patch('lintreview.processor.git')
+    def test_load_changes__local_diff(self, git_stub):
+        pull = self.get_pull_request()
+        pull.pull.files = Mock()
+        git_stub.diff_range.return_value = load_fixture('diff/one_file.txt')
+
+        config = build_review_config('', dict(app_config, LOCAL_DIFF=True))
+        subject = Processor(Mock(), pull, './tests', config)
+        subject.load_changes()
+
+        git_stub.diff_range.assert_called_with('./tests', pull.base, pull.head)
+        assert not pull.pull.files.called, 'Should not use the API'
+        eq_(['tests/test_diff.py'], subject._changes.get_files())
+
+    @patch('lintreview.processor.git')
+    def test_load_changes__local_diff_fails(self, git_stub):
+        pull = self.get_pull_request()
+        git_stub.diff_range.side_effect = IOError('bad revision')
+
+        config = build_review_config('', dict(app_config, LOCAL_DIFF=True))
+        subject = Processor(Mock(), pull, './tests', config)
+        subject.load_changes()
+
+        eq_(1, len(subject._changes), 'Should use the API')
+
+    def test_prefetch(self):
+        pull = self.get_pull_request()
+        pull.pull.commits = Mock(return_value=[])
+        pull.pull.review_comments = Mock(return_value=[])
+
+        config = build_review_config(fixer_ini, app_config)
+        subject = Processor(Mock(), pull, './tests', config)
+        subject.prefetch()
+
+        eq_(1, len(subject._changes))
+        assert not pull.pull.commits.called, 'No tools need commits'
+
+        subject._review._loader.join()
+        assert pull.pull.review_comments.called
+        assert subject.timings.get('load_comments') is not None
+
+    @patch('lintreview.processor.git')
+    def test_prefetch__local_diff(self, git_stub):
+        pull = self.get_pull_request()
+        pull.pull.files = Mock()
+        pull.pull.review_comments = Mock(return_value=[])
+
+        config = build_review_config(fixer_ini,
+                                     dict(app_config, LOCAL_DIFF=True))
+        subject = Processor(Mock(), pull, './tests', config)
+        subject.prefetch()
+
+        eq_(None, subject._changes, 'Changes need the clone')
+        assert not git_stub.diff_range.called
+        assert not pull.pull.files.called
+
     @raises(RuntimeError)
     def test_run_tools__no_changes(self):
         pull = self.get_pull_request()
@@ -65,7 +123,15 @@ class TestProcessor(object):
         tool_stub.run.assert_called_with(
             ANY,
             [],
-            ANY)
+            subject.load_commits)
+
+    def test_load_commits(self):
+        pull = Mock()
+        pull.commits.return_value = [sentinel.commit]
+
+        config = build_review_config('', app_config)
+        subject = Processor(Mock(), pull, './tests', config)
+        eq_([sentinel.commit], subject.load_commits())
 
     @patch('lintreview.processor.tools')
     @patch('lintreview.processor.fixers')
@@ -76,6 +142,7 @@ class TestProcessor(object):
         tool_stub.factory.return_value = sentinel.tools
 
         fixer_stub.create_context.return_value = sentinel.context
+        fixer_stub.read_files.return_value = sentinel.snapshot
         fixer_stub.run_fixers.return_value = sentinel.diff
 
         config = build_review_config(fixer_ini, app_config)
@@ -92,7 +159,9 @@ class TestProcessor(object):
         fixer_stub.run_fixers.assert_called_with(
             sentinel.tools,
             './tests',
-            [file_path])
+            [file_path],
+            combined=False,
+            original=sentinel.snapshot)
         fixer_stub.apply_fixer_diff.assert_called_with(
             subject._changes,
             sentinel.diff,
@@ -105,9 +174,10 @@ class TestProcessor(object):
         pull = self.get_pull_request()
         repo = Mock()
 
-        tool_stub.factory.return_value = sentinel.tools
+        tool_stub.factory.return_value = []
 
         fixer_stub.create_context.return_value = sentinel.context
+        fixer_stub.read_files.return_value = sentinel.snapshot
         fixer_stub.run_fixers.side_effect = RuntimeError
 
         config = build_review_config(fixer_ini, app_config)
@@ -118,11 +188,55 @@ class TestProcessor(object):
         assert fixer_stub.create_context.called
         assert fixer_stub.run_fixers.called
         eq_(False, fixer_stub.apply_fixer_diff.called)
-        eq_(True,
-            fixer_stub.rollback_changes.called,
-            'Runtime error should trigger git reset.')
+        fixer_stub.rollback_changes.assert_called_with(
+            './tests',
+            sentinel.snapshot,
+            ['View/Helper/AssetCompressHelper.php'])
         assert tool_stub.run.called, 'Should have ran'
 
+    @patch('lintreview.fixers.git')
+    @patch('lintreview.processor.tools.factory')
+    def test_run_tools__combined_fixer_rollback(self, factory, git_stub):
+        pull = self.get_pull_request()
+        file_path = 'View/Helper/AssetCompressHelper.php'
+
+        class Combined(Tool):
+            name = 'combined'
+            runs = 0
+            offset = 0
+
+            def has_fixer(self):
+                return True
+
+            def process_files(self, files):
+                self.runs += 1
+                self.problems.add(file_path, self.runs,
+                                  '%s %d' % (self.name, self.runs),
+                                  position=self.offset + self.runs)
+
+        class Broken(Combined):
+            name = 'broken'
+            offset = 10
+
+            def process_fixer(self, files):
+                raise RuntimeError('Fixer failed')
+
+        config = build_review_config(
+            fixer_ini, dict(app_config, FIXERS_COMBINED=True))
+        subject = Processor(Mock(), pull, './tests', config)
+        subject.load_changes()
+        combined = Combined(subject.problems)
+        broken = Broken(subject.problems)
+        factory.return_value = [combined, broken]
+        subject.run_tools()
+
+        eq_(2, combined.runs, 'Should lint again after rollback')
+        eq_(1, broken.runs)
+        eq_(False, combined.lint_complete)
+        eq_(['combined 2', 'broken 1'],
+            [problem.body for problem in subject.problems])
+        git_stub.reset_hard.assert_called_with('./tests')
+
     def test_run_tools__fixer_errors(self):
         error_message = 'A bad thing'
         cases = (
@@ -0,0 +1,43 @@
+from __future__ import absolute_import
+import lintreview.metrics as metrics
+import lintreview.profiling as profiling
+from nose.tools import eq_
+import json
+import os
+import pstats
+import shutil
+import tempfile
+
+
+def test_start_save():
+    path = os.path.join(tempfile.mkdtemp(), 'profiles')
+    timings = metrics.Timings(timeline=True)
+    profiler = profiling.start()
+    with timings.span('clone'):
+        sum(range(100))
+
+    try:
+        base = profiling.save(profiler, timings, path, 'markstory-lint-test-1')
+        assert base.startswith(os.path.join(path, 'markstory-lint-test-1-'))
+
+        stats = pstats.Stats(base + '.prof')
+        assert stats.total_calls > 0
+
+        with open(base + '.timeline.json') as f:
+            data = json.load(f)
+        eq_(['clone'], list(data['timings'].keys()))
+        eq_('clone', data['timeline'][0]['name'])
+    finally:
+        shutil.rmtree(os.path.dirname(path))
+
+
+def test_save__unwritable_path():
+    path = tempfile.mkdtemp()
+    blocker = os.path.join(path, 'file')
+    open(blocker, 'w').close()
+    try:
+        profiler = profiling.start()
+        eq_(None, profiling.save(profiler, metrics.Timings(),
+                                 os.path.join(blocker, 'profiles'), 'test'))
+    finally:
+        shutil.rmtree(path)
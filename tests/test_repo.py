@@ -141,6 +141,10 @@ class TestGithubPullRequest(TestCase):
         expected = '53cb70abadcb3237dcb2aa2b1f24dcf7bcc7d68e'
         assert expected == pull.head
 
+    def test_base(self):
+        pull = GithubPullRequest(self.model)
+        eq_('55a0965a0af4165058b17ebd0951fa483e8043c8', pull.base)
+
     def test_clone_url(self):
         pull = GithubPullRequest(self.model)
         expected = 'https://github.com/contributor/lint-test.git'
@@ -172,6 +176,29 @@ class TestGithubPullRequest(TestCase):
         pull.add_label('No lint errors')
         mock_issue.add_labels.assert_called_with('No lint errors')
 
+    @patch.dict('lintreview.repo._commits', clear=True)
+    def test_commits__cached_by_head(self):
+        self.model.commits = Mock(return_value=iter([sentinel.commit]))
+        pull = GithubPullRequest(self.model)
+        eq_([sentinel.commit], pull.commits())
+
+        other = GithubPullRequest(PullRequest(self.model.as_dict()))
+        other.pull.commits = Mock()
+        eq_([sentinel.commit], other.commits())
+        eq_(1, self.model.commits.call_count)
+        assert not other.pull.commits.called
+
+    @patch.dict('lintreview.repo._commits', clear=True)
+    def test_commits__new_head(self):
+        self.model.commits = Mock(return_value=iter([sentinel.commit]))
+        GithubPullRequest(self.model).commits()
+
+        data = self.model.as_dict()
+        data['head']['sha'] = 'abc123'
+        model = PullRequest(data)
+        model.commits = Mock(return_value=iter([sentinel.other]))
+        eq_([sentinel.other], GithubPullRequest(model).commits())
+
     def test_create_comment(self):
         self.model.create_comment = Mock()
         pull = GithubPullRequest(self.model)
@@ -2,7 +2,13 @@ from __future__ import absolute_import
 from . import load_fixture, fixer_ini
 from lintreview.config import load_config, build_review_config
 from lintreview.diff import DiffCollection
-from lintreview.review import Review, Problems, Comment, IssueComment
+from lintreview.review import (
+    Review,
+    Problems,
+    Comment,
+    IssueComment,
+    body_hash
+)
 from lintreview.repo import GithubRepository, GithubPullRequest
 from mock import Mock
 from nose.tools import eq_
@@ -46,18 +52,42 @@ class TestReview(TestCase):
 
         filename = "Routing/Filter/AssetCompressor.php"
         res = review.comments(filename)
-        eq_(1, len(res))
-        expected = Comment(filename, None, 87, "A pithy remark")
-        eq_(expected, res[0])
+        eq_([(87, body_hash("A pithy remark"))], res)
+        assert review.has_comment(filename, 87, "A pithy remark")
+        assert not review.has_comment(filename, 88, "A pithy remark")
 
         filename = "View/Helper/AssetCompressHelper.php"
         res = review.comments(filename)
         eq_(2, len(res))
-        expected = Comment(filename, None, 40, "Some witty comment.")
-        eq_(expected, res[0])
+        eq_((40, body_hash("Some witty comment.")), res[0])
+        eq_((89, body_hash("Not such a good comment")), res[1])
+
+    def test_preload_comments(self):
+        fixture_data = load_fixture('comments_current.json')
+        self.pr.review_comments.return_value = [
+            GhIssueComment(f) for f in json.loads(fixture_data)]
+        review = Review(self.repo, self.pr, self.config)
+        review.preload_comments()
+
+        problems = Problems()
+        problems.add('Routing/Filter/AssetCompressor.php', 87,
+                     'A pithy remark', 87)
+        problems.set_changes([1])
+        review.publish_review(problems, 'abc123')
 
-        expected = Comment(filename, None, 89, "Not such a good comment")
-        eq_(expected, res[1])
+        eq_(1, self.pr.review_comments.call_count)
+        eq_(0, len(problems), 'Existing comment should be removed')
+
+    def test_preload_comments__failure(self):
+        self.pr.review_comments.side_effect = [IOError('Timeout'), []]
+        review = Review(self.repo, self.pr, self.config)
+        review.preload_comments()
+
+        problems = Problems()
+        problems.set_changes([1])
+        review.publish_review(problems, 'abc123')
+        eq_(2, self.pr.review_comments.call_count,
+            'Comments are loaded again after a failure')
 
     def test_filter_existing__removes_duplicates(self):
         fixture_data = load_fixture('comments_current.json')
@@ -335,6 +365,21 @@ class TestReview(TestCase):
 
         assert review.publish_summary.called, 'Should have been called.'
 
+    def test_publish_review__comments_loaded(self):
+        fixture = load_fixture('comments_current.json')
+        self.pr.review_comments.return_value = [
+            GhIssueComment(f) for f in json.loads(fixture)]
+
+        problems = Problems()
+        problems.add('Routing/Filter/AssetCompressor.php', 87, 'Thing', 87)
+        problems.set_changes([1])
+
+        review = Review(self.repo, self.pr, self.config)
+        review.load_comments()
+        review.publish_review(problems, 'abc123')
+        eq_(1, self.pr.review_comments.call_count,
+            'Loaded comments should be reused')
+
     def test_publish_summary(self):
         problems = Problems()
 
@@ -497,6 +542,20 @@ class TestProblems(TestCase):
         eq_(2, len(result))
         eq_(errors, result)
 
+    def test_merge(self):
+        self.problems.add('some/file.py', 10, 'Thing is wrong', 3)
+        other = Problems()
+        other.add('some/file.py', 10, 'Also wrong', 3)
+        other.add('some/file.py', 12, 'Not good', 5)
+        other.add(IssueComment('General issue'))
+
+        self.problems.merge(other)
+        eq_(3, len(self.problems))
+        result = self.problems.all()
+        eq_('Thing is wrong\nAlso wrong', result[0].body)
+        eq_(5, result[1].position)
+        eq_('General issue', result[2].body)
+
     def test_limit_to_changes__remove_problems(self):
         res = [PullFile(f) for f in json.loads(self.two_files_json)]
         changes = DiffCollection(res)
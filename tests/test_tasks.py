@@ -0,0 +1,206 @@
+from __future__ import absolute_import
+import lintreview.tasks as tasks
+from lintreview.config import get_config
+from mock import ANY, Mock, patch
+from nose.tools import eq_
+import shutil
+import sys
+import tempfile
+import threading
+
+large_queue = {
+    'LARGE_REVIEW_QUEUE': 'lintreview.large',
+    'LARGE_REVIEW_COST': 100,
+}
+
+
+@patch('lintreview.tasks.gc')
+def test_preload(gc):
+    tasks.preload()
+    for name in tasks.PRELOAD_MODULES:
+        assert name in sys.modules, name
+    assert gc.freeze.called
+
+
+@patch('lintreview.tasks.github')
+def test_connect_github(github):
+    with patch.dict(get_config(), {'GITHUB_OAUTH_TOKEN': 'a-token'}):
+        tasks.connect_github()
+    github.get_client.assert_called_with(get_config())
+
+
+@patch('lintreview.tasks.tools.start_image_refresher')
+def test_refresh_images(start_image_refresher):
+    with patch.dict(get_config(), {'DOCKER_IMAGE_CHECK_INTERVAL': 60}):
+        tasks.refresh_images()
+    start_image_refresher.assert_called_with(60)
+
+
+def test_celery_config():
+    eq_(get_config()['CELERY_TASK_SERIALIZER'],
+        tasks.celery.conf.CELERY_TASK_SERIALIZER)
+
+
+@patch.dict(get_config(), large_queue)
+def test_review_queue():
+    eq_(None, tasks.review_queue(10, 2))
+    eq_(None, tasks.review_queue(0, 0))
+    eq_('lintreview.large', tasks.review_queue(50, 2))
+    eq_('lintreview.large', tasks.review_queue(500, 1))
+
+
+@patch.dict(get_config(), {'LARGE_REVIEW_QUEUE': None})
+def test_review_queue__disabled():
+    eq_(None, tasks.review_queue(5000, 10))
+
+
+@patch.dict(get_config(), {'REPOSITORY_CONCURRENCY': 0})
+def test_acquire_repository_slot__unlimited():
+    eq_((True, None), tasks.acquire_repository_slot('markstory', 'lint'))
+
+
+def test_acquire_repository_slot():
+    path = tempfile.mkdtemp()
+    settings = {
+        'REPOSITORY_CONCURRENCY': 1,
+        'REPOSITORY_SLOTS_PATH': path,
+    }
+    try:
+        with patch.dict(get_config(), settings):
+            acquired, slot = tasks.acquire_repository_slot('markstory', 'lint')
+            eq_(True, acquired)
+
+            blocked, other = tasks.acquire_repository_slot('markstory', 'lint')
+            eq_(False, blocked)
+            eq_(None, other)
+            tasks.concurrency.release(slot)
+    finally:
+        shutil.rmtree(path)
+
+
+lintrc = """
+[tools]
+linters = pep8
+"""
+
+
+@patch('lintreview.tasks.tools.missing_images', Mock(return_value=[]))
+@patch('lintreview.tasks.Processor')
+@patch('lintreview.tasks.GithubRepository')
+@patch('lintreview.tasks.git')
+def test_process_pull_request(git, repository, processor):
+    clone_started = threading.Event()
+    prefetched = threading.Event()
+
+    def clone(*args):
+        clone_started.set()
+        assert prefetched.wait(5), 'Prefetch should not wait for the clone'
+
+    git.clone_or_update.side_effect = clone
+    processor.return_value.prefetch.side_effect = prefetched.set
+
+    tasks.process_pull_request('markstory', 'lint-test', 1, lintrc)
+
+    assert clone_started.is_set()
+    instance = processor.return_value
+    assert instance.prefetch.called
+    assert not instance.load_changes.called, 'Changes were prefetched'
+    assert instance.run_tools.called
+    assert instance.publish.called
+    assert git.destroy.called
+
+
+@patch('lintreview.tasks.tools.missing_images', Mock(return_value=[]))
+@patch('lintreview.tasks.Processor')
+@patch('lintreview.tasks.GithubRepository')
+@patch('lintreview.tasks.git')
+def test_process_pull_request__clone_fails(git, repository, processor):
+    git.clone_or_update.side_effect = IOError('Unable to clone')
+
+    tasks.process_pull_request('markstory', 'lint-test', 1, lintrc)
+
+    instance = processor.return_value
+    assert instance.prefetch.called
+    assert not instance.run_tools.called
+    assert git.destroy.called
+
+
+@patch('lintreview.tasks.tools.missing_images')
+@patch('lintreview.tasks.Processor')
+@patch('lintreview.tasks.GithubRepository')
+@patch('lintreview.tasks.git')
+def test_process_pull_request__missing_images(git, repository, processor,
+                                              missing_images):
+    missing_images.return_value = ['pep8']
+    tasks.process_pull_request('markstory', 'lint-test', 1, lintrc)
+
+    assert missing_images.called
+    repository.return_value.create_status.assert_called_with(
+        ANY, 'error', 'Lint tools are not available: pep8')
+    assert not processor.called
+    assert not git.destroy.called, 'Nothing was cloned'
+
+
+@patch('lintreview.tasks.tools.missing_images', Mock(return_value=[]))
+@patch('lintreview.tasks.Processor')
+@patch('lintreview.tasks.GithubRepository')
+@patch('lintreview.tasks.git')
+def test_process_pull_request__unknown_linters(git, repository, processor):
+    config = "[tools]\nlinters = pep8, bogus\n"
+    tasks.process_pull_request('markstory', 'lint-test', 1, config)
+
+    repository.return_value.create_status.assert_called_with(
+        ANY, 'error', 'Unknown lint tools: bogus')
+    assert not git.clone_or_update.called
+    assert not processor.called
+    assert not git.destroy.called
+
+
+@patch('lintreview.tasks.acquire_repository_slot')
+@patch('lintreview.tasks.Processor')
+@patch('lintreview.tasks.GithubRepository')
+def test_process_pull_request__slot_retries_exhausted(repository, processor,
+                                                      acquire):
+    acquire.return_value = (False, None)
+    settings = {'REPOSITORY_MAX_RETRIES': 2, 'REPOSITORY_RETRY_DELAY': 0}
+    with patch.dict(get_config(), settings):
+        tasks.process_pull_request.apply(
+            ('markstory', 'lint-test', 1, lintrc))
+
+    eq_(3, acquire.call_count, 'Retried twice')
+    instance = repository.return_value
+    eq_(1, instance.create_status.call_count)
+    instance.create_status.assert_called_with(
+        instance.pull_request.return_value.head, 'error',
+        'Too many reviews of markstory/lint-test are running, '
+        'review skipped.')
+    assert not processor.called
+
+
+def test_review_queues():
+    eq_(['celery', 'lintreview.large'], tasks.review_queues())
+
+
+@patch('lintreview.tasks.celery')
+def test_queue_depths(celery):
+    celery.conf.CELERY_QUEUES = [Mock(), Mock()]
+    celery.conf.CELERY_QUEUES[0].name = 'celery'
+    celery.conf.CELERY_QUEUES[1].name = 'missing'
+    conn = celery.connection.return_value.__enter__.return_value
+    channel = conn.channel.return_value
+
+    def declare(queue, passive):
+        if queue == 'missing':
+            raise IOError('NOT_FOUND')
+        return Mock(message_count=4)
+    channel.queue_declare.side_effect = declare
+
+    with patch.object(tasks, '_queue_depths', (None, {})):
+        eq_({'celery': 4}, tasks.queue_depths())
+        eq_({'celery': 4}, tasks.queue_depths())
+        eq_(1, celery.connection.call_count, 'Depths are cached')
+        eq_(2, channel.close.call_count)
+
+        with patch.object(tasks, 'QUEUE_DEPTH_TTL', 0):
+            tasks.queue_depths()
+        eq_(2, celery.connection.call_count, 'Expired depths are read')
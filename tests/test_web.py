@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 from lintreview import web
+from lintreview.config import get_config
 from mock import patch, Mock
 from nose.tools import eq_
 from unittest import TestCase
@@ -43,6 +44,16 @@ class WebTest(TestCase):
         eq_("lint-review: {} pong\n".format(web.version),
             res.data.decode('utf-8'))
 
+    @patch('lintreview.web.queue_depths')
+    def test_metrics(self, queue_depths):
+        queue_depths.return_value = {'celery': 3, 'lintreview.large': 1}
+        res = self.app.get('/metrics')
+        eq_(200, res.status_code)
+        body = res.data.decode('utf-8')
+        assert 'lintreview_queue_depth{queue="celery"} 3\n' in body
+        assert 'lintreview_queue_depth{queue="lintreview.large"} 1\n' in body
+        assert '# TYPE lintreview_webhooks_total counter' in body
+
     def test_start_request_no_get(self):
         res = self.app.get('/review/start')
         eq_(405, res.status_code)
@@ -53,6 +64,7 @@ class WebTest(TestCase):
         res = self.app.post('/review/start',
                             content_type='application/json', data=data)
         eq_(403, res.status_code)
+        eq_(1, web.webhooks.value(result='invalid'))
 
     @patch('lintreview.web.process_pull_request')
     def test_start_request__ignore_unknown_action(self, task):
@@ -93,10 +105,38 @@ linters = pep8"""
 
         res = self.app.post('/review/start',
                             content_type='application/json', data=data)
-        assert task.delay.called, 'Process request should be called'
+        task.apply_async.assert_called_with(
+            ('mark', 'testing', '3', lintrc.return_value),
+            queue=None)
         eq_(204, res.status_code)
         eq_('', res.data.decode('utf-8'))
 
+    @patch('lintreview.web.get_repository')
+    @patch('lintreview.web.get_lintrc')
+    @patch('lintreview.web.process_pull_request')
+    def test_start_review_schedule_job__large_queue(self, task, lintrc,
+                                                    get_repo):
+        get_repo.return_value = Mock()
+        opened = test_data.copy()
+        opened['action'] = 'opened'
+        opened['pull_request'] = dict(test_data['pull_request'],
+                                      changed_files=600)
+        data = json.dumps(opened)
+
+        lintrc.return_value = """
+[tools]
+linters = pep8, flake8"""
+
+        settings = {
+            'LARGE_REVIEW_QUEUE': 'lintreview.large',
+            'LARGE_REVIEW_COST': 1000,
+        }
+        with patch.dict(get_config(), settings):
+            res = self.app.post('/review/start',
+                                content_type='application/json', data=data)
+        eq_(204, res.status_code)
+        eq_('lintreview.large', task.apply_async.call_args[1]['queue'])
+
     @patch('lintreview.web.get_repository')
     @patch('lintreview.web.get_lintrc')
     @patch('lintreview.web.process_pull_request')
@@ -113,6 +153,6 @@ linters = pep8"""
 
         res = self.app.post('/review/start',
                             content_type='application/json', data=data)
-        assert task.delay.called, 'Process request should be called'
+        assert task.apply_async.called, 'Process request should be called'
         eq_(204, res.status_code)
         eq_('', res.data.decode('utf-8'))
@@ -92,6 +92,45 @@ class TestGolint(TestCase):
             ],
             root_dir)
 
+    def test_group_by_package(self):
+        files = [
+            'cmd/main.go',
+            'pkg/a.go',
+            'cmd/util.go',
+            'root.go',
+        ]
+        result = self.tool.group_by_package(files)
+        eq_(['cmd', 'pkg', ''], list(result.keys()))
+        eq_(['cmd/main.go', 'cmd/util.go'], result['cmd'])
+        eq_(['pkg/a.go'], result['pkg'])
+        eq_(['root.go'], result[''])
+
+    @patch('lintreview.docker.run')
+    def test_process_files_multiple_packages__mocked(self, mock_command):
+        mock_command.return_value = (
+            "/src/cmd/main.go:3:1: exported function Foo should have comment\n"
+            "/src/pkg/a.go:5:1: exported type Bar should have comment\n"
+        )
+        self.tool.process_files(['/src/cmd/main.go', '/src/pkg/a.go'])
+
+        eq_(1, mock_command.call_count, 'Should use a single container')
+        command = mock_command.call_args[0][1]
+        eq_(['sh', '-c'], command[0:2])
+        script = command[2].split('\n')
+        eq_(2, len(script), 'One invocation per package')
+        assert 'golint /src/cmd/main.go 2>&1' in script[0]
+        assert 'golint /src/pkg/a.go 2>&1' in script[1]
+
+        eq_(1, len(self.problems.all('cmd/main.go')))
+        eq_(1, len(self.problems.all('pkg/a.go')))
+
+    def test_create_driver_command__quotes_and_options(self):
+        tool = Golint(self.problems, {'min_confidence': 0.9}, root_dir)
+        command = tool.create_driver_command([['a dir/x.go']])
+        script = command[2]
+        assert "golint -min_confidence 0.9 'a dir/x.go' 2>&1" in script
+        assert 'is in package' in script
+
     @requires_image('golint')
     def test_process_files_with_config(self):
         config = {
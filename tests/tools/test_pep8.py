@@ -17,6 +17,11 @@ class TestPep8(TestCase):
         self.problems = Problems()
         self.tool = Pep8(self.problems, {}, root_dir)
 
+    def test_image_name(self):
+        eq_('python2', self.tool.image_name())
+        tool = Pep8(self.problems, {'python': 3}, root_dir)
+        eq_('python3', tool.image_name())
+
     def test_match_file(self):
         self.assertFalse(self.tool.match_file('test.php'))
         self.assertFalse(self.tool.match_file('test.js'))
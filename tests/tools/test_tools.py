@@ -1,10 +1,12 @@
 from __future__ import absolute_import
+import lintreview.docker as docker
 import lintreview.tools as tools
 import github3
+import time
 from lintreview.config import ReviewConfig, build_review_config
 from lintreview.review import Review, Problems
 from nose.tools import eq_, raises
-from mock import Mock
+from mock import Mock, patch, sentinel
 from tests import root_dir, fixtures_path, requires_image
 
 
@@ -47,6 +49,238 @@ def test_factory_generates_tools():
     assert isinstance(linters[1], tools.jshint.Jshint)
 
 
+def test_load_registry():
+    registry = tools.load_registry()
+    eq_(len(tools.BUILTIN_TOOLS), len(registry))
+
+    info = registry['eslint']
+    eq_('eslint', info.name)
+    eq_(tools.eslint.Eslint, info.tool_class)
+    eq_('eslint', info.image)
+    eq_(('.js', '.jsx'), info.extensions)
+    eq_(True, info.supports_fixer)
+
+    info = registry['commitcheck']
+    eq_(None, info.image)
+    eq_(None, info.extensions)
+    eq_(False, info.supports_fixer)
+
+
+def test_load_registry__entry_points():
+    class Custom(tools.Tool):
+        name = 'custom'
+        image = 'custom-image'
+        extensions = ('.cst',)
+
+    entry_point = Mock()
+    entry_point.name = 'custom'
+    entry_point.load.return_value = Custom
+
+    broken = Mock()
+    broken.name = 'broken'
+    broken.load.side_effect = ImportError('nope')
+
+    with patch('pkg_resources.iter_entry_points') as iter_entry_points:
+        iter_entry_points.return_value = [entry_point, broken]
+        registry = tools.load_registry()
+    iter_entry_points.assert_called_with(tools.ENTRY_POINT_GROUP)
+
+    assert 'broken' not in registry
+    eq_(Custom, registry['custom'].tool_class)
+    eq_('custom-image', registry['custom'].image)
+    eq_(('.cst',), registry['custom'].extensions)
+
+
+def test_registry__cached():
+    eq_(tools.registry(), tools.registry())
+    assert tools.registry() is tools.registry()
+
+
+def test_tool_match_file__extensions():
+    problems = Problems()
+    tool = tools.Tool(problems, {})
+    assert tool.match_file('anything.txt')
+
+    tool.extensions = ('.py',)
+    assert tool.match_file('dir/name/test.py')
+    assert not tool.match_file('dir/name/test.pyc')
+
+
+def test_tool_match_file__patterns_and_predicate():
+    problems = Problems()
+    tool = tools.Tool(problems, {})
+    tool.extensions = ('.py',)
+    tool.file_patterns = ('Dockerfile', '*.pyi')
+    tool.match_predicate = lambda filename: filename.endswith('bin/run')
+
+    assert tool.match_file('dir/test.py')
+    assert tool.match_file('dir/Dockerfile')
+    assert tool.match_file('dir/stubs.pyi')
+    assert tool.match_file('dir/bin/run')
+    assert not tool.match_file('dir/test.js')
+
+
+def test_file_router():
+    problems = Problems()
+    python = tools.Tool(problems, {})
+    python.extensions = ('.py',)
+    js = tools.Tool(problems, {})
+    js.extensions = ('.js', '.jsx')
+    js.file_patterns = ('Jakefile',)
+    shell = tools.Tool(problems, {})
+    shell.extensions = ('.sh',)
+    shell.match_predicate = lambda filename: 'bin/' in filename
+    everything = tools.Tool(problems, {})
+
+    files = [
+        'a.py',
+        'b.jsx',
+        'c.js',
+        'lib/Jakefile',
+        'bin/deploy',
+        'bin/tool.py',
+        'run.sh',
+        'README',
+    ]
+    router = tools.FileRouter([python, js, shell, everything])
+    routed = router.route(files)
+
+    eq_(['a.py', 'bin/tool.py'], routed[python])
+    eq_(['b.jsx', 'c.js', 'lib/Jakefile'], routed[js])
+    eq_(['bin/deploy', 'bin/tool.py', 'run.sh'], routed[shell])
+    eq_(files, routed[everything])
+
+
+def test_run__tool_overrides_match_file():
+    class Templates(tools.Tool):
+        name = 'templates'
+        extensions = ('.html',)
+
+        def match_file(self, filename):
+            return '/templates/' in filename
+
+        def process_files(self, files):
+            self.processed = files
+
+    problems = Problems()
+    tool = Templates(problems, {})
+    files = ['templates/index.html', 'templates/base.txt', 'static/a.html']
+    tools.run([tool], files, [])
+    expected = [docker.apply_base(f) for f in files[:2]]
+    eq_(expected, tool.processed)
+
+
+def test_file_router__matches_match_file():
+    problems = Problems()
+    registry = tools.registry()
+    lint_tools = [info.tool_class(problems, {}) for info in registry.values()]
+    files = [
+        'a.py', 'b.js', 'c.jsx', 'd.php', 'e.yml', 'f.yaml', 'g.rb',
+        'h.go', 'i.java', 'j.css', 'k.scss', 'l.ts', 'm.sh', 'n.lua',
+        'o.ex', 'p.swift', 'q.json', 'r.pp', 'README.md',
+    ]
+    routed = tools.FileRouter(lint_tools).route(files)
+    for tool in lint_tools:
+        expected = [f for f in files if tool.match_file(f)]
+        eq_(expected, routed[tool], tool.name)
+
+
+@patch('lintreview.docker.image_digest')
+def test_check_images(image_digest):
+    image_digest.side_effect = lambda name: (
+        None if name == 'golint' else 'sha256:' + name)
+    images = tools.check_images()
+
+    eq_(None, images['golint'])
+    eq_('sha256:eslint', images['eslint'])
+    assert None not in images
+    eq_(len(images), image_digest.call_count, 'Each image checked once')
+
+
+@patch('lintreview.docker.build_image')
+@patch('lintreview.docker.image_digest')
+def test_check_images__build_missing(image_digest, build_image):
+    built = []
+    build_image.side_effect = lambda name, path: built.append(name)
+    image_digest.side_effect = lambda name: (
+        'sha256:' + name if name in built or name != 'golint' else None)
+    images = tools.check_images('/path/to/docker')
+
+    build_image.assert_called_once_with('golint', '/path/to/docker')
+    eq_('sha256:golint', images['golint'])
+
+
+@patch('lintreview.docker.image_digest')
+def test_image_digests__cached(image_digest):
+    image_digest.return_value = 'sha256:abc'
+    tools.check_images()
+    calls = image_digest.call_count
+
+    eq_('sha256:abc', tools.image_digests()['eslint'])
+    eq_(calls, image_digest.call_count, 'Cached results should be used')
+
+
+@patch('lintreview.docker.image_digest')
+def test_start_image_refresher(image_digest):
+    image_digest.return_value = 'sha256:abc'
+    with patch.object(tools, '_images', {}), \
+            patch.object(tools, '_image_refresher', None):
+        thread = tools.start_image_refresher(60)
+        eq_(thread, tools.start_image_refresher(60), 'Only one refresher')
+
+        tools._check_images.set()
+        for i in range(100):
+            if tools.image_digests():
+                break
+            time.sleep(0.01)
+        eq_('sha256:abc', tools.image_digests()['eslint'])
+
+
+def test_unknown_linters():
+    eq_([], tools.unknown_linters(['eslint', 'commitcheck']))
+    eq_(['bogus', 'other'],
+        tools.unknown_linters(['bogus', 'eslint', 'other']))
+
+
+@patch('lintreview.docker.image_digest')
+def test_missing_images(image_digest):
+    image_digest.side_effect = lambda name: (
+        None if name == 'golint' else 'sha256:' + name)
+    tools.check_images()
+
+    config = build_review_config(
+        '[tools]\nlinters = eslint, commitcheck, bogus\n')
+    eq_([], tools.missing_images(config))
+    config = build_review_config('[tools]\nlinters = eslint, golint\n')
+    eq_(['golint'], tools.missing_images(config))
+
+
+@patch('lintreview.docker.image_digest')
+def test_missing_images__tool_options(image_digest):
+    image_digest.side_effect = lambda name: (
+        None if name == 'python3' else 'sha256:' + name)
+    with patch.object(tools, '_images', {}), \
+            patch.object(tools, '_pending_images', set()):
+        tools.check_images()
+
+        config = build_review_config('[tools]\nlinters = flake8, pep8\n')
+        eq_([], tools.missing_images(config))
+
+        config = build_review_config(
+            '[tools]\nlinters = flake8\n[tool_flake8]\npython = 3\n')
+        eq_(['flake8'], tools.missing_images(config))
+
+        # Images only a tool's options use may not be checked yet.
+        del tools._images['python3']
+        calls = image_digest.call_count
+        eq_([], tools.missing_images(config), 'Unchecked images are queued')
+        eq_(calls, image_digest.call_count, 'Reviews only read the cache')
+        eq_(set(['python3']), tools._pending_images)
+
+        tools.check_images()
+        eq_(['flake8'], tools.missing_images(config))
+
+
 def test_tool_constructor__config():
     problems = Problems()
     config = {'good': 'value'}
@@ -99,6 +333,117 @@ def test_tool_apply_base__with_base_no_traversal():
     eq_(result, 'comments_current.json')
 
 
+class BatchTool(tools.Tool):
+    name = 'batch'
+    max_batch_files = 2
+
+    def __init__(self, *args, **kwargs):
+        super(BatchTool, self).__init__(*args, **kwargs)
+        self.calls = []
+
+    def process_files(self, files):
+        self.calls.append(files)
+        for f in files:
+            self.problems.add(f, 1, 'Problem in ' + f)
+
+
+class FixerTool(tools.Tool):
+    name = 'fixer'
+    image = 'python2'
+    extensions = ('.py',)
+
+    def process_fixer(self, files):
+        tools.docker.run('python2', ['fix'] + files, self.base_path)
+
+    def process_files(self, files):
+        output = tools.docker.run('python2', ['lint'] + files, self.base_path)
+        for line in output.split('\n'):
+            self.problems.add(line, 1, 'Problem')
+
+
+@patch('lintreview.docker._run')
+def test_tool_execute_fixer_and_lint(mock_run):
+    mock_run.return_value = 'a.py'
+    problems = Problems()
+    tool = FixerTool(problems, {}, '/tmp')
+    tool.execute_fixer_and_lint(['a.py', 'b.js'])
+
+    eq_(1, mock_run.call_count, 'Should use one container')
+    command = mock_run.call_args[0][1]
+    eq_(tools.docker.chain_commands(['fix', 'a.py'], ['lint', 'a.py']),
+        command)
+    eq_(1, len(problems))
+    eq_(True, tool.lint_complete)
+
+    tool.execute(['a.py'])
+    eq_(1, mock_run.call_count, 'Should not lint again')
+
+
+class PythonFixerTool(FixerTool):
+    def process_fixer(self, files):
+        # Fixers may not need a container for some files.
+        pass
+
+
+@patch('lintreview.docker._run')
+def test_tool_execute_fixer_and_lint__fixer_without_run(mock_run):
+    mock_run.return_value = 'a.py'
+    problems = Problems()
+    tool = PythonFixerTool(problems, {}, '/tmp')
+    tool.execute_fixer_and_lint(['a.py'])
+
+    eq_(1, mock_run.call_count)
+    eq_(['lint', 'a.py'], mock_run.call_args[0][1])
+    eq_(1, len(problems), 'Linter output should be used')
+    eq_(True, tool.lint_complete)
+
+
+def test_batch_files():
+    files = ['a.py', 'b.py', 'c.py', 'd.py', 'e.py']
+    eq_([files], tools.batch_files(files, 10, 1000))
+    eq_([['a.py', 'b.py'], ['c.py', 'd.py'], ['e.py']],
+        tools.batch_files(files, 2, 1000))
+    eq_([['a.py', 'b.py'], ['c.py', 'd.py'], ['e.py']],
+        tools.batch_files(files, 10, 10))
+    eq_([['a_very_long_name.py'], ['b.py']],
+        tools.batch_files(['a_very_long_name.py', 'b.py'], 10, 5))
+    eq_([], tools.batch_files([], 10, 10))
+
+
+def test_tool_execute__batches():
+    problems = Problems()
+    tool = BatchTool(problems, {})
+    tool.execute(['a.py', 'b.py', 'c.py'])
+    eq_([['a.py', 'b.py'], ['c.py']], tool.calls)
+    eq_(3, len(problems))
+
+
+def test_tool_execute__batching_disabled():
+    problems = Problems()
+    tool = BatchTool(problems, {})
+    tool.batch_files = False
+    tool.execute(['a.py', 'b.py', 'c.py'])
+    eq_([['a.py', 'b.py', 'c.py']], tool.calls)
+
+
+def test_tool_execute__parallel_batches():
+    problems = Problems()
+    tool = BatchTool(problems, {})
+    tool.parallelism = 3
+    files = ['a.py', 'b.py', 'c.py', 'd.py', 'e.py']
+    tool.execute(files)
+
+    eq_(5, len(problems))
+    result = [p.filename for p in problems]
+    eq_(files, result, 'Problems should be merged in batch order')
+
+
+def test_factory__sets_parallelism():
+    config = build_review_config(simple_ini, {'TOOL_PARALLELISM': 3})
+    linters = tools.factory(config, Problems(), '')
+    eq_(3, linters[0].parallelism)
+
+
 @requires_image('python2')
 def test_run():
     config = build_review_config(simple_ini)
@@ -122,6 +467,33 @@ def test_run__filter_files():
     eq_(7, len(problems))
 
 
+def test_run__commits_not_needed():
+    problems = Problems()
+    tool = Mock(needs_commits=False, problems=problems)
+    tool.name = 'mock'
+    loader = Mock()
+    tools.run([tool], [], loader)
+
+    assert not loader.called, 'Commits should not be loaded'
+    tool.execute_commits.assert_called_with([])
+
+
+def test_run__commits_needed():
+    problems = Problems()
+    tool = Mock(needs_commits=True, problems=problems)
+    tool.name = 'mock'
+    loader = Mock(return_value=[sentinel.commit])
+    tools.run([tool], [], loader)
+
+    eq_(1, loader.call_count)
+    tool.execute_commits.assert_called_with([sentinel.commit])
+
+
+def test_needs_commits():
+    eq_(False, tools.needs_commits(['pep8', 'eslint', 'unknown']))
+    eq_(True, tools.needs_commits(['pep8', 'commitcheck']))
+
+
 def test_python_image():
     eq_('python2', tools.python_image(False))
     eq_('python2', tools.python_image(''))